@@ -17,10 +17,15 @@ login_manager.login_message_category = "info"
 
 @login_manager.unauthorized_handler
 def unauthorized():
-    from flask import request, jsonify, redirect, url_for
-
-    if request.path.startswith("/api/"):
-        return jsonify({"error": "Unauthorized", "message": "Please log in"}), 401
+    from flask import request, jsonify, redirect, url_for, current_app
+    from .auth.tokens import is_token_request
+
+    if request.path.startswith(tuple(current_app.config["TOKEN_AUTH_PATHS"])):
+        response = jsonify({"error": "Unauthorized", "message": "Please log in"})
+        response.status_code = 401
+        if is_token_request():
+            response.headers["WWW-Authenticate"] = 'Bearer error="invalid_token"'
+        return response
     return redirect(url_for("auth.login"))
 
 
@@ -38,15 +43,28 @@ def create_app(config_name=None):
 
     # Initialize extensions with app
     db.init_app(app)
-    migrate.init_app(app, db)
+    # SQLite can only alter columns by copying the table
+    migrate.init_app(app, db, render_as_batch=True)
     login_manager.init_app(app)
     mail.init_app(app)
 
+    from .utils.response_cache import response_cache
+
+    response_cache.init_app(app)
+
+    from .utils.assets import static_assets
+
+    static_assets.init_app(app)
+
     # Initialize error handlers
     from . import errors
 
     errors.init_app(app)
 
+    from .utils import templates
+
+    templates.init_app(app)
+
     # Configure CORS
     CORS(
         app,
@@ -102,6 +120,12 @@ def create_app(config_name=None):
 
     app.register_blueprint(farm_blueprint, url_prefix="/farm")
 
+    from .farm.density import weed_density
+    from .farm.derivatives import image_derivatives
+
+    weed_density.init_app(app)
+    image_derivatives.init_app(app)
+
     from .weather import weather as weather_blueprint
 
     app.register_blueprint(weather_blueprint, url_prefix="/weather")
@@ -118,6 +142,14 @@ def create_app(config_name=None):
 
     app.register_blueprint(irrigation_blueprint, url_prefix="/irrigation")
 
+    from .feed import feed_bp
+    from .feed.frame_cache import detection_cache
+    from .feed.motion import motion_gate
+
+    app.register_blueprint(feed_bp)
+    detection_cache.init_app(app)
+    motion_gate.init_app(app)
+
     # Context processor to make weather data available to all templates
 
     @app.context_processor
@@ -0,0 +1,75 @@
+# app/admin/models.py
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.auth.models import User
+from app.farm.models import Farm, FarmImage, SensorData
+
+
+def _count(model, *criteria):
+    return db.select(db.func.count()).select_from(model).where(*criteria).scalar_subquery()
+
+
+class StatsSnapshot(db.Model):
+    """Periodically refreshed copy of the system-wide admin statistics"""
+    __tablename__ = 'stats_snapshots'
+
+    id = db.Column(db.Integer, primary_key=True)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    total_users = db.Column(db.Integer, nullable=False, default=0)
+    pending_users = db.Column(db.Integer, nullable=False, default=0)
+    total_farms = db.Column(db.Integer, nullable=False, default=0)
+    avg_farm_size = db.Column(db.Float, nullable=False, default=0)
+    total_images = db.Column(db.Integer, nullable=False, default=0)
+    sensor_types = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def collect():
+        """Compute every statistic in a single aggregate query"""
+        row = db.session.execute(db.select(
+            _count(User).label('total_users'),
+            _count(User, User.is_approved.is_(False)).label('pending_users'),
+            _count(Farm).label('total_farms'),
+            db.select(db.func.avg(Farm.size_acres)).scalar_subquery().label('avg_farm_size'),
+            _count(FarmImage).label('total_images'),
+            db.select(db.func.count(db.distinct(SensorData.sensor_type)))
+            .scalar_subquery().label('sensor_types'),
+        )).one()
+        stats = row._asdict()
+        stats['avg_farm_size'] = stats['avg_farm_size'] or 0
+        return stats
+
+    @classmethod
+    def refresh(cls):
+        """Recompute the statistics and store them as the current snapshot"""
+        values = dict(cls.collect(), computed_at=datetime.utcnow())
+        if db.session.get(cls, 1) is None:
+            # The migration seeds the row; databases made by create_all start without it
+            db.session.add(cls(id=1, **values))
+            try:
+                db.session.commit()
+                return db.session.get(cls, 1)
+            except IntegrityError:
+                # Another worker inserted it first
+                db.session.rollback()
+        db.session.execute(db.update(cls).where(cls.id == 1).values(**values))
+        db.session.commit()
+        return db.session.get(cls, 1)
+
+    @classmethod
+    def expire(cls):
+        """Mark the snapshot stale so the next read recomputes it"""
+        db.session.execute(db.update(cls).values(computed_at=datetime.min))
+
+    @classmethod
+    def current(cls):
+        """Return the snapshot, refreshing it first if older than ADMIN_STATS_TTL seconds"""
+        snapshot = db.session.get(cls, 1)
+        ttl = timedelta(seconds=current_app.config['ADMIN_STATS_TTL'])
+        if snapshot is None or datetime.utcnow() - snapshot.computed_at > ttl:
+            snapshot = cls.refresh()
+        return snapshot
+
+    def __repr__(self):
+        return f'<StatsSnapshot computed at {self.computed_at}>'
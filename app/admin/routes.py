@@ -5,7 +5,9 @@ from .. import db
 from . import admin
 from ..auth.models import User
 from ..farm.models import Farm, FarmImage, SensorData, Alert
+from .models import StatsSnapshot
 from ..utils.email import send_email
+from ..utils.pagination import paginate
 
 @admin.before_request
 def before_request():
@@ -18,22 +20,33 @@ def before_request():
 @login_required
 def dashboard():
     """System dashboard with overview of system for all users"""
+    snapshot = StatsSnapshot.current()
     stats = {
-        'total_users': User.query.count(),
-        'pending_approvals': User.query.filter_by(is_approved=False).count(),
-        'total_farms': Farm.query.count(),
-        'total_images': FarmImage.query.count(),
-        'recent_alerts': Alert.query.order_by(Alert.created_at.desc()).limit(5).all()
+        'total_users': snapshot.total_users,
+        'pending_approvals': snapshot.pending_users,
+        'total_farms': snapshot.total_farms,
+        'total_images': snapshot.total_images,
+        'recent_alerts': Alert.query.order_by(Alert.created_at.desc()).limit(5).all(),
+        'computed_at': snapshot.computed_at
     }
     
     return render_template('admin/dashboard.html', stats=stats)
 
 
+@admin.route('/stats/refresh', methods=['POST'])
+@login_required
+def refresh_stats():
+    """Recompute the cached system statistics on demand"""
+    StatsSnapshot.refresh()
+    flash('System statistics refreshed.', 'success')
+    return redirect(request.referrer or url_for('admin.dashboard'))
+
+
 @admin.route('/pending_approvals')
 @login_required
 def pending_approvals():
     """Display list of users pending approval (accessible by all logged-in users)"""
-    users = User.query.filter_by(is_approved=False).order_by(User.created_at.desc()).all()
+    users = paginate(User.query.filter_by(is_approved=False), User.created_at, User.id)
     return render_template('admin/pending_approvals.html', users=users)
 
 
@@ -41,7 +54,7 @@ def pending_approvals():
 @login_required
 def users():
     """Display list of all users (accessible by all logged-in users)"""
-    users = User.query.order_by(User.created_at.desc()).all()
+    users = paginate(User.query, User.created_at, User.id)
     return render_template('admin/users.html', users=users)
 
 
@@ -51,6 +64,7 @@ def approve_user(user_id):
     """Approve a user registration (accessible by all logged-in users)"""
     user = User.query.get_or_404(user_id)
     user.is_approved = True
+    StatsSnapshot.expire()
     db.session.commit()
     
     # Send approval notification to user
@@ -81,6 +95,7 @@ def reject_user(user_id):
     )
     
     db.session.delete(user)
+    StatsSnapshot.expire()
     db.session.commit()
     
     flash(f'User {username} has been rejected and removed.', 'success')
@@ -91,7 +106,7 @@ def reject_user(user_id):
 @login_required
 def farms():
     """Display list of all farms (accessible by all logged-in users)"""
-    farms = Farm.query.order_by(Farm.created_at.desc()).all()
+    farms = paginate(Farm.query, Farm.created_at, Farm.id)
     return render_template('admin/farms.html', farms=farms)
 
 
@@ -100,9 +115,12 @@ def farms():
 def farm_details(farm_id):
     """Display details of a specific farm (accessible by all logged-in users)"""
     farm = Farm.query.get_or_404(farm_id)
-    images = FarmImage.query.filter_by(farm_id=farm_id).order_by(FarmImage.upload_date.desc()).all()
-    sensor_data = SensorData.query.filter_by(farm_id=farm_id).order_by(SensorData.timestamp.desc()).limit(50).all()
-    alerts = Alert.query.filter_by(farm_id=farm_id).order_by(Alert.created_at.desc()).all()
+    images = paginate(FarmImage.query.filter_by(farm_id=farm_id), FarmImage.upload_date, FarmImage.id,
+                      cursor_arg='images_cursor')
+    sensor_data = paginate(SensorData.query.filter_by(farm_id=farm_id), SensorData.timestamp, SensorData.id,
+                           cursor_arg='sensor_cursor')
+    alerts = paginate(Alert.query.filter_by(farm_id=farm_id), Alert.created_at, Alert.id,
+                      cursor_arg='alerts_cursor')
     
     return render_template('admin/farm_details.html', farm=farm, images=images, 
                            sensor_data=sensor_data, alerts=alerts)
@@ -112,17 +130,19 @@ def farm_details(farm_id):
 @login_required
 def summary():
     """Display system summary and statistics (accessible by all logged-in users)"""
-    # Get statistics for dashboard
+    # Get statistics for dashboard from the cached snapshot
+    snapshot = StatsSnapshot.current()
     user_stats = {
-        'total': User.query.count(),
-        'pending': User.query.filter_by(is_approved=False).count()
+        'total': snapshot.total_users,
+        'pending': snapshot.pending_users
     }
     
     farm_stats = {
-        'total': Farm.query.count(),
-        'avg_size': db.session.query(db.func.avg(Farm.size_acres)).scalar() or 0,
-        'images': FarmImage.query.count(),
-        'sensors': SensorData.query.distinct(SensorData.sensor_type).count()
+        'total': snapshot.total_farms,
+        'avg_size': snapshot.avg_farm_size,
+        'images': snapshot.total_images,
+        'sensors': snapshot.sensor_types
     }
     
-    return render_template('admin/summary.html', user_stats=user_stats, farm_stats=farm_stats)
\ No newline at end of file
+    return render_template('admin/summary.html', user_stats=user_stats, farm_stats=farm_stats,
+                           computed_at=snapshot.computed_at)
\ No newline at end of file
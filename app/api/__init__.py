@@ -2,4 +2,4 @@ from flask import Blueprint
 
 api = Blueprint('api', __name__)
 
-from . import routes
\ No newline at end of file
+from . import routes, uploads
\ No newline at end of file
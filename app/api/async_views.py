@@ -0,0 +1,32 @@
+# app/api/async_views.py
+"""Async views for the JSON API, used by the ASGI entry point only"""
+from flask_login import current_user
+from ..asgi import async_view
+from ..auth.tokens import user_farms
+from ..farm.models import Farm
+from ..utils.http_cache import is_not_modified
+from ..utils.response_cache import response_cache
+from .routes import _dashboard_cache_key, dashboard_weather_request
+
+
+def _dashboard_plan():
+    if not current_user.is_authenticated:
+        return []
+    # A 304 or a cached dashboard is served without calling OpenWeather at all
+    if is_not_modified():
+        return []
+    entry = _dashboard_cache_key()
+    if entry is None or response_cache.peek(entry[0]) is not None:
+        return []
+    location = user_farms().with_entities(Farm.location).limit(1).scalar()
+    weather_request = dashboard_weather_request(location or "")
+    return [weather_request] if weather_request else []
+
+
+@async_view("/api/dashboard-data")
+async def dashboard_data(request):
+    """Fetch the farm's weather without holding a thread, then run the Flask view"""
+    plan = await request.run_sync(_dashboard_plan)
+    if plan:
+        await request.prefetch(plan)
+    return await request.dispatch()
@@ -1,22 +1,99 @@
 # app/api/routes.py
-from flask import jsonify, current_app
+from flask import Response, jsonify, current_app, request, url_for
 from flask_login import login_required, current_user
-import requests
+import json
+import time
 from datetime import datetime, timedelta
 from . import api
-from ..farm.models import Farm, SensorData, Alert, FarmStage, PestControl
+from .. import db
+from ..auth.models import User
+from ..auth.tokens import restrict_to_token_farms, token_farm_ids, user_farms
+from ..farm.models import (
+    Farm,
+    FarmImage,
+    SensorData,
+    Alert,
+    FarmStage,
+    PestControl,
+    Field,
+    FieldDensityGrid,
+    ImageDetection,
+)
+from ..ml.detections import detection_summary, detections_with_weeds
+from ..farm.density import TILE_LAYERS, render_tile, weed_density
+from ..farm.derivatives import image_derivatives
+from ..utils.pagination import paginate
+from ..utils.assets import static_assets
+from ..utils.http_cache import conditional
+from ..utils.response_cache import cached_response, response_cache
+from ..utils.events import broker
+from ..utils import upstream
+from ..feed.frame_cache import detection_cache
+from ..feed.motion import motion_gate
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+def dashboard_weather_request(location):
+    """The (url, params) OpenWeather request dashboard_data makes for location, if any"""
+    api_key = os.getenv("OPENWEATHER_API_KEY")
+    if not api_key or "," not in location:
+        return None
+    try:
+        lat, lon = map(float, location.split(","))
+    except ValueError:
+        return None
+    params = {
+        "lat": lat,
+        "lon": lon,
+        "exclude": "minutely",
+        "units": "metric",
+        "appid": api_key,
+    }
+    return f"{current_app.config['OPENWEATHER_BASE_URL']}/onecall", params
+
+
+def _dashboard_version():
+    """Data versions the dashboard payload depends on, read without building it"""
+    farm = user_farms().with_entities(
+        Farm.id, Farm.name, Farm.location, Farm.updated_at, Farm.unread_alert_count
+    ).first()
+    if farm is None:
+        return None
+
+    def latest(column, farm_column):
+        return db.select(db.func.max(column)).where(farm_column == farm.id).scalar_subquery()
+
+    latest_ids = db.session.execute(
+        db.select(
+            latest(SensorData.id, SensorData.farm_id),
+            latest(FarmStage.id, FarmStage.farm_id),
+            latest(Alert.id, Alert.farm_id),
+        )
+    ).one()
+    # The weather part of the payload is refreshed at most once per bucket
+    weather_bucket = int(time.time() // current_app.config["WEATHER_CACHE_SECONDS"])
+    return (tuple(farm), tuple(latest_ids), weather_bucket), None
+
+
+def _dashboard_cache_key():
+    # Resolving the farm here also enforces ownership and token scope on cache hits
+    farm_id = user_farms().with_entities(Farm.id).limit(1).scalar()
+    if farm_id is None:
+        return None
+    return f"dashboard:{farm_id}", [f"farm:{farm_id}"]
+
+
 @api.route("/dashboard-data")
 @login_required
+@conditional(_dashboard_version)
+@cached_response(_dashboard_cache_key)
 def dashboard_data():
     """API endpoint that provides dashboard data in JSON format"""
     # Get the user's farm
-    farm = Farm.query.filter_by(user_id=current_user.id).first()
+    farm = user_farms().first()
 
     if not farm:
         return jsonify({"error": "No farm found. Please register a farm first."}), 404
@@ -51,8 +128,8 @@ def dashboard_data():
             api_key = os.getenv("OPENWEATHER_API_KEY")
             if api_key:
                 try:
-                    weather_url = f"https://api.openweathermap.org/data/2.5/onecall?lat={lat}&lon={lon}&exclude=minutely&units=metric&appid={api_key}"
-                    response = requests.get(weather_url)
+                    weather_url, params = dashboard_weather_request(farm.location)
+                    response = upstream.get(weather_url, params=params)
 
                     if response.status_code == 200:
                         data = response.json()
@@ -243,6 +320,260 @@ def dashboard_data():
     return jsonify(response_data)
 
 
+@api.route("/alerts/unread-count")
+@login_required
+def unread_alert_count():
+    """Return the unread alert count for the current user, or for one of their farms"""
+    farm_id = request.args.get("farm_id", type=int)
+    if farm_id is not None:
+        farm = user_farms().filter_by(id=farm_id).first_or_404()
+        return jsonify({"farm_id": farm.id, "unread_count": farm.unread_alert_count})
+
+    if token_farm_ids() is not None:
+        # A farm-scoped token only sees the alerts of its farms
+        unread_count = (
+            user_farms().with_entities(db.func.sum(Farm.unread_alert_count)).scalar()
+            or 0
+        )
+        return jsonify({"unread_count": unread_count})
+
+    # current_user may be a cached snapshot here, so read the live counter
+    unread_count = (
+        db.session.query(User.unread_alert_count)
+        .filter_by(id=current_user.id)
+        .scalar()
+    )
+    return jsonify({"unread_count": unread_count})
+
+
+def _alert_to_dict(alert):
+    return {
+        "id": alert.id,
+        "farm_id": alert.farm_id,
+        "title": alert.alert_type,
+        "message": alert.message,
+        "severity": alert.severity,
+        "is_read": alert.is_read,
+        "created_at": alert.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def _image_to_dict(image):
+    data = {
+        "id": image.id,
+        "path": url_for("farm.image_file", image_id=image.id),
+        "image_type": image.image_type,
+        "processed": image.processed,
+        "upload_date": image.upload_date.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    if image.detection is not None:
+        data["weed_count"] = image.detection.weed_count
+        data["maize_count"] = image.detection.maize_count
+        data["max_conf"] = image.detection.max_conf
+    return data
+
+
+def _since_arg():
+    """Start of the ?days= window as a naive UTC datetime, or None"""
+    days = request.args.get("days", type=int)
+    return datetime.utcnow() - timedelta(days=days) if days else None
+
+
+def _sensor_data_to_dict(reading):
+    return {
+        "id": reading.id,
+        "type": reading.sensor_type,
+        "value": reading.value,
+        "unit": reading.unit,
+        "timestamp": reading.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+@api.route("/alerts")
+@login_required
+def list_alerts():
+    """Cursor-paginated alerts for the current user, newest first"""
+    query = restrict_to_token_farms(
+        Alert.query.filter_by(user_id=current_user.id), Alert.farm_id
+    )
+    if request.args.get("unread", type=int):
+        query = query.filter_by(is_read=False)
+    page = paginate(query, Alert.created_at, Alert.id)
+    return jsonify(page.to_dict(_alert_to_dict))
+
+
+@api.route("/farms/<int:farm_id>/images")
+@login_required
+def list_farm_images(farm_id):
+    """Cursor-paginated images for one of the current user's farms
+
+    ?min_weeds=N limits the list to images with at least N weeds detected,
+    and ?days=D to the last D days of those.
+    """
+    farm = user_farms().filter_by(id=farm_id).first_or_404()
+    min_weeds = request.args.get("min_weeds", type=int)
+    if min_weeds is None:
+        query = FarmImage.query.filter_by(farm_id=farm.id).options(
+            db.joinedload(FarmImage.detection)
+        )
+        page = paginate(query, FarmImage.upload_date, FarmImage.id)
+        return jsonify(page.to_dict(_image_to_dict))
+
+    # Paged in index order over the detection rows, then their images
+    query = detections_with_weeds(farm.id, min_weeds, since=_since_arg()).options(
+        db.joinedload(ImageDetection.image)
+    )
+    page = paginate(query, ImageDetection.captured_at, ImageDetection.image_id)
+    return jsonify(page.to_dict(lambda detection: _image_to_dict(detection.image)))
+
+
+@api.route("/farms/<int:farm_id>/detections/summary")
+@login_required
+def farm_detection_summary(farm_id):
+    """Weed and maize totals over a farm's processed images; ?days= and ?min_weeds="""
+    farm = user_farms().filter_by(id=farm_id).first_or_404()
+    summary = detection_summary(
+        farm.id, since=_since_arg(), min_weeds=request.args.get("min_weeds", 1, type=int)
+    )
+    return jsonify(summary)
+
+
+@api.route("/farms/<int:farm_id>/sensor-data")
+@login_required
+def list_farm_sensor_data(farm_id):
+    """Cursor-paginated sensor readings for one of the current user's farms"""
+    farm = user_farms().filter_by(id=farm_id).first_or_404()
+    query = SensorData.query.filter_by(farm_id=farm.id)
+    if request.args.get("type"):
+        query = query.filter_by(sensor_type=request.args["type"])
+    page = paginate(query, SensorData.timestamp, SensorData.id)
+    return jsonify(page.to_dict(_sensor_data_to_dict))
+
+
+def _user_density_grid(field_id):
+    """The field's density grid, without its layers, if the field is the user's"""
+    farm_ids = user_farms().with_entities(Farm.id)
+    return (
+        FieldDensityGrid.query.options(db.defer(FieldDensityGrid.layers))
+        .join(Field, Field.id == FieldDensityGrid.field_id)
+        .filter(FieldDensityGrid.field_id == field_id, Field.farm_id.in_(farm_ids))
+        .first()
+    )
+
+
+def _density_version(field_id, **kwargs):
+    grid = _user_density_grid(field_id)
+    if grid is None:
+        return None
+    return (grid.id, grid.version), grid.updated_at
+
+
+@api.route("/fields/<int:field_id>/weed-density")
+@login_required
+@conditional(_density_version)
+def field_weed_density(field_id):
+    """Summary of a field's weed-density heatmap, read from its summary columns"""
+    grid = _user_density_grid(field_id)
+    if grid is None:
+        return jsonify({"error": "No detections recorded for this field"}), 404
+    return jsonify(
+        {
+            "field_id": grid.field_id,
+            "bounds": {
+                "north": grid.north,
+                "west": grid.west,
+                "south": grid.south,
+                "east": grid.east,
+            },
+            "rows": grid.rows,
+            "cols": grid.cols,
+            "cell_meters": grid.cell_meters,
+            "frames": grid.frames,
+            "maize_count": grid.maize_count,
+            "weed_count": grid.weed_count,
+            "weed_ratio": (
+                round(grid.weed_count / (grid.weed_count + grid.maize_count), 4)
+                if grid.weed_count + grid.maize_count
+                else None
+            ),
+            "cells_observed": grid.cells_observed,
+            "coverage": round(grid.cells_observed / (grid.rows * grid.cols), 4),
+            "max_weed_density": grid.max_weed_density,
+            "updated_at": grid.updated_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "tiles": f"/api/fields/{grid.field_id}/weed-density/{{z}}/{{x}}/{{y}}.png",
+            "layers": list(TILE_LAYERS),
+        }
+    )
+
+
+@api.route("/fields/<int:field_id>/weed-density/<int:z>/<int:x>/<int:y>.png")
+@login_required
+@conditional(_density_version)
+def field_weed_density_tile(field_id, z, x, y):
+    """Web Mercator heatmap tile; ?layer= weed (default), maize or ratio"""
+    layer = request.args.get("layer", "weed")
+    if layer not in TILE_LAYERS or z > 24 or x >= 2**z or y >= 2**z:
+        return jsonify({"error": "Unknown layer or tile"}), 404
+    grid = _user_density_grid(field_id)
+    if grid is None:
+        return jsonify({"error": "No detections recorded for this field"}), 404
+    png = render_tile(grid, weed_density.cell_values(grid, layer), z, x, y)
+    return Response(png, mimetype="image/png")
+
+
+def _sse_message(event):
+    return (
+        f"id: {event['id']}\nevent: {event['type']}\n"
+        f"data: {json.dumps(event)}\n\n"
+    )
+
+
+@api.route("/events")
+@login_required
+def farm_events():
+    """Stream change events for the user's farms as Server-Sent Events"""
+    config = current_app.config
+    farm_ids = [farm_id for (farm_id,) in user_farms().with_entities(Farm.id)]
+    # Take the slot now, not when the stream starts, so a burst can't overshoot
+    subscription = broker.try_subscribe(farm_ids, config["SSE_MAX_CONNECTIONS"])
+    if subscription is None:
+        response = jsonify({"error": "Too many event streams, poll instead"})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(config["SSE_RETRY_MS"] // 1000 or 1)
+        return response
+
+    # The stream never touches the database, so don't pin a pooled connection
+    db.session.remove()
+    heartbeat = config["SSE_HEARTBEAT_SECONDS"]
+    max_duration = config["SSE_MAX_DURATION"]
+    retry_ms = config["SSE_RETRY_MS"]
+
+    def stream():
+        with subscription:
+            yield f"retry: {retry_ms}\n\n"
+            deadline = time.monotonic() + max_duration
+            while time.monotonic() < deadline:
+                event = subscription.get(timeout=heartbeat)
+                if subscription.overflowed:
+                    # Dropped events: tell the client to refetch everything
+                    subscription.drain()
+                    yield "event: resync\ndata: {}\n\n"
+                elif event is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield _sse_message(event)
+            # Closing after max_duration lets EventSource reconnect to a fresh worker
+
+    response = Response(
+        stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Frees the slot even if the stream is never started
+    response.call_on_close(subscription.close)
+    return response
+
+
 @api.route("/debug")
 @login_required
 def api_debug():
@@ -273,14 +604,27 @@ def api_debug():
             )
         ).count(),
         "alert_count": Alert.query.filter_by(user_id=current_user.id).count(),
+        "response_cache": response_cache.stats(),
+        "detection_cache": detection_cache.stats(),
+        "motion_gate": motion_gate.stats(),
+        "weed_density": weed_density.stats(),
+        "image_derivatives": image_derivatives.stats(),
+        "static_assets": static_assets.stats(),
+        "event_streams": broker.connection_count(),
         "date": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
     }
 
     return jsonify(debug_info)
 
 
+def _profile_version():
+    fields = ("id", "username", "email", "first_name", "last_name", "is_approved")
+    return tuple(getattr(current_user, field) for field in fields), None
+
+
 @api.route("/user-profile")
 @login_required
+@conditional(_profile_version, cache_control="private, max-age=60")
 def user_profile():
     """Return current user profile information"""
     profile_data = {
@@ -0,0 +1,311 @@
+# app/api/uploads.py
+"""Chunked, resumable uploads of field videos.
+
+Videos are far larger than MAX_CONTENT_LENGTH and recorded where links
+drop, so they are sent in chunks a client can resume after any failure:
+
+    POST  /api/uploads/videos                    {"farm_id", "filename", "size", "sha256"?}
+          -> 201 {"id", "offset": 0, "chunk_size", ...}
+    PATCH /api/uploads/videos/<id>               raw chunk bytes, with headers
+          Upload-Offset: <where the chunk starts>
+          Upload-Checksum: sha256 <base64 digest of the chunk>
+          -> 200 {"offset": <bytes received>}
+    GET   /api/uploads/videos/<id>               -> {"offset", "status", ...}
+    POST  /api/uploads/videos/<id>/complete      -> 202, analysis started
+
+Each chunk is streamed from the request body straight into the video's
+final file at its offset, UPLOAD_CHUNK_SIZE bytes at a time, and hashed
+on the way. The bytes only count as received once the checksum matches
+and they are on disk; otherwise the file is cut back and the client
+resends. After a dropped connection the client GETs the offset and
+carries on from there. A chunk whose offset is not the current one gets
+409 with the current offset. A request holds an exclusive lock on the
+file from the offset check until the offset has moved, so a second
+request for the same offset (a retry racing the original) gets 409
+instead of writing over it, and bytes cut back after a failure were
+never acknowledged. When
+the client sent the whole file's sha256, /complete checks it before the
+video goes to the detector (app/feed/video.py).
+
+Uploads still incomplete after VIDEO_UPLOAD_EXPIRE_HOURS are removed by
+`flask expire-video-uploads`.
+"""
+import base64
+import binascii
+import hashlib
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from flask import current_app, jsonify, request, url_for
+from flask_login import current_user, login_required
+from werkzeug.utils import secure_filename
+from . import api
+from .. import db
+from ..auth.tokens import restrict_to_token_farms, user_farms
+from ..farm.models import FarmVideo
+from ..farm.storage import hash_file
+
+try:
+    import fcntl
+except ImportError:  # Windows: chunks are only serialised within this process
+    fcntl = None
+
+VIDEO_FOLDER = "videos"
+
+_writing = set()  # paths of videos being written here, without fcntl
+_writing_lock = threading.Lock()
+
+
+def _video_path(video):
+    return os.path.join(
+        current_app.root_path, current_app.config["UPLOAD_FOLDER"], video.path
+    )
+
+
+def _video_to_dict(video):
+    data = {
+        "id": video.upload_id,
+        "farm_id": video.farm_id,
+        "filename": video.filename,
+        "size": video.size,
+        "offset": video.received,
+        "status": video.status,
+        "created_at": video.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+        "url": url_for("api.video_upload", upload_id=video.upload_id),
+    }
+    if video.processing_results:
+        data["results"] = json.loads(video.processing_results)
+    return data
+
+
+def _upload_response(video, status=200, **extra):
+    response = jsonify(dict(_video_to_dict(video), **extra))
+    response.status_code = status
+    response.headers["Upload-Offset"] = str(video.received)
+    response.headers["Upload-Length"] = str(video.size)
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+def _user_video(upload_id):
+    query = FarmVideo.query.filter_by(upload_id=upload_id, user_id=current_user.id)
+    return restrict_to_token_farms(query, FarmVideo.farm_id).first_or_404()
+
+
+@contextmanager
+def _exclusive(f):
+    """Lock the open video file for this request; yields False if another has it"""
+    if fcntl is not None:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return
+    with _writing_lock:
+        locked = f.name not in _writing
+        _writing.add(f.name)
+    try:
+        yield locked
+    finally:
+        if locked:
+            with _writing_lock:
+                _writing.discard(f.name)
+
+
+def _is_hex(value):
+    try:
+        bytes.fromhex(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _chunk_checksum():
+    """Expected SHA-256 digest of the chunk from Upload-Checksum, or None"""
+    algorithm, _, value = request.headers.get("Upload-Checksum", "").partition(" ")
+    if algorithm.lower() != "sha256":
+        return None
+    try:
+        return base64.b64decode(value.strip(), validate=True)
+    except binascii.Error:
+        return None
+
+
+@api.route("/uploads/videos", methods=["POST"])
+@login_required
+def create_video_upload():
+    """Start a resumable video upload"""
+    data = request.get_json(silent=True) or {}
+    farm = user_farms().filter_by(id=data.get("farm_id")).first()
+    if farm is None:
+        return jsonify({"error": "Farm not found"}), 404
+
+    filename = secure_filename(str(data.get("filename", "")))
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in current_app.config["VIDEO_EXTENSIONS"]:
+        return jsonify({"error": "Unsupported video type"}), 400
+    size = data.get("size")
+    if not isinstance(size, int) or size <= 0:
+        return jsonify({"error": "size must be the video's length in bytes"}), 400
+    if size > current_app.config["VIDEO_MAX_SIZE"]:
+        return jsonify({"error": "Video too large"}), 413
+    sha256 = data.get("sha256")
+    if sha256 is not None and (
+        not isinstance(sha256, str) or len(sha256) != 64 or not _is_hex(sha256)
+    ):
+        return jsonify({"error": "sha256 must be a hex digest"}), 400
+
+    upload_id = uuid.uuid4().hex
+    video = FarmVideo(
+        upload_id=upload_id,
+        farm_id=farm.id,
+        user_id=current_user.id,
+        filename=filename,
+        path=f"{VIDEO_FOLDER}/{upload_id}{extension}",
+        size=size,
+        sha256=sha256.lower() if sha256 else None,
+    )
+    path = _video_path(video)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+    db.session.add(video)
+    db.session.commit()
+
+    response = _upload_response(
+        video,
+        201,
+        chunk_size=current_app.config["VIDEO_CHUNK_SIZE"],
+        max_chunk_size=current_app.config["MAX_CONTENT_LENGTH"],
+    )
+    response.headers["Location"] = response.json["url"]
+    return response
+
+
+@api.route("/uploads/videos/<upload_id>", methods=["GET"])
+@login_required
+def video_upload(upload_id):
+    """Progress of an upload (the offset to resume from) and, later, its results"""
+    return _upload_response(_user_video(upload_id))
+
+
+@api.route("/uploads/videos/<upload_id>", methods=["PATCH"])
+@login_required
+def append_video_chunk(upload_id):
+    """Write one checksummed chunk at Upload-Offset"""
+    video = _user_video(upload_id)
+    if video.status != "uploading":
+        return _upload_response(video, 409, error="Upload already completed")
+    offset = request.headers.get("Upload-Offset", type=int)
+    if offset != video.received:
+        return _upload_response(
+            video, 409, error="Upload-Offset does not match the bytes received"
+        )
+    expected = _chunk_checksum()
+    if expected is None:
+        return jsonify({"error": "Upload-Checksum: sha256 <base64> is required"}), 400
+    length = request.content_length
+    if not length:
+        return jsonify({"error": "Content-Length is required"}), 411
+    if offset + length > video.size:
+        return jsonify({"error": "Chunk runs past the declared size"}), 400
+
+    digest = hashlib.sha256()
+    chunk_size = current_app.config["UPLOAD_CHUNK_SIZE"]
+    with open(_video_path(video), "r+b") as f, _exclusive(f) as locked:
+        if not locked:
+            return _upload_response(
+                video, 409, error="Another request is appending at this offset"
+            )
+        # It may have moved while the other request held the lock
+        db.session.refresh(video)
+        if offset != video.received:
+            return _upload_response(
+                video, 409, error="Upload-Offset does not match the bytes received"
+            )
+        # Everything from offset on is unacknowledged, so it may be cut back
+        f.seek(offset)
+        try:
+            while True:
+                block = request.stream.read(chunk_size)
+                if not block:
+                    break
+                digest.update(block)
+                f.write(block)
+            if f.tell() - offset != length or digest.digest() != expected:
+                f.truncate(offset)
+                return jsonify({"error": "Checksum mismatch", "offset": offset}), 400
+            # Acknowledged bytes must survive a crash
+            f.flush()
+            os.fsync(f.fileno())
+        except BaseException:
+            # e.g. the client disconnected mid-chunk
+            f.truncate(offset)
+            raise
+
+        moved = FarmVideo.query.filter_by(id=video.id, received=offset).update(
+            {"received": offset + length, "updated_at": datetime.utcnow()}
+        )
+        db.session.commit()
+    db.session.refresh(video)
+    if not moved:
+        return _upload_response(
+            video, 409, error="Another request appended at this offset"
+        )
+    return _upload_response(video)
+
+
+@api.route("/uploads/videos/<upload_id>/complete", methods=["POST"])
+@login_required
+def complete_video_upload(upload_id):
+    """Finish an upload whose bytes have all arrived and start the analysis"""
+    video = _user_video(upload_id)
+    if video.status != "uploading" or video.received != video.size:
+        return _upload_response(video, 409, error="Upload is not complete")
+
+    path = _video_path(video)
+    # Drop anything a failed chunk left past the end
+    os.truncate(path, video.size)
+    if video.sha256 and hash_file(
+        path, current_app.config["UPLOAD_CHUNK_SIZE"]
+    ) != video.sha256:
+        video.status = "failed"
+        video.processing_results = json.dumps({"error": "sha256 of the video does not match"})
+        db.session.commit()
+        return jsonify({"error": "sha256 of the video does not match"}), 400
+
+    moved = FarmVideo.query.filter_by(id=video.id, status="uploading").update(
+        {"status": "processing", "updated_at": datetime.utcnow()}
+    )
+    db.session.commit()
+    db.session.refresh(video)
+    if not moved:
+        return _upload_response(video, 409, error="Upload already completed")
+
+    from ..ml.utils import process_farm_video
+
+    process_farm_video(video.id)
+    return _upload_response(video, 202)
+
+
+def expire_video_uploads(max_age):
+    """Delete uploads still incomplete after max_age and their files; how many"""
+    cutoff = datetime.utcnow() - max_age
+    expired = FarmVideo.query.filter(
+        FarmVideo.status == "uploading", FarmVideo.updated_at < cutoff
+    ).all()
+    for video in expired:
+        try:
+            os.remove(_video_path(video))
+        except FileNotFoundError:
+            pass
+        db.session.delete(video)
+    db.session.commit()
+    return len(expired)
@@ -0,0 +1,289 @@
+# app/asgi.py
+"""ASGI serving mode for the I/O-bound endpoints.
+
+create_asgi_app(flask_app) wraps the Flask app in an ASGI application:
+
+- Async views registered with @async_view run on the event loop. They do
+  their authorization and DB reads in a worker thread (AsyncRequest.run_sync),
+  fetch the upstream requests the Flask view will make concurrently with one
+  shared httpx.AsyncClient (AsyncRequest.prefetch), then run the unchanged
+  Flask view with the answers already in hand (see app/utils/upstream.py).
+  No thread waits on OpenWeather.
+- Every other request goes straight to the Flask app in a bounded thread
+  pool, so the template-heavy blueprints keep their WSGI code paths.
+
+Request bodies are read on the event loop before a thread is taken, so slow
+uploads don't hold one either. Serve with an ASGI server, e.g.
+
+    uvicorn asgi:application --workers 4
+"""
+import asyncio
+import io
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import Map, Rule
+from .utils.upstream import (
+    PREFETCH_ENVIRON_KEY,
+    UpstreamError,
+    UpstreamResponse,
+    request_key,
+)
+
+_async_rules = Map()
+_async_handlers = {}
+
+
+def async_view(rule, methods=("GET",)):
+    """Register an async view for rule under the ASGI entry point
+
+    The view is called as view(request, **view_args) with an AsyncRequest
+    and must return await request.dispatch() or another ASGI response.
+    """
+
+    def decorator(f):
+        endpoint = f"{f.__module__}.{f.__name__}"
+        _async_rules.add(Rule(rule, endpoint=endpoint, methods=list(methods)))
+        _async_handlers[endpoint] = f
+        return f
+
+    return decorator
+
+
+class ClientDisconnected(Exception):
+    """The client went away while a response was being streamed"""
+
+
+def build_environ(scope, body):
+    """WSGI environ for an ASGI HTTP scope and its fully read body"""
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin1"),
+        "PATH_INFO": scope["path"].encode().decode("latin1"),
+        "QUERY_STRING": scope["query_string"].decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"], environ["REMOTE_PORT"] = map(str, scope["client"])
+    for raw_name, raw_value in scope["headers"]:
+        name = raw_name.decode("latin1")
+        value = raw_value.decode("latin1")
+        if name == "content-type":
+            key = "CONTENT_TYPE"
+        elif name == "content-length":
+            key = "CONTENT_LENGTH"
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _run_wsgi(wsgi_app, environ, send):
+    """Call wsgi_app and pass its response to send as ASGI messages"""
+    state = {"started": False}
+
+    def start_response(status, headers, exc_info=None):
+        if exc_info and state["started"]:
+            raise exc_info[1].with_traceback(exc_info[2])
+        state["status"] = int(status.split(" ", 1)[0])
+        state["headers"] = [
+            (name.lower().encode("latin1"), value.encode("latin1"))
+            for name, value in headers
+        ]
+
+    def start():
+        if not state["started"]:
+            state["started"] = True
+            send(
+                {
+                    "type": "http.response.start",
+                    "status": state["status"],
+                    "headers": state["headers"],
+                }
+            )
+
+    result = wsgi_app(environ, start_response)
+    try:
+        for chunk in result:
+            if chunk:
+                start()
+                send({"type": "http.response.body", "body": chunk, "more_body": True})
+        start()
+        send({"type": "http.response.body", "body": b"", "more_body": False})
+    except ClientDisconnected:
+        pass
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+
+
+class AsyncRequest:
+    """One HTTP request being served by an async view"""
+
+    def __init__(self, server, scope, body, send, disconnected):
+        self.server = server
+        self.scope = scope
+        self.body = body
+        self.environ = build_environ(scope, body)
+        self._send = send
+        self._disconnected = disconnected
+
+    def _fresh_environ(self):
+        return dict(self.environ, **{"wsgi.input": io.BytesIO(self.body)})
+
+    async def run_sync(self, fn, *args):
+        """Run fn(*args) in a worker thread inside this request's Flask request context"""
+
+        def call():
+            with self.server.flask_app.request_context(self._fresh_environ()):
+                return fn(*args)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.server.executor, call)
+
+    async def prefetch(self, upstream_requests):
+        """Fetch (url, params) pairs concurrently and hand the answers to the Flask view"""
+        results = await asyncio.gather(
+            *(self.server.fetch(url, params) for url, params in upstream_requests)
+        )
+        self.environ.setdefault(PREFETCH_ENVIRON_KEY, {}).update(results)
+
+    async def dispatch(self):
+        """Serve the request with the Flask app in a worker thread"""
+        loop = asyncio.get_running_loop()
+
+        def send(message):
+            if self._disconnected.is_set():
+                raise ClientDisconnected()
+            asyncio.run_coroutine_threadsafe(self._send(message), loop).result()
+
+        await loop.run_in_executor(
+            self.server.executor,
+            _run_wsgi,
+            self.server.flask_app,
+            self._fresh_environ(),
+            send,
+        )
+
+
+class AsgiServer:
+    """ASGI application serving a Flask app with async views in front of it"""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.config = flask_app.config
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.config["ASGI_THREADS"], thread_name_prefix="asgi-wsgi"
+        )
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.config["UPSTREAM_TIMEOUT"],
+                limits=httpx.Limits(
+                    max_connections=self.config["ASGI_UPSTREAM_CONNECTIONS"]
+                ),
+            )
+        return self._client
+
+    async def fetch(self, url, params):
+        """GET url and return (request_key, UpstreamResponse or UpstreamError)"""
+        key = request_key(url, params)
+        try:
+            response = await self.client.get(url, params=params)
+        except httpx.HTTPError as e:
+            return key, UpstreamError(f"{type(e).__name__}: {e}")
+        return key, UpstreamResponse(response.status_code, response.text)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._client is not None:
+                    await self._client.aclose()
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _read_body(self, receive):
+        """The request body, or None if it exceeds MAX_CONTENT_LENGTH"""
+        limit = self.config.get("MAX_CONTENT_LENGTH")
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if limit is not None and size > limit:
+                return None
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    async def _http(self, scope, receive, send):
+        body = await self._read_body(receive)
+        if body is None:
+            await send({"type": "http.response.start", "status": 413, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        disconnected = threading.Event()
+
+        async def watch_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        watcher = asyncio.create_task(watch_disconnect())
+        request = AsyncRequest(self, scope, body, send, disconnected)
+        try:
+            adapter = _async_rules.bind_to_environ(request.environ)
+            try:
+                endpoint, view_args = adapter.match()
+            except HTTPException:
+                await request.dispatch()
+            else:
+                await _async_handlers[endpoint](request, **view_args)
+        finally:
+            watcher.cancel()
+
+
+def create_asgi_app(flask_app):
+    """ASGI application for flask_app with the async views registered"""
+    config = flask_app.config
+    # Each /api/events stream holds an executor thread until it closes, so
+    # streams must leave threads for ordinary requests (as in gunicorn.conf.py)
+    if "SSE_MAX_CONNECTIONS" not in os.environ:
+        config["SSE_MAX_CONNECTIONS"] = config["ASGI_THREADS"] // 2
+    elif config["SSE_MAX_CONNECTIONS"] >= config["ASGI_THREADS"]:
+        raise ValueError("SSE_MAX_CONNECTIONS must be below ASGI_THREADS")
+
+    # Importing the modules registers their async views
+    from .api import async_views as api_views
+    from .weather import async_views as weather_views
+
+    return AsgiServer(flask_app)
@@ -1,7 +1,10 @@
 from datetime import datetime
+from flask import current_app, has_request_context, request
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 from app import db, login_manager
+from .passwords import hash_password, check_password, needs_rehash
+from . import user_cache
+from .tokens import load_user_from_request
 
 # Remove the import here - we'll use it in methods that need it
 # from app.farm.models import Farm, FarmImage, SensorData, Alert
@@ -10,11 +13,12 @@ from app import db, login_manager
 class User(UserMixin, db.Model):
     """User model for authentication and authorization"""
     __tablename__ = 'users'
+    __table_args__ = (db.Index('ix_users_created_id', 'created_at', 'id'),)
     
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(64), unique=True, index=True, nullable=False)
     username = db.Column(db.String(64), unique=True, index=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(256), nullable=False)
     first_name = db.Column(db.String(64), nullable=False)
     last_name = db.Column(db.String(64), nullable=False)
     phone_number = db.Column(db.String(20), nullable=False)
@@ -23,6 +27,8 @@ class User(UserMixin, db.Model):
     is_approved = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime)
+    # Denormalized count of unread alerts, maintained by listeners in farm.models
+    unread_alert_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     def __init__(self, **kwargs):
         super(User, self).__init__(**kwargs)
@@ -37,20 +43,45 @@ class User(UserMixin, db.Model):
     def password(self, password):
         if len(password) < 8:
             raise ValueError('Password must be at least 8 characters long')
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
         
     def verify_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """Check password, upgrading the stored hash if the hashing method changed.
+
+        The caller is responsible for committing the session after a successful check.
+        """
+        if not check_password(self.password_hash, password):
+            return False
+        if needs_rehash(self.password_hash):
+            self.password_hash = hash_password(password)
+        return True
     
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}"
     
+    def is_admin(self):
+        return self.user_type == 'admin'
+    
     def __repr__(self):
         return f'<User {self.username}> - Type: {self.user_type}'
 
 
+@db.event.listens_for(User, 'after_update')
+@db.event.listens_for(User, 'after_delete')
+def _invalidate_cached_user(mapper, connection, target):
+    user_cache.invalidate(target.id)
+
+
 @login_manager.user_loader
 def load_user(user_id):
+    # Hot JSON paths get a cached read-only snapshot instead of a users query
+    if has_request_context() and request.path.startswith(
+            tuple(current_app.config['USER_SNAPSHOT_PATHS'])):
+        return user_cache.get_snapshot(int(user_id))
     return User.query.get(int(user_id))
 
+
+# Bearer tokens authenticate devices and API clients without a session or query
+login_manager.request_loader(load_user_from_request)
+
 # Farm models moved to app/farm/models.py
\ No newline at end of file
@@ -0,0 +1,98 @@
+# app/auth/passwords.py
+"""Password hashing with a configurable method and an off-thread worker pool.
+
+PASSWORD_HASH_METHOD takes any Werkzeug method string, e.g. "scrypt:32768:8:1"
+or "pbkdf2:sha256:600000". Hashes made with other parameters still verify and
+are upgraded on the next successful login (see User.verify_password).
+
+Hashing is CPU bound, so with PASSWORD_HASH_WORKERS > 0 it runs in a small
+process pool instead of the request thread. At most PASSWORD_HASH_QUEUE jobs
+may be pending at once; beyond that callers wait up to PASSWORD_HASH_TIMEOUT
+seconds and then get PasswordHasherBusy, so a burst of logins cannot occupy
+every request worker.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from functools import lru_cache
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool has no capacity within the configured timeout"""
+
+
+_pool = None
+_pool_slots = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Return the process pool and its slot semaphore, creating them on first use"""
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is None:
+            config = current_app.config
+            # spawn keeps the children free of locks held by request threads at fork time
+            _pool = ProcessPoolExecutor(
+                max_workers=config["PASSWORD_HASH_WORKERS"],
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _pool_slots = threading.BoundedSemaphore(config["PASSWORD_HASH_QUEUE"])
+        return _pool, _pool_slots
+
+
+def shutdown_pool():
+    """Stop the worker processes, e.g. before forking or at exit"""
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+        _pool = _pool_slots = None
+
+
+def _run(func, *args):
+    if current_app.config["PASSWORD_HASH_WORKERS"] <= 0:
+        return func(*args)
+
+    pool, slots = _get_pool()
+    timeout = current_app.config["PASSWORD_HASH_TIMEOUT"]
+    if not slots.acquire(timeout=timeout):
+        raise PasswordHasherBusy("Password hashing pool is saturated")
+    try:
+        future = pool.submit(func, *args)
+    except BaseException:
+        slots.release()
+        raise
+    # The slot is held until the job is done, even if this caller stops waiting
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=timeout)
+    except TimeoutError as e:
+        raise PasswordHasherBusy("Password hashing timed out") from e
+
+
+def hash_password(password):
+    """Hash password with the configured method"""
+    return _run(
+        generate_password_hash, password, current_app.config["PASSWORD_HASH_METHOD"]
+    )
+
+
+def check_password(pwhash, password):
+    """Check password against pwhash, whatever method pwhash was made with"""
+    return _run(check_password_hash, pwhash, password)
+
+
+@lru_cache(maxsize=8)
+def _method_prefix(method):
+    # Werkzeug fills in default parameters (e.g. "scrypt" -> "scrypt:32768:8:1"),
+    # so derive the canonical prefix from a real hash, once per method string.
+    return generate_password_hash("", method).split("$", 1)[0]
+
+
+def needs_rehash(pwhash):
+    """True if pwhash was made with a method other than PASSWORD_HASH_METHOD"""
+    method = current_app.config["PASSWORD_HASH_METHOD"]
+    return pwhash.split("$", 1)[0] != _method_prefix(method)
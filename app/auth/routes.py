@@ -1,8 +1,16 @@
 # app/auth/routes.py
-from flask import render_template, redirect, request, url_for, flash, current_app
+from flask import (
+    render_template,
+    redirect,
+    request,
+    url_for,
+    flash,
+    current_app,
+    jsonify,
+)
 from flask_login import login_user, logout_user, login_required, current_user
 from flask_wtf.csrf import CSRFProtect
-from datetime import datetime
+from datetime import datetime, timedelta
 from . import auth
 from .forms import (
     LoginForm,
@@ -11,6 +19,8 @@ from .forms import (
     ResetPasswordForm,
 )
 from .models import User
+from .passwords import PasswordHasherBusy
+from .tokens import issue_token, ALL_FARMS, TOKEN_SCOPES
 from .. import db
 from ..utils.email import send_email
 from urllib.parse import urlparse, urlsplit
@@ -19,6 +29,9 @@ from ..farm.models import Farm  # Add this import
 csrf = CSRFProtect()
 
 
+BUSY_MESSAGE = "The server is busy. Please try again shortly."
+
+
 @auth.route("/")
 def index():
     """Auth index redirects to login"""
@@ -41,7 +54,20 @@ def login():
 
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data.lower()).first()
-        if user is None or not user.verify_password(form.password.data):
+        try:
+            verified = user is not None and user.verify_password(form.password.data)
+        except PasswordHasherBusy:
+            flash(BUSY_MESSAGE, "error")
+            return (
+                render_template(
+                    "auth/auth.html",
+                    login_form=form,
+                    register_form=register_form,
+                    active_tab="login",
+                ),
+                503,
+            )
+        if not verified:
             flash("Invalid email or password", "error")
             return render_template(
                 "auth/auth.html",
@@ -50,6 +76,8 @@ def login():
                 active_tab="login",
             )
 
+        # Persist a rehashed password, if verify_password upgraded it
+        db.session.commit()
         login_user(user, remember=form.remember_me.data)
 
         # After login, check if user has any farms
@@ -102,7 +130,19 @@ def register():
             user_type=form.user_type.data,
             region=form.region.data,
         )
-        user.password = form.password.data  # Use the password property setter
+        try:
+            user.password = form.password.data  # Use the password property setter
+        except PasswordHasherBusy:
+            flash(BUSY_MESSAGE, "error")
+            return (
+                render_template(
+                    "auth/auth.html",
+                    register_form=form,
+                    login_form=login_form,
+                    active_tab="register",
+                ),
+                503,
+            )
         db.session.add(user)
         db.session.commit()
 
@@ -155,7 +195,12 @@ def reset_password(token):
 
     form = ResetPasswordForm()
     if form.validate_on_submit():
-        if User.reset_password(token, form.password.data):
+        try:
+            reset = User.reset_password(token, form.password.data)
+        except PasswordHasherBusy:
+            flash(BUSY_MESSAGE, "error")
+            return render_template("auth/reset_password.html", form=form, token=token), 503
+        if reset:
             db.session.commit()
             flash("Your password has been updated.", "success")
             return redirect(url_for("auth.login"))
@@ -171,3 +216,52 @@ def reset_password(token):
 def profile():
     """Display user profile"""
     return render_template("auth/profile.html")
+
+
+@auth.route("/tokens", methods=["POST"])
+@login_required
+def create_token():
+    """Issue a bearer token for a device or API client of the logged-in user
+
+    JSON body (all optional): {"farms": [ids], "scope": [...], "expires_in": seconds}
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+
+    scopes = data.get("scope", list(TOKEN_SCOPES))
+    if not isinstance(scopes, list) or not all(isinstance(name, str) for name in scopes):
+        return jsonify({"error": "scope must be a list of scope names"}), 400
+    unknown = set(scopes) - set(TOKEN_SCOPES)
+    if unknown:
+        return jsonify({"error": f"Unknown scope: {', '.join(sorted(unknown))}"}), 400
+
+    farms = data.get("farms", ALL_FARMS)
+    if farms != ALL_FARMS:
+        # bool is an int subclass, so true would otherwise pass as farm 1
+        if not isinstance(farms, list) or not all(
+            type(farm_id) is int for farm_id in farms
+        ):
+            return jsonify({"error": "farms must be a list of farm ids"}), 400
+        owned = {
+            farm.id for farm in Farm.query.filter_by(user_id=current_user.id).all()
+        }
+        if not set(farms) <= owned:
+            return jsonify({"error": "Token can only be scoped to your own farms"}), 403
+
+    expires_in = None
+    if data.get("expires_in") is not None:
+        max_seconds = int(current_app.config["JWT_MAX_TOKEN_EXPIRES"].total_seconds())
+        try:
+            seconds = int(data["expires_in"])
+        except (TypeError, ValueError):
+            seconds = 0
+        if not 0 < seconds <= max_seconds:
+            return (
+                jsonify({"error": f"expires_in must be 1 to {max_seconds} seconds"}),
+                400,
+            )
+        expires_in = timedelta(seconds=seconds)
+
+    token = issue_token(current_user, farms=farms, scopes=scopes, expires_in=expires_in)
+    return jsonify({"token": token, "token_type": "Bearer", "farms": farms, "scope": scopes}), 201
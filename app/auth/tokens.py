@@ -0,0 +1,128 @@
+# app/auth/tokens.py
+"""Signed bearer tokens for devices and API clients.
+
+Tokens are HS256 JWTs signed with JWT_SECRET_KEY. They carry the user's id,
+the profile fields API handlers read, the farms the token may touch and its
+scopes, so a request presenting one is authenticated without a database
+query. Tokens are only honoured on TOKEN_AUTH_PATHS and cannot be revoked
+before they expire, so keep lifetimes short for anything but devices.
+"""
+from datetime import datetime, timezone
+import jwt
+from flask import current_app, request
+from flask_login import UserMixin, current_user
+
+TOKEN_SCOPES = ("read", "detect", "irrigation", "upload")
+ALL_FARMS = "*"
+
+
+class TokenUser(UserMixin):
+    """Principal reconstructed from a verified bearer token"""
+
+    is_approved = True
+
+    def __init__(self, claims):
+        self.id = int(claims["sub"])
+        self.email = claims.get("email")
+        self.username = claims.get("username")
+        self.first_name = claims.get("first_name")
+        self.last_name = claims.get("last_name")
+        self.farms = claims.get("farms", [])
+        self.scopes = frozenset(claims.get("scope", []))
+
+    def get_full_name(self):
+        return f"{self.first_name} {self.last_name}"
+
+    def can_access_farm(self, farm_id):
+        return self.farms == ALL_FARMS or farm_id in self.farms
+
+    def __repr__(self):
+        return f"<TokenUser {self.id} scope={sorted(self.scopes)}>"
+
+
+def issue_token(user, farms=ALL_FARMS, scopes=TOKEN_SCOPES, expires_in=None):
+    """Sign a token for user, limited to the given farm ids and scopes"""
+    config = current_app.config
+    lifetime = expires_in or config["JWT_ACCESS_TOKEN_EXPIRES"]
+    lifetime = min(lifetime, config["JWT_MAX_TOKEN_EXPIRES"])
+    now = datetime.now(timezone.utc)
+    claims = {
+        "sub": str(user.id),
+        "iat": now,
+        "exp": now + lifetime,
+        "email": user.email,
+        "username": user.username,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "farms": farms if farms == ALL_FARMS else sorted(int(f) for f in farms),
+        "scope": sorted(scopes),
+    }
+    return jwt.encode(claims, config["JWT_SECRET_KEY"], algorithm="HS256")
+
+
+def decode_token(token):
+    """Verify token and return its claims, raising jwt.InvalidTokenError on failure"""
+    return jwt.decode(
+        token,
+        current_app.config["JWT_SECRET_KEY"],
+        algorithms=["HS256"],
+        options={"require": ["exp", "sub"]},
+    )
+
+
+def required_scope(path):
+    """Scope a token needs for path, or None if tokens are not accepted there
+
+    The first matching prefix of TOKEN_AUTH_PATHS wins, so list longer ones first.
+    """
+    for prefix, scope in current_app.config["TOKEN_AUTH_PATHS"].items():
+        if path.startswith(prefix):
+            return scope
+    return None
+
+
+def load_user_from_request(req):
+    """Flask-Login request loader: authenticate an Authorization: Bearer header"""
+    header = req.headers.get("Authorization", "")
+    if not header.startswith("Bearer "):
+        return None
+    scope = required_scope(req.path)
+    if scope is None:
+        return None
+    try:
+        claims = decode_token(header[len("Bearer "):].strip())
+    except jwt.InvalidTokenError as e:
+        current_app.logger.info(f"Rejected bearer token: {str(e)}")
+        return None
+    user = TokenUser(claims)
+    if scope not in user.scopes:
+        return None
+    return user
+
+
+def token_farm_ids():
+    """Farm ids the current bearer token is limited to, or None if unrestricted"""
+    user = current_user._get_current_object()
+    if isinstance(user, TokenUser) and user.farms != ALL_FARMS:
+        return user.farms
+    return None
+
+
+def restrict_to_token_farms(query, farm_id_column):
+    """Limit query to the farms the current bearer token may access"""
+    farm_ids = token_farm_ids()
+    if farm_ids is not None:
+        query = query.filter(farm_id_column.in_(farm_ids))
+    return query
+
+
+def user_farms():
+    """Query the current user's farms, honouring bearer token farm scopes"""
+    from app.farm.models import Farm
+
+    query = Farm.query.filter_by(user_id=current_user.id)
+    return restrict_to_token_farms(query, Farm.id)
+
+
+def is_token_request():
+    return request.headers.get("Authorization", "").startswith("Bearer ")
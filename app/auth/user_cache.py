@@ -0,0 +1,88 @@
+# app/auth/user_cache.py
+"""Short-lived per-process cache of read-only user snapshots.
+
+Flask-Login resolves the session user on every request. For hot JSON paths
+(USER_SNAPSHOT_PATHS) load_user serves a UserSnapshot from this cache instead
+of querying the users table. Entries expire after USER_CACHE_TTL seconds and
+are dropped immediately when the User row is updated or deleted in this
+process; other worker processes pick up changes when their entry expires.
+"""
+import threading
+import time
+from flask import current_app
+from flask_login import UserMixin
+from app import db
+
+
+class UserSnapshot(UserMixin):
+    """Immutable copy of the User columns that request handlers read"""
+
+    FIELDS = (
+        "id",
+        "email",
+        "username",
+        "first_name",
+        "last_name",
+        "phone_number",
+        "user_type",
+        "region",
+        "is_approved",
+        "created_at",
+        "last_login",
+    )
+    __slots__ = FIELDS
+
+    def __init__(self, user):
+        for field in self.FIELDS:
+            object.__setattr__(self, field, getattr(user, field))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("UserSnapshot is read-only")
+
+    def get_full_name(self):
+        return f"{self.first_name} {self.last_name}"
+
+    def is_admin(self):
+        return self.user_type == "admin"
+
+    def __repr__(self):
+        return f"<UserSnapshot {self.username}>"
+
+
+_entries = {}
+_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0}
+
+
+def get_snapshot(user_id):
+    """Return a UserSnapshot for user_id, or None if the user does not exist"""
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is not None and entry[0] > now:
+            stats["hits"] += 1
+            return entry[1]
+        stats["misses"] += 1
+
+    from .models import User
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+    snapshot = UserSnapshot(user)
+    ttl = current_app.config["USER_CACHE_TTL"]
+    with _lock:
+        _entries[user_id] = (now + ttl, snapshot)
+    return snapshot
+
+
+def invalidate(user_id):
+    """Drop the cached snapshot for user_id"""
+    with _lock:
+        _entries.pop(user_id, None)
+
+
+def clear():
+    """Drop every cached snapshot"""
+    with _lock:
+        _entries.clear()
@@ -16,18 +16,118 @@ class Config:
     FARMEYE_MAIL_SUBJECT_PREFIX = '[FarmEye]'
     FARMEYE_MAIL_SENDER = 'FarmEye Admin <admin@farmeye.com>'
     FARMEYE_ADMIN = os.environ.get('FARMEYE_ADMIN')
-    UPLOAD_FOLDER = os.path.join(basedir, 'static/uploads')
+    UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or os.path.join(basedir, 'static/uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max upload size
+    UPLOAD_CHUNK_SIZE = 1024 * 1024  # bytes copied and hashed at a time (see app/farm/storage.py)
+    # Thumbnails and web-sized copies of farm images (see app/farm/derivatives.py)
+    DERIVATIVE_SIZES = {'thumb': 480, 'web': 1280}  # pixels on the long side
+    DERIVATIVE_QUALITY = int(os.environ.get('DERIVATIVE_QUALITY', '80'))
+    DERIVATIVE_WORKERS = int(os.environ.get('DERIVATIVE_WORKERS', '2'))  # 0 makes them on first request only
+    # Chunked, resumable video uploads (see app/api/uploads.py) and their analysis
+    VIDEO_CHUNK_SIZE = 8 * 1024 * 1024  # suggested to clients; chunks stay under MAX_CONTENT_LENGTH
+    VIDEO_MAX_SIZE = int(os.environ.get('VIDEO_MAX_SIZE', str(4 * 1024 ** 3)))
+    VIDEO_EXTENSIONS = ['.mp4', '.mov', '.avi', '.mkv', '.webm']
+    VIDEO_UPLOAD_EXPIRE_HOURS = int(os.environ.get('VIDEO_UPLOAD_EXPIRE_HOURS', '48'))
+    VIDEO_SAMPLE_FPS = float(os.environ.get('VIDEO_SAMPLE_FPS', '1'))  # frames per second of video detected
+    # Fingerprinted, precompressed static files (see app/utils/assets.py, `flask build-assets`)
+    ASSET_FINGERPRINTS = os.environ.get('ASSET_FINGERPRINTS', 'true').lower() in ['true', 'on', '1']
+    ASSET_BUILD_FOLDER = 'dist'  # under app/static
+    ASSET_MAX_AGE = 365 * 24 * 3600  # seconds, for files whose name changes with their content
+    ASSET_IMMUTABLE_PATHS = []  # other folders under app/static whose files are named by content
+    ASSET_PRIVATE_PATHS = ['uploads/']  # never served by /static; the farm routes check ownership
+    # Compiled Jinja templates (see app/utils/templates.py); no directory disables the cache
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR') or os.path.join(basedir, '../template_cache')
+    TEMPLATE_PRECOMPILE = os.environ.get('TEMPLATE_PRECOMPILE', 'true').lower() in ['true', 'on', '1']
+    ITEMS_PER_PAGE = 20  # Default page size for keyset-paginated listings
+    MAX_ITEMS_PER_PAGE = 100
+    ADMIN_STATS_TTL = int(os.environ.get('ADMIN_STATS_TTL', '300'))  # seconds
+    # Password hashing (see app/auth/passwords.py)
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '2'))  # 0 hashes inline
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', '8'))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', '5'))  # seconds
+    # Session user resolution (see app/auth/user_cache.py)
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', '30'))  # seconds
+    USER_SNAPSHOT_PATHS = ['/api/', '/feed/detect', '/irrigation/api/', '/weather/api/']
+    # Bearer tokens for devices and API clients (see app/auth/tokens.py)
+    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-string-change-in-production'
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
+    JWT_MAX_TOKEN_EXPIRES = timedelta(days=30)
+    # Path prefix -> scope a bearer token needs there
+    TOKEN_AUTH_PATHS = {'/api/uploads/': 'upload', '/api/': 'read', '/feed/detect': 'detect',
+                        '/irrigation/api/': 'irrigation'}
+    # Conditional GETs for polled JSON endpoints (see app/utils/http_cache.py)
+    HTTP_CONDITIONAL_GET = True
+    WEATHER_CACHE_SECONDS = int(os.environ.get('WEATHER_CACHE_SECONDS', '600'))
+    OPENWEATHER_BASE_URL = os.environ.get('OPENWEATHER_BASE_URL', 'https://api.openweathermap.org/data/2.5')
+    UPSTREAM_TIMEOUT = float(os.environ.get('UPSTREAM_TIMEOUT', '10'))
+    # ASGI entry point (asgi.py): threads for Flask views and pooled upstream connections
+    ASGI_THREADS = int(os.environ.get('ASGI_THREADS', '16'))
+    ASGI_UPSTREAM_CONNECTIONS = int(os.environ.get('ASGI_UPSTREAM_CONNECTIONS', '100'))
+    # Server-side response cache (see app/utils/response_cache.py): memory, sqlite or null
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')
+    RESPONSE_CACHE_PATH = os.environ.get('RESPONSE_CACHE_PATH') or \
+        os.path.join(basedir, '../response_cache.sqlite')
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', '1024'))
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', '60'))
+    # Server-Sent Events stream of farm changes (/api/events), per worker process
+    SSE_MAX_CONNECTIONS = int(os.environ.get('SSE_MAX_CONNECTIONS', '100'))
+    SSE_HEARTBEAT_SECONDS = 15
+    SSE_MAX_DURATION = 300
+    SSE_RETRY_MS = 3000
+    # Maize/weed detector (see app/feed/detector.py): worker, preload or service
+    DETECTOR_MODE = os.environ.get('DETECTOR_MODE', 'preload')
+    DETECTOR_MODEL_PATH = os.environ.get('DETECTOR_MODEL_PATH') or \
+        os.path.join(basedir, 'utils/maize_weed_detection.pt')
+    DETECTOR_SOCKET = os.environ.get('DETECTOR_SOCKET', '/tmp/farmeye-inference.sock')
+    DETECTOR_THREADS = int(os.environ.get('DETECTOR_THREADS', '1'))  # inference threads per process
+    # How the model runs (see app/feed/backends.py): ultralytics, onnx or torchscript
+    DETECTOR_BACKEND = os.environ.get('DETECTOR_BACKEND', 'ultralytics')
+    DETECTOR_INT8 = os.environ.get('DETECTOR_INT8', 'false').lower() in ['true', 'on', '1']
+    DETECTOR_IMGSZ = 640  # default inference size, one of DETECTOR_SIZES
+    DETECTOR_SIZES = [320, 480, 640]
+    # Step down DETECTOR_SIZES while detection latency exceeds this (0: fixed size)
+    DETECTOR_LATENCY_BUDGET_MS = int(os.environ.get('DETECTOR_LATENCY_BUDGET_MS', '0'))
+    # Tiled inference of full-resolution photos (see app/feed/tiling.py)
+    DETECTOR_TILE_SIZE = int(os.environ.get('DETECTOR_TILE_SIZE', '640'))
+    DETECTOR_TILE_OVERLAP = float(os.environ.get('DETECTOR_TILE_OVERLAP', '0.2'))  # share of a tile
+    DETECTOR_TILE_BATCH = int(os.environ.get('DETECTOR_TILE_BATCH', '8'))  # tiles per backend call
+    # Reuse detections for near-identical frames (see app/feed/frame_cache.py); 0 entries disables
+    DETECTION_CACHE_MAX_ENTRIES = int(os.environ.get('DETECTION_CACHE_MAX_ENTRIES', '256'))
+    DETECTION_CACHE_MAX_AGE = int(os.environ.get('DETECTION_CACHE_MAX_AGE', '60'))  # seconds
+    DETECTION_CACHE_MAX_DISTANCE = int(os.environ.get('DETECTION_CACHE_MAX_DISTANCE', '4'))  # of 64 bits
+    DETECTION_CACHE_HASH = os.environ.get('DETECTION_CACHE_HASH', 'dhash')  # or phash
+    # Per-stream motion gating of /feed/detect (see app/feed/motion.py); 0 streams disables
+    MOTION_MAX_STREAMS = int(os.environ.get('MOTION_MAX_STREAMS', '256'))
+    MOTION_WIDTH = 160  # pixels wide the frames are compared at
+    MOTION_PIXEL_DELTA = 25  # gray levels a pixel must change by to count
+    MOTION_THRESHOLD = float(os.environ.get('MOTION_THRESHOLD', '0.02'))  # share of changed pixels
+    MOTION_TILES = int(os.environ.get('MOTION_TILES', '0'))  # N for an N x N grid; 0 runs whole frames
+    MOTION_REFRESH_SECONDS = 30
+    # Weed-density heatmaps per field from live-feed detections (see app/farm/density.py)
+    HEATMAP_CELL_METERS = float(os.environ.get('HEATMAP_CELL_METERS', '5'))
+    HEATMAP_MAX_CELLS = 512  # cells per side at most
+    HEATMAP_FLUSH_FRAMES = int(os.environ.get('HEATMAP_FLUSH_FRAMES', '50'))  # per field
+    HEATMAP_FLUSH_SECONDS = float(os.environ.get('HEATMAP_FLUSH_SECONDS', '10'))
+    DETECTOR_CONF = 0.25
+    DETECTOR_IOU = 0.45
+    DETECTOR_TIMEOUT = float(os.environ.get('DETECTOR_TIMEOUT', '10'))  # seconds per frame
+    # Inference service frame slots in /dev/shm, one per connected worker thread (pages are
+    # only committed once written); frames larger than a slot are pickled instead
+    DETECTOR_SHM_SLOTS = int(os.environ.get('DETECTOR_SHM_SLOTS', '32'))
+    DETECTOR_SHM_SLOT_BYTES = 1920 * 1080 * 3
     
     @staticmethod
     def init_app(app):
         # Create upload directories if they don't exist
-        os.makedirs(os.path.join(app.root_path, 'static/uploads/images'), exist_ok=True)
+        os.makedirs(os.path.join(app.root_path, app.config['UPLOAD_FOLDER'], 'images'), exist_ok=True)
 
 
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
+    # Serve the files being edited, not the last build
+    ASSET_FINGERPRINTS = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('DEV_DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, '../dev.sqlite')
 
@@ -38,12 +138,23 @@ class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, '../test.sqlite')
     WTF_CSRF_ENABLED = False
+    # Use faster hashing for tests
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    PASSWORD_HASH_WORKERS = 0
+    RESPONSE_CACHE_BACKEND = 'null'
+    DETECTION_CACHE_MAX_ENTRIES = 0
+    MOTION_MAX_STREAMS = 0
+    HEATMAP_FLUSH_FRAMES = 1
+    DERIVATIVE_WORKERS = 0
+    TEMPLATE_CACHE_DIR = None
 
 
 class ProductionConfig(Config):
     """Production configuration"""
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, '../data.sqlite')
+    # Templates only change with a deploy; don't stat them on every render
+    TEMPLATES_AUTO_RELOAD = False
     
     @classmethod
     def init_app(cls, app):
@@ -0,0 +1,437 @@
+# app/farm/density.py
+"""Weed-density heatmaps per field, accumulated from live-feed detections.
+
+Each field gets a raster over the bounding box of its boundary markers
+with cells HEATMAP_CELL_METERS on a side (coarser if that would exceed
+HEATMAP_MAX_CELLS per side). A frame sent to /feed/detect with a field_id
+and the camera's latitude/longitude adds one observation to the cell under
+it, plus its maize and weed counts. Densities are detections per
+observation, so cells the camera passes often don't look weedier for it.
+
+Frames only touch a per-process numpy delta. Every HEATMAP_FLUSH_FRAMES
+frames or HEATMAP_FLUSH_SECONDS seconds per field the delta is added to
+the stored grid (FieldDensityGrid: a compressed array in a BLOB plus
+summary columns); a background thread flushes fields that stopped
+sending frames, so their counts don't wait for the next one. The version column makes workers flushing at once
+retry instead of overwriting each other's counts. Summaries are read from
+the columns and tiles from a decoded copy cached per version, so reads
+don't grow with the number of frames recorded. Grids keep the geometry
+they were created with; frames outside it are counted and dropped, as are
+frames of fields without boundary markers, which are looked up again
+after UNMAPPED_RECHECK_SECONDS.
+"""
+import atexit
+import logging
+import math
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict
+from datetime import datetime
+import cv2
+import numpy as np
+from app import db
+from .models import BoundaryMarker, Farm, Field, FieldDensityGrid
+
+logger = logging.getLogger(__name__)
+
+LAYERS = ("frames", "maize", "weed")
+# Tile layers: what each cell shows
+TILE_LAYERS = ("weed", "maize", "ratio")
+TILE_SIZE = 256
+_METERS_PER_DEGREE = 111_320.0
+_FLUSH_ATTEMPTS = 5
+UNMAPPED_RECHECK_SECONDS = 60.0
+
+
+def encode_layers(layers):
+    return zlib.compress(layers.astype("<u4").tobytes(), 1)
+
+
+def decode_layers(data, rows, cols):
+    array = np.frombuffer(zlib.decompress(data), dtype="<u4")
+    return array.reshape(len(LAYERS), rows, cols).astype(np.uint32)
+
+
+def grid_geometry(points, cell_meters, max_cells):
+    """FieldDensityGrid geometry columns for a raster over (lat, lon) points"""
+    lats, lons = zip(*points)
+    north, west = max(lats), min(lons)
+    south, east = min(lats), max(lons)
+    lon_meters = _METERS_PER_DEGREE * math.cos(math.radians((north + south) / 2))
+    height = (north - south) * _METERS_PER_DEGREE
+    width = (east - west) * lon_meters
+    cell = max(cell_meters, height / max_cells, width / max_cells)
+    rows = max(1, math.ceil(height / cell))
+    cols = max(1, math.ceil(width / cell))
+    # Whole cells from the north-west corner, so every cell is cell x cell meters
+    return {
+        "north": north,
+        "west": west,
+        "south": north - rows * cell / _METERS_PER_DEGREE,
+        "east": west + cols * cell / lon_meters,
+        "rows": rows,
+        "cols": cols,
+        "cell_meters": cell,
+    }
+
+
+def summarize(layers):
+    """Summary columns of FieldDensityGrid for layers"""
+    frames, maize, weed = layers
+    observed = frames > 0
+    density = weed[observed] / frames[observed]
+    return {
+        "frames": int(frames.sum()),
+        "maize_count": int(maize.sum()),
+        "weed_count": int(weed.sum()),
+        "cells_observed": int(observed.sum()),
+        "max_weed_density": float(density.max()) if density.size else 0.0,
+    }
+
+
+class _FieldState:
+    """Geometry, owner and unflushed counts of one field in this process"""
+
+    def __init__(self, grid, user_id, farm_id):
+        self.user_id = user_id
+        self.farm_id = farm_id
+        self.north, self.west = grid.north, grid.west
+        self.rows, self.cols = grid.rows, grid.cols
+        self.cell_lat = (grid.north - grid.south) / grid.rows
+        self.cell_lon = (grid.east - grid.west) / grid.cols
+        self.pending = np.zeros((len(LAYERS), grid.rows, grid.cols), np.uint32)
+        self.pending_frames = 0
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+
+    def cell(self, latitude, longitude):
+        """(row, col) of the cell containing the position, or None outside the grid"""
+        row = math.floor((self.north - latitude) / self.cell_lat)
+        col = math.floor((longitude - self.west) / self.cell_lon)
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row, col
+        return None
+
+
+class DensityAggregator:
+    """Per-process accumulator in front of the stored field density grids"""
+
+    def __init__(self, app=None):
+        self.cell_meters = 5.0
+        self.max_cells = 512
+        self.flush_frames = 50
+        self.flush_seconds = 10.0
+        self.max_cached_grids = 64
+        self._app = None
+        self._fields = {}  # field id -> _FieldState
+        # field id -> (owner, monotonic time looked up) of fields without a grid
+        self._unmapped = {}
+        self._flusher = None
+        # (field id, version, "layers" or a tile layer) -> decoded array
+        self._grids = OrderedDict()
+        self._lock = threading.Lock()
+        self.reset_stats()
+        atexit.register(self.flush_all)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.cell_meters = config["HEATMAP_CELL_METERS"]
+        self.max_cells = config["HEATMAP_MAX_CELLS"]
+        self.flush_frames = config["HEATMAP_FLUSH_FRAMES"]
+        self.flush_seconds = config["HEATMAP_FLUSH_SECONDS"]
+        self._app = app
+        with self._lock:
+            self._fields.clear()
+            self._unmapped.clear()
+            self._grids.clear()
+        app.extensions["weed_density"] = self
+
+    def _recent_miss(self, field_id):
+        """The cached (owner, when) of a field without a grid, if still fresh"""
+        miss = self._unmapped.get(field_id)
+        if miss is not None and time.monotonic() - miss[1] < UNMAPPED_RECHECK_SECONDS:
+            return miss
+        return None
+
+    def _state(self, field_id):
+        """This process's state for the field, creating its grid if needed"""
+        if field_id in self._fields:
+            return self._fields[field_id]
+        if self._recent_miss(field_id) is not None:
+            return None
+        owner = self.owner(field_id)
+        grid = self._load_or_create(field_id) if owner is not None else None
+        if grid is None:
+            if owner is not None:
+                with self._lock:
+                    self._unmapped[field_id] = (owner, time.monotonic())
+            return None
+        with self._lock:
+            self._unmapped.pop(field_id, None)
+            # Another thread may have got here first; keep its pending counts
+            return self._fields.setdefault(field_id, _FieldState(grid, *owner))
+
+    def _load_or_create(self, field_id):
+        query = FieldDensityGrid.query.options(db.defer(FieldDensityGrid.layers))
+        grid = query.filter_by(field_id=field_id).first()
+        if grid is not None:
+            return grid
+        points = (
+            db.session.query(BoundaryMarker.latitude, BoundaryMarker.longitude)
+            .filter_by(field_id=field_id)
+            .all()
+        )
+        if not points:
+            return None
+        geometry = grid_geometry(points, self.cell_meters, self.max_cells)
+        empty = np.zeros((len(LAYERS), geometry["rows"], geometry["cols"]), np.uint32)
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(
+                    FieldDensityGrid.__table__.insert().values(
+                        field_id=field_id,
+                        layers=encode_layers(empty),
+                        version=0,
+                        created_at=datetime.utcnow(),
+                        updated_at=datetime.utcnow(),
+                        **geometry,
+                        **summarize(empty),
+                    )
+                )
+        except db.exc.IntegrityError:
+            pass  # another worker created it first
+        return query.filter_by(field_id=field_id).first()
+
+    def owner(self, field_id):
+        """(user id, farm id) of the field, or None if there is no such field"""
+        state = self._fields.get(field_id)
+        if state is not None:
+            return state.user_id, state.farm_id
+        miss = self._recent_miss(field_id)
+        if miss is not None:
+            return miss[0]
+        owner = (
+            db.session.query(Farm.user_id, Farm.id)
+            .join(Field, Field.farm_id == Farm.id)
+            .filter(Field.id == field_id)
+            .first()
+        )
+        return None if owner is None else tuple(owner)
+
+    def record(self, field_id, latitude, longitude, detections):
+        """Count one frame's detections at the position
+
+        Returns False if the frame was not counted: the field has no
+        boundary markers to build a grid from, or the position is outside it.
+        """
+        state = self._state(field_id)
+        if state is None:
+            self._count("unmapped")
+            return False
+        self._start_flusher()
+        cell = state.cell(latitude, longitude)
+        if cell is None:
+            self._count("outside")
+            return False
+        counts = Counter(detection["class"] for detection in detections)
+        with state.lock:
+            cells = state.pending[(slice(None),) + cell]
+            cells += np.array([1, counts["maize"], counts["weed"]], np.uint32)
+            state.pending_frames += 1
+            due = (
+                state.pending_frames >= self.flush_frames
+                or time.monotonic() - state.last_flush >= self.flush_seconds
+            )
+        self._count("frames")
+        if due:
+            self.flush(field_id)
+        return True
+
+    def flush(self, field_id):
+        """Add the field's unflushed counts to its stored grid"""
+        state = self._fields.get(field_id)
+        if state is None:
+            return
+        with state.lock:
+            if not state.pending_frames:
+                return
+            delta, frames = state.pending, state.pending_frames
+            state.pending = np.zeros_like(delta)
+            state.pending_frames = 0
+            state.last_flush = time.monotonic()
+        try:
+            self._apply(field_id, delta)
+        except Exception:
+            logger.exception("Could not store weed density for field %s", field_id)
+            with state.lock:
+                state.pending += delta
+                state.pending_frames += frames
+
+    def _apply(self, field_id, delta):
+        table = FieldDensityGrid.__table__
+        for _ in range(_FLUSH_ATTEMPTS):
+            with db.engine.begin() as connection:
+                row = connection.execute(
+                    db.select(table.c.layers, table.c.rows, table.c.cols, table.c.version)
+                    .where(table.c.field_id == field_id)
+                ).one()
+                layers = decode_layers(row.layers, row.rows, row.cols) + delta
+                updated = connection.execute(
+                    table.update()
+                    .where(table.c.field_id == field_id, table.c.version == row.version)
+                    .values(
+                        layers=encode_layers(layers),
+                        version=row.version + 1,
+                        updated_at=datetime.utcnow(),
+                        **summarize(layers),
+                    )
+                )
+            if updated.rowcount:
+                self._count("flushes")
+                self._remember((field_id, row.version + 1, "layers"), layers)
+                return
+            self._count("conflicts")
+        raise RuntimeError(f"grid kept changing during {_FLUSH_ATTEMPTS} attempts")
+
+    def _start_flusher(self):
+        """Start the thread flushing idle fields, in the process recording frames"""
+        if self.flush_seconds <= 0 or (self._flusher is not None and self._flusher.is_alive()):
+            return
+        with self._lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(
+                    target=self._flush_idle, name="density-flush", daemon=True
+                )
+                self._flusher.start()
+
+    def _flush_idle(self):
+        """Flush fields whose counts have waited flush_seconds for another frame"""
+        while True:
+            time.sleep(self.flush_seconds)
+            now = time.monotonic()
+            due = [
+                field_id
+                for field_id, state in list(self._fields.items())
+                if state.pending_frames and now - state.last_flush >= self.flush_seconds
+            ]
+            if due:
+                with self._app.app_context():
+                    for field_id in due:
+                        self.flush(field_id)
+
+    def flush_all(self):
+        """Flush every field, e.g. before the process exits"""
+        if self._app is None:
+            return
+        with self._app.app_context():
+            for field_id in list(self._fields):
+                self.flush(field_id)
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._grids[key] = value
+            self._grids.move_to_end(key)
+            while len(self._grids) > self.max_cached_grids:
+                self._grids.popitem(last=False)
+
+    def _cached(self, key):
+        with self._lock:
+            return self._grids.get(key)
+
+    def layers(self, grid):
+        """Decoded layers of a FieldDensityGrid row, cached by version"""
+        key = (grid.field_id, grid.version, "layers")
+        layers = self._cached(key)
+        if layers is None:
+            data = (
+                db.session.query(FieldDensityGrid.layers)
+                .filter_by(field_id=grid.field_id, version=grid.version)
+                .scalar()
+            )
+            if data is None:
+                # Written since grid was read: the newer counts are just as good
+                data = (
+                    db.session.query(FieldDensityGrid.layers)
+                    .filter_by(field_id=grid.field_id)
+                    .scalar()
+                )
+            layers = decode_layers(data, grid.rows, grid.cols)
+            self._remember(key, layers)
+        return layers
+
+    def cell_values(self, grid, layer):
+        """Per-cell values of a tile layer for a FieldDensityGrid row, cached by version"""
+        key = (grid.field_id, grid.version, layer)
+        values = self._cached(key)
+        if values is None:
+            values = _cell_values(self.layers(grid), layer)
+            self._remember(key, values)
+        return values
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {
+                "frames": 0,
+                "outside": 0,
+                "unmapped": 0,
+                "flushes": 0,
+                "conflicts": 0,
+            }
+
+    def stats(self):
+        """Counters for this process; pending_frames are not yet stored"""
+        with self._lock:
+            stats = dict(self._stats)
+            states = list(self._fields.values())
+            stats["fields"] = len(states)
+            stats["unmapped_fields"] = len(self._unmapped)
+            stats["cached_grids"] = len(self._grids)
+        stats["pending_frames"] = sum(state.pending_frames for state in states)
+        return stats
+
+
+def _cell_values(layers, layer):
+    """Per-cell values in 0..1 for a tile layer, NaN where nothing was observed"""
+    frames, maize, weed = layers.astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if layer == "ratio":
+            values = weed / (weed + maize)
+            values[(frames > 0) & (weed + maize == 0)] = 0.0
+        else:
+            values = (weed if layer == "weed" else maize) / frames
+            peak = np.nanmax(values) if np.any(frames > 0) else 0.0
+            values = values / peak if peak else np.where(frames > 0, 0.0, np.nan)
+    values[frames == 0] = np.nan
+    return values
+
+
+def render_tile(grid, cells, z, x, y):
+    """PNG bytes of Web Mercator tile z/x/y of a grid coloured by its cell values"""
+    n = 2**z
+    steps = (np.arange(TILE_SIZE) + 0.5) / TILE_SIZE
+    lons = (x + steps) / n * 360.0 - 180.0
+    lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + steps) / n))))
+    rows = np.floor((grid.north - lats) / ((grid.north - grid.south) / grid.rows))
+    cols = np.floor((lons - grid.west) / ((grid.east - grid.west) / grid.cols))
+    row_ok = (rows >= 0) & (rows < grid.rows)
+    col_ok = (cols >= 0) & (cols < grid.cols)
+
+    values = np.full((TILE_SIZE, TILE_SIZE), np.nan)
+    if row_ok.any() and col_ok.any():
+        picked = cells[np.ix_(rows[row_ok].astype(int), cols[col_ok].astype(int))]
+        values[np.ix_(row_ok, col_ok)] = picked
+    observed = ~np.isnan(values)
+    levels = (np.nan_to_num(values) * 255).round().astype(np.uint8)
+    tile = cv2.cvtColor(cv2.applyColorMap(levels, cv2.COLORMAP_JET), cv2.COLOR_BGR2BGRA)
+    tile[..., 3] = np.where(observed, 170, 0)
+    return cv2.imencode(".png", tile, [cv2.IMWRITE_PNG_COMPRESSION, 1])[1].tobytes()
+
+
+weed_density = DensityAggregator()
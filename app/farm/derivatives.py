@@ -0,0 +1,246 @@
+# app/farm/derivatives.py
+"""Thumbnails and web-sized copies of farm images.
+
+Image lists show derivatives instead of the originals: one per
+DERIVATIVE_SIZES entry ("thumb" for grids, "web" for viewing), no larger
+than that size on the long side, each encoded as WebP and as JPEG so a
+<picture> element lets the browser pick. All of them come from a single
+decode at the smallest reduced JPEG scale still large enough (see
+decode_image).
+
+After an upload, a pool of DERIVATIVE_WORKERS threads makes them (OpenCV
+releases the GIL while resizing and encoding), so the request does not
+wait. They are served by farm.image_derivative, which checks that the
+user may see the image, lets only the browser cache the file, and makes
+the files of images from before this, or whose job has not run yet, on
+first request; requests for an image whose job is running wait for that
+job. Either way the files are written to UPLOAD_FOLDER/derivatives under
+the image's content hash, so duplicate uploads share them, with their
+actual widths in a small JSON file beside them for derivative_srcset()'s
+w descriptors.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+import cv2
+from flask import url_for
+from ..feed.preprocess import decode_image
+from .storage import shard_name
+
+DERIVATIVE_FOLDER = "derivatives"
+FORMATS = {"webp": cv2.IMWRITE_WEBP_QUALITY, "jpg": cv2.IMWRITE_JPEG_QUALITY}
+
+
+class ImageDerivatives:
+    """Makes, stores and links the derivatives of farm images"""
+
+    def __init__(self, app=None):
+        self.sizes = {}
+        self.quality = 80
+        self.workers = 0
+        self.folder = None
+        self._pool = None
+        self._pending = {}  # content hash -> Future of the job making its files
+        self._widths = {}  # content hash -> {variant: width} of its files
+        self._lock = threading.RLock()
+        self.reset_stats()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.sizes = dict(config["DERIVATIVE_SIZES"])
+        self.quality = config["DERIVATIVE_QUALITY"]
+        self.workers = config["DERIVATIVE_WORKERS"]
+        self.folder = os.path.join(
+            app.root_path, config["UPLOAD_FOLDER"], DERIVATIVE_FOLDER
+        )
+        self._widths = {}
+        self.shutdown()
+        app.extensions["image_derivatives"] = self
+        app.jinja_env.globals.update(
+            derivative_url=self.url, derivative_srcset=self.srcset
+        )
+
+    def name(self, digest, variant, fmt):
+        """File name of a derivative, relative to the derivatives folder"""
+        return shard_name(digest, f"-{variant}.{fmt}")
+
+    def path(self, digest, variant, fmt):
+        return os.path.join(self.folder, self.name(digest, variant, fmt))
+
+    def _widths_path(self, digest):
+        return os.path.join(self.folder, shard_name(digest, "-widths.json"))
+
+    def widths(self, digest):
+        """{variant: width in pixels} of digest's derivatives, or None before they exist"""
+        with self._lock:
+            widths = self._widths.get(digest)
+        if widths is None:
+            try:
+                with open(self._widths_path(digest)) as f:
+                    widths = json.load(f)
+            except (OSError, ValueError):
+                return None
+            with self._lock:
+                self._widths[digest] = widths
+        return widths
+
+    def _missing(self, digest):
+        return [
+            (variant, fmt)
+            for variant in self.sizes
+            for fmt in FORMATS
+            if not os.path.exists(self.path(digest, variant, fmt))
+        ]
+
+    def url(self, image, variant, fmt="jpg"):
+        """URL of one of image's derivatives"""
+        return url_for(
+            "farm.image_derivative", image_id=image.id, variant=variant, fmt=fmt
+        )
+
+    def srcset(self, image, fmt="jpg"):
+        """srcset listing every size of image in fmt, by its width
+
+        Until the derivatives are made (or for ones made before widths were
+        recorded) the configured long side stands in for the width.
+        """
+        recorded = (image.content_hash and self.widths(image.content_hash)) or {}
+        candidates = {}
+        # A small original gives variants of equal width; the smallest is listed
+        for variant, size in sorted(self.sizes.items(), key=lambda item: -item[1]):
+            candidates[recorded.get(variant, size)] = variant
+        return ", ".join(
+            f"{self.url(image, variant, fmt)} {width}w"
+            for width, variant in sorted(candidates.items())
+        )
+
+    def submit(self, digest, source_path):
+        """Make digest's missing derivatives in the worker pool; no-op without workers"""
+        if self.workers > 0 and self._missing(digest):
+            self._schedule(digest, source_path, inline=False)
+
+    def ensure(self, digest, source_path):
+        """Make digest's missing derivatives now, or wait for the job making them
+
+        Raises OSError or ValueError if the original can't be read or decoded.
+        """
+        if self._missing(digest):
+            self._schedule(digest, source_path, inline=True).result()
+
+    def _schedule(self, digest, source_path, inline):
+        with self._lock:
+            future = self._pending.get(digest)
+            if future is not None:
+                return future
+            if inline:
+                future = self._pending[digest] = Future()
+            else:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        self.workers, thread_name_prefix="derivatives"
+                    )
+                future = self._pending[digest] = self._pool.submit(
+                    self._generate, digest, source_path
+                )
+                future.add_done_callback(lambda _: self._done(digest))
+                self._stats["queued"] += 1
+                return future
+
+        # Made in this thread; others asking for the same image wait on the future
+        try:
+            future.set_result(self._generate(digest, source_path))
+            self._count("on_demand")
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            self._done(digest)
+        return future
+
+    def _done(self, digest):
+        with self._lock:
+            self._pending.pop(digest, None)
+
+    def _generate(self, digest, source_path):
+        started = time.perf_counter()
+        try:
+            with open(source_path, "rb") as f:
+                data = f.read()
+            frame, _, _ = decode_image(data, max(self.sizes.values()))
+        except (OSError, ValueError):
+            self._count("failed")
+            raise
+        height, width = frame.shape[:2]
+        widths = {}
+        # Largest first, each resized from the previous one
+        for variant, size in sorted(self.sizes.items(), key=lambda item: -item[1]):
+            scale = size / max(width, height)
+            if scale < 1:
+                frame = cv2.resize(
+                    frame,
+                    (max(1, round(width * scale)), max(1, round(height * scale))),
+                    interpolation=cv2.INTER_AREA,
+                )
+                height, width = frame.shape[:2]
+            widths[variant] = width
+            for fmt, quality_flag in FORMATS.items():
+                ok, encoded = cv2.imencode(f".{fmt}", frame, [quality_flag, self.quality])
+                if not ok:
+                    raise ValueError(f"Could not encode {fmt}")
+                self._write(self.path(digest, variant, fmt), encoded.tobytes())
+        self._write(self._widths_path(digest), json.dumps(widths).encode())
+        with self._lock:
+            self._widths[digest] = widths
+        self._count("generated")
+        self._count("seconds", time.perf_counter() - started)
+
+    def _write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self._count("bytes", len(data))
+
+    def shutdown(self, wait=True):
+        """Stop the worker pool, finishing queued jobs if wait"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {
+                "queued": 0,
+                "on_demand": 0,
+                "generated": 0,
+                "failed": 0,
+                "bytes": 0,
+                "seconds": 0.0,
+            }
+
+    def stats(self):
+        """Counters for this process; seconds is the mean time to make one image's set"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._pending)
+        if stats["generated"]:
+            stats["seconds"] = round(stats["seconds"] / stats["generated"], 4)
+        return stats
+
+
+image_derivatives = ImageDerivatives()
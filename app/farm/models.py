@@ -1,9 +1,12 @@
 from datetime import datetime
 from app import db  # Import db from app package instead of creating a new instance
+from app.utils.response_cache import invalidate_on_write
+from app.utils.events import publish_on_write
 
 
 class Farm(db.Model):
     __tablename__ = "farms"
+    __table_args__ = (db.Index("ix_farms_created_id", "created_at", "id"),)
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -28,6 +31,11 @@ class Farm(db.Model):
     irrigation_type = db.Column(db.String(50))
     water_source = db.Column(db.String(50))
 
+    # Denormalized count of unread alerts, maintained by the Alert listeners below
+    unread_alert_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+
     # Relationships
     owner = db.relationship("User", backref="farms", lazy=True, foreign_keys=[user_id])
     sensors = db.relationship("Sensor", backref="farm", lazy=True)
@@ -69,6 +77,9 @@ class Sensor(db.Model):
 
 class SensorData(db.Model):
     __tablename__ = "sensor_data"
+    __table_args__ = (
+        db.Index("ix_sensor_data_farm_timestamp_id", "farm_id", "timestamp", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     sensor_id = db.Column(db.Integer, db.ForeignKey("sensors.id"), nullable=False)
@@ -126,6 +137,10 @@ class WeatherData(db.Model):
 
 class FarmImage(db.Model):
     __tablename__ = "farm_images"
+    __table_args__ = (
+        db.Index("ix_farm_images_farm_upload_id", "farm_id", "upload_date", "id"),
+        db.Index("ix_farm_images_content_hash_type", "content_hash", "image_type"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     farm_id = db.Column(db.Integer, db.ForeignKey("farms.id"), nullable=False)
@@ -137,6 +152,8 @@ class FarmImage(db.Model):
     image_type = db.Column(db.String(50))  # e.g., 'soil', 'crop', 'pest'
     processed = db.Column(db.Boolean, default=False)
     processing_results = db.Column(db.Text)  # JSON or text results from ML model
+    # SHA-256 of the file, which is stored under it (see app/farm/storage.py)
+    content_hash = db.Column(db.String(64))
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
 
     # Use string reference for User
@@ -148,8 +165,82 @@ class FarmImage(db.Model):
         return f"<FarmImage Farm: {self.farm_id}, URL: {self.image_url}>"
 
 
+class ImageDetection(db.Model):
+    """Detector results for one FarmImage, summarized for indexed queries
+
+    farm_id and captured_at are copied from the image so "images of a farm
+    in a time range with at least N weeds", and totals over such a range,
+    are answered from one covering index.
+    The boxes themselves are optional and packed (see app/ml/detections.py).
+    """
+
+    __tablename__ = "image_detections"
+    __table_args__ = (
+        db.Index(
+            "ix_image_detections_farm_captured_counts",
+            "farm_id",
+            "captured_at",
+            "weed_count",
+            "maize_count",
+            "max_conf",
+        ),
+    )
+
+    image_id = db.Column(db.Integer, db.ForeignKey("farm_images.id"), primary_key=True)
+    farm_id = db.Column(db.Integer, db.ForeignKey("farms.id"), nullable=False)
+    captured_at = db.Column(db.DateTime, nullable=False)
+    weed_count = db.Column(db.Integer, nullable=False, default=0)
+    maize_count = db.Column(db.Integer, nullable=False, default=0)
+    max_conf = db.Column(db.Float)  # None without detections
+    boxes = db.Column(db.LargeBinary)  # packed per-box records, or None
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    image = db.relationship(
+        "FarmImage",
+        backref=db.backref(
+            "detection", uselist=False, lazy=True, cascade="all, delete-orphan"
+        ),
+    )
+
+    def __repr__(self):
+        return f"<ImageDetection Image: {self.image_id}, Weeds: {self.weed_count}>"
+
+
+class FarmVideo(db.Model):
+    """A field video, uploaded in chunks and then analysed (see app/api/uploads.py)
+
+    received only counts bytes whose chunk checksum was verified; bytes in
+    the file beyond it are overwritten by the next chunk.
+    """
+
+    __tablename__ = "farm_videos"
+
+    id = db.Column(db.Integer, primary_key=True)
+    upload_id = db.Column(db.String(32), unique=True, nullable=False)
+    farm_id = db.Column(db.Integer, db.ForeignKey("farms.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    filename = db.Column(db.String(255))  # as uploaded
+    path = db.Column(db.String(255), nullable=False)  # relative to UPLOAD_FOLDER
+    size = db.Column(db.BigInteger, nullable=False)
+    received = db.Column(db.BigInteger, nullable=False, default=0)
+    sha256 = db.Column(db.String(64))  # of the whole file, if the client sent it
+    # uploading, processing, processed or failed
+    status = db.Column(db.String(20), nullable=False, default="uploading")
+    processing_results = db.Column(db.Text)  # JSON summary of the detections
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<FarmVideo {self.upload_id} {self.received}/{self.size} {self.status}>"
+
+
 class Alert(db.Model):
     __tablename__ = "alerts"
+    __table_args__ = (
+        db.Index("ix_alerts_user_unread_created", "user_id", "is_read", "created_at"),
+        db.Index("ix_alerts_farm_created_id", "farm_id", "created_at", "id"),
+        db.Index("ix_alerts_user_created_id", "user_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     farm_id = db.Column(db.Integer, db.ForeignKey("farms.id"), nullable=False)
@@ -162,7 +253,10 @@ class Alert(db.Model):
     status = db.Column(db.String(20), default="Active")  # Active, Resolved, etc.
     # Added fields from auth.models
     severity = db.Column(db.String(20))  # e.g., 'low', 'medium', 'high'
-    is_read = db.Column(db.Boolean, default=False)
+    # active_history keeps the previous value so the unread counters stay exact
+    is_read = db.orm.column_property(
+        db.Column(db.Boolean, default=False), active_history=True
+    )
 
     # Use string reference for User
     user = db.relationship("User", backref="alerts", lazy=True, foreign_keys=[user_id])
@@ -171,6 +265,57 @@ class Alert(db.Model):
         return f"<Alert Type: {self.alert_type}, Status: {self.status}, Created At: {self.created_at}>"
 
 
+def _adjust_unread_alert_counts(connection, alert, delta):
+    """Apply delta to the unread counters of the alert's user and farm"""
+    from app.auth.models import User
+
+    for table, row_id in (
+        (User.__table__, alert.user_id),
+        (Farm.__table__, alert.farm_id),
+    ):
+        connection.execute(
+            table.update()
+            .where(table.c.id == row_id)
+            .values(unread_alert_count=table.c.unread_alert_count + delta)
+        )
+
+
+@db.event.listens_for(Alert, "after_insert")
+def _alert_inserted(mapper, connection, target):
+    if not target.is_read:
+        _adjust_unread_alert_counts(connection, target, 1)
+
+
+@db.event.listens_for(Alert, "after_update")
+def _alert_updated(mapper, connection, target):
+    history = db.inspect(target).attrs.is_read.history
+    if not history.has_changes():
+        return
+    was_read = bool(history.deleted[0]) if history.deleted else False
+    if was_read != bool(target.is_read):
+        _adjust_unread_alert_counts(connection, target, 1 if was_read else -1)
+
+
+@db.event.listens_for(Alert, "after_delete")
+def _alert_deleted(mapper, connection, target):
+    if not target.is_read:
+        _adjust_unread_alert_counts(connection, target, -1)
+
+
+def rebuild_unread_alert_counts():
+    """Recompute every user and farm unread alert counter from the alerts table"""
+    from app.auth.models import User
+
+    for model, column in ((User, Alert.user_id), (Farm, Alert.farm_id)):
+        unread = (
+            db.select(db.func.count(Alert.id))
+            .where(column == model.id, Alert.is_read.is_(False))
+            .scalar_subquery()
+        )
+        db.session.execute(db.update(model).values(unread_alert_count=unread))
+    db.session.commit()
+
+
 # Pest Control Models
 class PestControl(db.Model):
     __tablename__ = "pest_control"
@@ -330,3 +475,56 @@ class BoundaryMarker(db.Model):
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
+
+
+class FieldDensityGrid(db.Model):
+    """Maize/weed detection counts per grid cell of a field (see app/farm/density.py)"""
+
+    __tablename__ = "field_density_grids"
+
+    id = db.Column(db.Integer, primary_key=True)
+    field_id = db.Column(
+        db.Integer, db.ForeignKey("fields.id"), nullable=False, unique=True
+    )
+    # Bounds of the raster; row 0 is the northern edge
+    north = db.Column(db.Float, nullable=False)
+    west = db.Column(db.Float, nullable=False)
+    south = db.Column(db.Float, nullable=False)
+    east = db.Column(db.Float, nullable=False)
+    rows = db.Column(db.Integer, nullable=False)
+    cols = db.Column(db.Integer, nullable=False)
+    cell_meters = db.Column(db.Float, nullable=False)
+    # zlib-compressed little-endian uint32 array of shape (3, rows, cols):
+    # frames observed, maize and weed detections per cell
+    layers = db.Column(db.LargeBinary, nullable=False)
+
+    # Summaries of layers, rewritten with it so reads never decode the grid
+    frames = db.Column(db.Integer, nullable=False, default=0)
+    maize_count = db.Column(db.Integer, nullable=False, default=0)
+    weed_count = db.Column(db.Integer, nullable=False, default=0)
+    cells_observed = db.Column(db.Integer, nullable=False, default=0)
+    max_weed_density = db.Column(db.Float, nullable=False, default=0.0)
+    # Bumped on every write; concurrent writers retry on a mismatch
+    version = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    field = db.relationship(
+        "Field",
+        backref=db.backref(
+            "density_grid", uselist=False, lazy=True, cascade="all, delete-orphan"
+        ),
+    )
+
+    def __repr__(self):
+        return f"<FieldDensityGrid Field: {self.field_id}, {self.rows}x{self.cols}>"
+
+
+# Cached per-farm responses (e.g. the dashboard) are stale once any of these change
+invalidate_on_write(Alert, SensorData, FarmStage, tags=lambda obj: [f"farm:{obj.farm_id}"])
+invalidate_on_write(Farm, tags=lambda farm: [f"farm:{farm.id}"])
+
+# Change events for dashboards listening on /api/events
+publish_on_write(Alert, "alert")
+publish_on_write(SensorData, "sensor_reading")
+publish_on_write(FarmStage, "stage", on_update=True)
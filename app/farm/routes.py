@@ -1,6 +1,5 @@
 # app/farm/routes.py
 import os
-import uuid
 from datetime import datetime
 from flask import (
     render_template,
@@ -11,12 +10,15 @@ from flask import (
     current_app,
     jsonify,
     abort,
+    send_file,
 )
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from .. import db
 from . import farm
 from .forms import FarmForm, ImageUploadForm, SensorDataForm, FarmRegistrationForm
+from .derivatives import FORMATS, image_derivatives
+from .storage import hash_file, image_path, store_stream
 from .models import (
     Farm,
     FarmImage,
@@ -30,6 +32,8 @@ from .models import (
 )
 from ..auth.models import User  # Add this import
 from ..decorators import require_farm_registration
+from ..utils.pagination import paginate
+from ..utils.http_cache import conditional
 import requests
 from datetime import datetime, timedelta
 from ..farm.models import Farm, SensorData, Alert, FarmStage, PestControl
@@ -321,11 +325,12 @@ def view_farm(farm_id):
             active_page="dashboard",
         )
 
-    # Get farm images
-    images = (
-        FarmImage.query.filter_by(farm_id=farm_id)
-        .order_by(FarmImage.upload_date.desc())
-        .all()
+    # Get farm images, newest first, one page at a time
+    images = paginate(
+        FarmImage.query.filter_by(farm_id=farm_id),
+        FarmImage.upload_date,
+        FarmImage.id,
+        cursor_arg="images_cursor",
     )
 
     # Get recent sensor data
@@ -337,8 +342,11 @@ def view_farm(farm_id):
     )
 
     # Get alerts for this farm
-    alerts = (
-        Alert.query.filter_by(farm_id=farm_id).order_by(Alert.created_at.desc()).all()
+    alerts = paginate(
+        Alert.query.filter_by(farm_id=farm_id),
+        Alert.created_at,
+        Alert.id,
+        cursor_arg="alerts_cursor",
     )
 
     # Create a template for this in the next phase
@@ -405,39 +413,48 @@ def upload_image(farm_id):
     form = ImageUploadForm()
 
     if form.validate_on_submit():
-        # Save uploaded image
+        # Store the image under its content hash; a repeat upload reuses the file
         image_file = form.image.data
-        filename = secure_filename(image_file.filename)
-        # Generate unique filename to prevent overwrites
-        unique_filename = f"{uuid.uuid4().hex}_{filename}"
-
-        # Create upload path
-        upload_path = os.path.join(
-            current_app.root_path, current_app.config["UPLOAD_FOLDER"], "images"
+        extension = os.path.splitext(secure_filename(image_file.filename))[1]
+        upload_folder = os.path.join(
+            current_app.root_path, current_app.config["UPLOAD_FOLDER"]
         )
-
-        if not os.path.exists(upload_path):
-            os.makedirs(upload_path)
-
-        file_path = os.path.join(upload_path, unique_filename)
-        image_file.save(file_path)
+        stored = store_stream(
+            image_file.stream,
+            upload_folder,
+            extension,
+            current_app.config["UPLOAD_CHUNK_SIZE"],
+        )
+        # Thumbnails and web-sized copies, off the request thread
+        image_derivatives.submit(stored.digest, image_path(stored.filename))
 
         # Create database record
         farm_image = FarmImage(
-            filename=unique_filename,
-            path=f"/static/uploads/images/{unique_filename}",
+            filename=stored.filename,
+            image_url="",
             image_type=form.image_type.data,
+            content_hash=stored.digest,
             farm_id=farm.id,
             user_id=current_user.id,
         )
-
         db.session.add(farm_image)
-        db.session.commit()
-
-        # Process image with ML model (asynchronously)
-        process_farm_image(farm_image.id)
+        db.session.flush()
+        # Served by farm.image_file, wherever UPLOAD_FOLDER is
+        farm_image.path = farm_image.image_url = url_for(
+            "farm.image_file", image_id=farm_image.id
+        )
 
-        flash("Image uploaded successfully! It will be analyzed shortly.", "success")
+        # Process image with ML model (asynchronously), unless the same file
+        # has been processed before
+        from ..ml.utils import process_farm_image, reuse_processing_results
+
+        if reuse_processing_results(farm_image):
+            db.session.commit()
+            flash("Image uploaded successfully! Its analysis is ready.", "success")
+        else:
+            db.session.commit()
+            process_farm_image(farm_image.id)
+            flash("Image uploaded successfully! It will be analyzed shortly.", "success")
         return redirect(url_for("farm.view_farm", farm_id=farm.id))
 
     # Create a template for this in the next phase
@@ -446,6 +463,60 @@ def upload_image(farm_id):
     )
 
 
+def _user_image(image_id):
+    """The FarmImage, if the current user owns its farm or is an admin"""
+    image = FarmImage.query.get_or_404(image_id)
+    if image.farm.user_id != current_user.id and not current_user.is_admin():
+        abort(403)  # Forbidden
+    return image
+
+
+def _send_image(path):
+    """A stored image or derivative; they never change, but only the browser may keep them"""
+    try:
+        response = send_file(path, max_age=365 * 24 * 3600)
+    except FileNotFoundError:
+        abort(404)
+    # Shared caches would serve it to anyone
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.immutable = True
+    return response
+
+
+@farm.route("/images/<int:image_id>/original")
+@login_required
+def image_file(image_id):
+    """The uploaded file of a farm image"""
+    image = _user_image(image_id)
+    if not image.filename:
+        abort(404)
+    return _send_image(image_path(image.filename))
+
+
+@farm.route("/images/<int:image_id>/<variant>.<fmt>")
+@login_required
+def image_derivative(image_id, variant, fmt):
+    """Thumbnail or web-sized copy of a farm image, made on first request"""
+    image = _user_image(image_id)
+    if variant not in image_derivatives.sizes or fmt not in FORMATS or not image.filename:
+        abort(404)
+
+    source_path = image_path(image.filename)
+    try:
+        if image.content_hash is None:
+            # Uploaded before uploads were hashed; hash it now
+            image.content_hash = hash_file(
+                source_path, current_app.config["UPLOAD_CHUNK_SIZE"]
+            )
+            db.session.commit()
+        image_derivatives.ensure(image.content_hash, source_path)
+    except (OSError, ValueError):
+        abort(404)
+    # Images never change, so neither does the derivative at this URL
+    return _send_image(image_derivatives.path(image.content_hash, variant, fmt))
+
+
 @farm.route("/add_sensor_data/<int:farm_id>", methods=["GET", "POST"])
 @login_required
 @require_farm_registration
@@ -488,13 +559,13 @@ def add_sensor_data(farm_id):
 def alerts():
     """View all alerts for user's farms"""
     # Get user's farms
-    farm_ids = [farm.id for farm in Farm.query.filter_by(user_id=current_user.id).all()]
+    farm_ids = db.session.query(Farm.id).filter_by(user_id=current_user.id)
 
-    # Get alerts for these farms
-    alerts = (
-        Alert.query.filter(Alert.farm_id.in_(farm_ids))
-        .order_by(Alert.created_at.desc())
-        .all()
+    # Get alerts for these farms, one page at a time
+    alerts = paginate(
+        Alert.query.filter(Alert.farm_id.in_(farm_ids.scalar_subquery())),
+        Alert.created_at,
+        Alert.id,
     )
 
     # You could create a specialized alerts page or use the partials/alerts.html component
@@ -581,8 +652,33 @@ def dashboard_data():
     )
 
 
+def _farms_version():
+    """Counts and latest changes of the user's farms, fields and boundaries"""
+    farm_ids = db.select(Farm.id).where(Farm.user_id == current_user.id)
+    field_ids = db.select(Field.id).where(Field.farm_id.in_(farm_ids))
+
+    def summary(model, condition):
+        return (
+            db.select(db.func.count(model.id), db.func.max(model.updated_at))
+            .where(condition)
+            .subquery()
+        )
+
+    farms = summary(Farm, Farm.user_id == current_user.id)
+    fields = summary(Field, Field.farm_id.in_(farm_ids))
+    boundaries = summary(BoundaryMarker, BoundaryMarker.field_id.in_(field_ids))
+    row = db.session.execute(
+        db.select(*farms.c, *fields.c, *boundaries.c)
+        .select_from(farms)
+        .join(fields, db.true())
+        .join(boundaries, db.true())
+    ).one()
+    return tuple(row), None
+
+
 @farm.route("/get_farms", methods=["GET"])
 @login_required
+@conditional(_farms_version)
 def get_farms():
     """Get farms for the current user"""
     farms = Farm.query.filter_by(user_id=current_user.id).all()
@@ -602,7 +698,7 @@ def get_farms():
             field_data = {"id": field.id, "name": field.name, "boundaries": []}
 
             # Get boundaries for this field
-            boundaries = Boundary.query.filter_by(field_id=field.id).all()
+            boundaries = BoundaryMarker.query.filter_by(field_id=field.id).all()
             for boundary in boundaries:
                 field_data["boundaries"].append(
                     {
@@ -0,0 +1,92 @@
+# app/farm/storage.py
+"""Content-addressed storage of uploaded farm images.
+
+An upload is copied in UPLOAD_CHUNK_SIZE chunks into a temporary file
+inside the image folder while its SHA-256 is computed, so it is read only
+once and never held in memory whole. The finished file is renamed to
+images/<h[:2]>/<h[2:4]>/<h>.<ext>; the two levels of 256 directories keep
+every directory small. A photo uploaded again, by anyone, hashes to the
+same name: the file already there is kept and the copy is dropped.
+
+Stored files may be shared by any number of FarmImage rows, so they are
+never deleted along with one. FarmImage.filename is the name under the
+image folder (images from before hashing have flat names there), and
+image_path() finds the file wherever UPLOAD_FOLDER is; the files are
+served by farm.image_file.
+"""
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+from flask import current_app
+
+IMAGE_FOLDER = "images"
+
+# One extension per format, so the same bytes always map to the same file
+_EXTENSIONS = {".jpeg": ".jpg"}
+
+StoredFile = namedtuple("StoredFile", "digest size filename created")
+
+
+def image_path(filename):
+    """Path of the stored image FarmImage.filename (needs an app context)"""
+    return os.path.join(
+        current_app.root_path, current_app.config["UPLOAD_FOLDER"], IMAGE_FOLDER, filename
+    )
+
+
+def shard_name(digest, extension):
+    """Name of the file for digest, relative to the image folder"""
+    extension = extension.lower()
+    extension = _EXTENSIONS.get(extension, extension)
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+def _copy(stream, out, chunk_size):
+    """Copy stream to out chunk by chunk; (hex SHA-256, bytes copied)"""
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+        if out is not None:
+            out.write(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """Hex SHA-256 of the file at path, read chunk_size bytes at a time"""
+    with open(path, "rb") as f:
+        return _copy(f, None, chunk_size)[0]
+
+
+def store_stream(stream, upload_folder, extension, chunk_size=1024 * 1024):
+    """Store the rest of stream under its content hash; a StoredFile
+
+    StoredFile.filename is relative to the image folder and created is
+    False when an identical file was already stored.
+    """
+    folder = os.path.join(upload_folder, IMAGE_FOLDER)
+    os.makedirs(folder, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=folder, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            digest, size = _copy(stream, out, chunk_size)
+        filename = shard_name(digest, extension)
+        path = os.path.join(folder, filename)
+        if os.path.exists(path):
+            os.unlink(temp_path)
+            return StoredFile(digest, size, filename, False)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # mkstemp creates the file readable by its owner only
+        os.chmod(temp_path, 0o644)
+        # Concurrent uploads of the same photo race harmlessly: the bytes are equal
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return StoredFile(digest, size, filename, True)
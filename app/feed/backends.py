@@ -0,0 +1,284 @@
+# app/feed/backends.py
+"""Inference backends behind YoloDetector.
+
+DETECTOR_BACKEND picks how the maize/weed model runs on CPU:
+
+- ultralytics: the PyTorch .pt model through the Ultralytics runtime.
+- onnx: the model exported to ONNX (`flask export-detector`) and run by
+  ONNX Runtime with DETECTOR_THREADS intra-op threads. DETECTOR_INT8 uses
+  the dynamically quantized copy instead.
+- torchscript: the exported TorchScript module, without Ultralytics.
+
+Exported files sit next to DETECTOR_MODEL_PATH (maize_weed_detection.onnx,
+.int8.onnx, .torchscript). ONNX is exported with dynamic input sizes so it
+can run at any of DETECTOR_SIZES, several images per call; TorchScript
+always runs one image at the export size recorded in the file. The exported backends do their
+own letterbox preprocessing and NMS so their boxes line up with the
+Ultralytics ones;
+app/scripts/bench_detector_backends.py checks that and compares speed.
+"""
+import json
+import os
+import cv2
+import numpy as np
+
+# Added to boxes per class id so one NMS pass never suppresses across classes
+_CLASS_OFFSET = 7680
+
+
+class InferenceBackend:
+    """Runs the detector on one BGR frame"""
+
+    name = None
+
+    def __init__(self, model_path, threads=None, imgsz=640, conf=0.25, iou=0.45):
+        self.model_path = model_path
+        self.threads = threads
+        self.imgsz = imgsz
+        self.conf = conf
+        self.iou = iou
+
+    def load(self):
+        raise NotImplementedError
+
+    def predict(self, frame, imgsz=None):
+        """(xyxy boxes (N, 4), scores (N,), class ids (N,)) in frame pixels
+
+        imgsz overrides the letterbox size for this frame where the model
+        allows it.
+        """
+        raise NotImplementedError
+
+    def predict_batch(self, frames, imgsz=None):
+        """predict() for each of frames; backends that can batch override this"""
+        return [self.predict(frame, imgsz) for frame in frames]
+
+
+class UltralyticsBackend(InferenceBackend):
+    name = "ultralytics"
+
+    def load(self):
+        import torch
+        from ultralytics import YOLO
+
+        if self.threads:
+            # Workers x threads should not exceed the cores
+            torch.set_num_threads(self.threads)
+        self.model = YOLO(self.model_path)
+        # Inference only: no autograd state is written once workers share the pages
+        self.model.model.eval()
+        for parameter in self.model.model.parameters():
+            parameter.requires_grad_(False)
+
+    def predict(self, frame, imgsz=None):
+        return self.predict_batch([frame], imgsz)[0]
+
+    def predict_batch(self, frames, imgsz=None):
+        imgsz = imgsz or self.imgsz
+        results = self.model(
+            list(frames), imgsz=imgsz, conf=self.conf, iou=self.iou, verbose=False
+        )
+        return [
+            (
+                result.boxes.xyxy.cpu().numpy(),
+                result.boxes.conf.cpu().numpy(),
+                result.boxes.cls.cpu().numpy().astype(int),
+            )
+            for result in results
+        ]
+
+
+def letterbox(frame, size):
+    """NCHW float32 RGB blob of frame fitted into size x size, and how to undo it"""
+    height, width = frame.shape[:2]
+    scale = min(size / height, size / width)
+    new_w, new_h = round(width * scale), round(height * scale)
+    if (new_w, new_h) != (width, height):
+        frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    pad_x, pad_y = (size - new_w) / 2, (size - new_h) / 2
+    # Same split of odd padding as the Ultralytics LetterBox transform
+    top, bottom = round(pad_y - 0.1), round(pad_y + 0.1)
+    left, right = round(pad_x - 0.1), round(pad_x + 0.1)
+    frame = cv2.copyMakeBorder(
+        frame, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114)
+    )
+    blob = cv2.dnn.blobFromImage(frame, 1 / 255.0, swapRB=True)
+    return blob, scale, (left, top)
+
+
+def decode(output, conf, iou, scale, pad, shape):
+    """Boxes, scores and class ids in frame pixels from a (1, 4 + classes, anchors) output"""
+    predictions = output[0].T
+    class_scores = predictions[:, 4:]
+    class_ids = class_scores.argmax(axis=1)
+    scores = class_scores[np.arange(len(predictions)), class_ids]
+    keep = scores > conf
+    predictions, scores, class_ids = predictions[keep], scores[keep], class_ids[keep]
+
+    cx, cy, w, h = predictions[:, :4].T
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    offset = (class_ids * _CLASS_OFFSET)[:, None]
+    shifted = boxes + offset
+    xywh = np.concatenate([shifted[:, :2], shifted[:, 2:] - shifted[:, :2]], axis=1)
+    indices = np.asarray(
+        cv2.dnn.NMSBoxes(xywh.tolist(), scores.tolist(), conf, iou), dtype=int
+    ).reshape(-1)
+
+    boxes = boxes[indices]
+    boxes -= [pad[0], pad[1], pad[0], pad[1]]
+    boxes /= scale
+    height, width = shape[:2]
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+    return boxes, scores[indices], class_ids[indices]
+
+
+class _ExportedBackend(InferenceBackend):
+    """Shared pre- and post-processing for models exported from Ultralytics"""
+
+    # Input size baked into the exported graph, or None if it is dynamic
+    fixed_imgsz = None
+    # Whether the graph takes more than one image per call
+    batched = False
+
+    def _forward(self, blob):
+        raise NotImplementedError
+
+    def predict(self, frame, imgsz=None):
+        size = self.fixed_imgsz or imgsz or self.imgsz
+        blob, scale, pad = letterbox(frame, size)
+        return decode(self._forward(blob), self.conf, self.iou, scale, pad, frame.shape)
+
+    def predict_batch(self, frames, imgsz=None):
+        if not self.batched:
+            return super().predict_batch(frames, imgsz)
+        size = self.fixed_imgsz or imgsz or self.imgsz
+        letterboxed = [letterbox(frame, size) for frame in frames]
+        outputs = self._forward(np.concatenate([blob for blob, _, _ in letterboxed]))
+        return [
+            decode(outputs[i : i + 1], self.conf, self.iou, scale, pad, frame.shape)
+            for i, (frame, (_, scale, pad)) in enumerate(zip(frames, letterboxed))
+        ]
+
+
+class OnnxBackend(_ExportedBackend):
+    name = "onnx"
+
+    def load(self):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            self.model_path, options, providers=["CPUExecutionProvider"]
+        )
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        if isinstance(model_input.shape[2], int):
+            self.fixed_imgsz = model_input.shape[2]
+        self.batched = not isinstance(model_input.shape[0], int)
+
+    def _forward(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class TorchScriptBackend(_ExportedBackend):
+    name = "torchscript"
+
+    def load(self):
+        import torch
+
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        # Ultralytics stores the export arguments, imgsz included, beside the graph
+        extra_files = {"config.txt": ""}
+        self.model = torch.jit.load(
+            self.model_path, map_location="cpu", _extra_files=extra_files
+        ).eval()
+        # Traced at export time, so the anchor grid only fits the export size
+        self.fixed_imgsz = export_imgsz(extra_files["config.txt"], self.model_path)
+
+    def _forward(self, blob):
+        import torch
+
+        with torch.inference_mode():
+            output = self.model(torch.from_numpy(blob))
+        if isinstance(output, (list, tuple)):
+            output = output[0]
+        return output.numpy()
+
+
+def export_imgsz(config, model_path):
+    """Square input size recorded in an Ultralytics TorchScript export's config.txt
+
+    Raises ValueError if it is missing or not square, since the traced graph
+    cannot run at any other size.
+    """
+    try:
+        imgsz = json.loads(config or "{}").get("imgsz")
+    except (AttributeError, ValueError):
+        imgsz = None
+    if type(imgsz) is int:  # not bool
+        imgsz = [imgsz, imgsz]
+    if (
+        not isinstance(imgsz, list)
+        or len(imgsz) != 2
+        or not all(type(side) is int and side > 0 for side in imgsz)
+    ):
+        raise ValueError(
+            f"{model_path} records no export imgsz; re-run flask export-detector"
+        )
+    if imgsz[0] != imgsz[1]:
+        raise ValueError(f"{model_path} was exported at non-square imgsz {imgsz}")
+    return imgsz[0]
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (UltralyticsBackend, OnnxBackend, TorchScriptBackend)
+}
+
+
+def exported_path(model_path, backend, int8=False):
+    """Where the backend's copy of the .pt model at model_path lives"""
+    base = os.path.splitext(model_path)[0]
+    if backend == "onnx":
+        return base + (".int8.onnx" if int8 else ".onnx")
+    if backend == "torchscript":
+        return base + ".torchscript"
+    return model_path
+
+
+def create_backend(name, model_path, int8=False, **options):
+    """Backend called name for the .pt model at model_path"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unsupported DETECTOR_BACKEND: {name!r}")
+    return BACKENDS[name](exported_path(model_path, name, int8), **options)
+
+
+def export_model(model_path, backend, imgsz=640, int8=False, opset=12):
+    """Export the .pt model for backend and return the written file paths"""
+    from ultralytics import YOLO
+
+    if backend == "onnx":
+        exported = YOLO(model_path).export(
+            format="onnx", imgsz=imgsz, opset=opset, dynamic=True, simplify=True
+        )
+    elif backend == "torchscript":
+        exported = YOLO(model_path).export(format="torchscript", imgsz=imgsz)
+    else:
+        raise ValueError(f"Nothing to export for backend {backend!r}")
+    paths = [str(exported)]
+    if int8:
+        if backend != "onnx":
+            raise ValueError("INT8 quantization is only available for the onnx backend")
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized = exported_path(model_path, "onnx", int8=True)
+        quantize_dynamic(str(exported), quantized, weight_type=QuantType.QUInt8)
+        paths.append(quantized)
+    return paths
@@ -0,0 +1,367 @@
+# app/feed/detector.py
+"""Maize/weed detector and how the web workers share its weights.
+
+DETECTOR_MODE picks where the YOLO weights live:
+
+- worker: each worker process loads its own copy on first use. Memory
+  grows by one model per worker.
+- preload (default): wsgi.py loads the weights in the gunicorn master
+  before it forks (preload_app), and gunicorn.conf.py freezes the GC so
+  the workers keep sharing those pages copy-on-write. The model is only
+  ever read after fork.
+- service: one inference process (`flask inference-server`) holds the
+  model and the workers send it frames over a local Unix socket
+  (DETECTOR_SOCKET), the pixels themselves through shared memory (see
+  frame_ring.py). Memory no longer depends on the worker count, and
+  inference is serialized in one place.
+
+get_detector() returns the right object for the mode; both have detect(),
+which raises DetectionFailed when the model could not be run, so a
+failure is never mistaken for a frame without maize or weeds.
+DETECTOR_BACKEND chooses how the model itself runs (see backends.py).
+"""
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+import cv2
+import numpy as np
+from flask import current_app
+from PIL import Image
+from .backends import create_backend
+from .frame_ring import FrameRing
+from .tiling import predict_tiled
+
+logger = logging.getLogger(__name__)
+
+DETECTOR_MODES = ("worker", "preload", "service")
+CLASS_NAMES = ["maize", "weed"]
+
+
+class DetectionFailed(RuntimeError):
+    """The model could not be run on a frame (not loaded, error, service down)"""
+
+
+def to_bgr(image_data):
+    """BGR uint8 array for a PIL image or an array that already is one"""
+    if isinstance(image_data, Image.Image):
+        return cv2.cvtColor(np.array(image_data.convert("RGB")), cv2.COLOR_RGB2BGR)
+    return image_data
+
+
+class AdaptiveSize:
+    """Inference size that steps down DETECTOR_SIZES while latency is over budget
+
+    Latency is an exponential moving average of the time from a request
+    reaching the detector to its result, so it includes waiting behind other
+    requests. The size steps down when the average exceeds the budget and
+    back up once it is under half of it, at most once per `cooldown` frames
+    so each size gets a fair measurement.
+    """
+
+    def __init__(self, sizes, default, budget_ms, cooldown=20):
+        self.sizes = sorted(sizes)
+        self.index = self.sizes.index(default)
+        self.budget = budget_ms / 1000
+        self.cooldown = cooldown
+        self.latency = None
+        self._frames_since_change = 0
+        self._lock = threading.Lock()
+
+    @property
+    def current(self):
+        return self.sizes[self.index]
+
+    def record(self, seconds):
+        if not self.budget:
+            return
+        with self._lock:
+            if self.latency is None:
+                self.latency = seconds
+            else:
+                self.latency = 0.8 * self.latency + 0.2 * seconds
+            self._frames_since_change += 1
+            if self._frames_since_change < self.cooldown:
+                return
+            if self.latency > self.budget and self.index > 0:
+                self.index -= 1
+            elif self.latency < self.budget / 2 and self.index < len(self.sizes) - 1:
+                self.index += 1
+            else:
+                return
+            self._frames_since_change = 0
+            logger.info(
+                "Detector latency %.0f ms, inference size now %d",
+                self.latency * 1000,
+                self.current,
+            )
+
+
+class YoloDetector:
+    """
+    Utility class for YOLO model integration for maize/weed detection.
+    Runs the model through an InferenceBackend (see backends.py).
+    """
+
+    def __init__(
+        self,
+        backend,
+        class_names=CLASS_NAMES,
+        sizes=None,
+        budget_ms=0,
+        tile_size=640,
+        tile_overlap=0.2,
+        tile_batch=8,
+    ):
+        self.backend = backend
+        self.model_path = backend.model_path
+        self.class_names = list(class_names)
+        self.size = AdaptiveSize(sizes or [backend.imgsz], backend.imgsz, budget_ms)
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.tile_batch = tile_batch
+        self.is_loaded = False
+        self._load_lock = threading.Lock()
+        # One frame at a time: Ultralytics predictors are not thread-safe, and
+        # the wait here is the queueing the adaptive size reacts to
+        self._inference_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """Detector using the backend and settings in the app config"""
+        backend = create_backend(
+            config["DETECTOR_BACKEND"],
+            config["DETECTOR_MODEL_PATH"],
+            int8=config["DETECTOR_INT8"],
+            threads=config["DETECTOR_THREADS"],
+            imgsz=config["DETECTOR_IMGSZ"],
+            conf=config["DETECTOR_CONF"],
+            iou=config["DETECTOR_IOU"],
+        )
+        return cls(
+            backend,
+            sizes=config["DETECTOR_SIZES"],
+            budget_ms=config["DETECTOR_LATENCY_BUDGET_MS"],
+            tile_size=config["DETECTOR_TILE_SIZE"],
+            tile_overlap=config["DETECTOR_TILE_OVERLAP"],
+            tile_batch=config["DETECTOR_TILE_BATCH"],
+        )
+
+    def load_model(self):
+        """Load the model once; later calls are no-ops"""
+        with self._load_lock:
+            if self.is_loaded:
+                return True
+            logger.info("Loading %s model from %s", self.backend.name, self.model_path)
+            try:
+                self.backend.load()
+            except Exception:
+                logger.exception("Error loading %s model", self.backend.name)
+                return False
+            self.is_loaded = True
+            return True
+
+    def detect(self, image_data, imgsz=None, scale=1.0, tiled=False):
+        """
+        Detect objects in the image
+
+        Args:
+            image_data: Image data (PIL Image or BGR numpy array)
+            imgsz: Inference size, or None for the current adaptive size
+            scale: Factor from image_data's pixels to the reported coordinates,
+                for frames decoded at reduced size (see preprocess.py)
+            tiled: Infer overlapping tile_size tiles of the full-resolution
+                image instead of the whole image at imgsz (see tiling.py)
+
+        Returns:
+            List of detections with format:
+            [{'class': 'class_name', 'confidence': float, 'bbox': [x, y, width, height]}, ...]
+
+        Raises DetectionFailed if the model can't be loaded or inference fails.
+        """
+        if not self.load_model():
+            raise DetectionFailed("Model could not be loaded")
+        frame = to_bgr(image_data)
+        started = time.monotonic()
+        try:
+            with self._inference_lock:
+                if tiled:
+                    result = predict_tiled(
+                        self.backend,
+                        frame,
+                        self.tile_size,
+                        self.tile_overlap,
+                        self.tile_batch,
+                    )
+                else:
+                    result = self.backend.predict(frame, imgsz or self.size.current)
+        except Exception as e:
+            logger.exception("Error in YOLO detection")
+            raise DetectionFailed(f"Inference failed: {e}") from e
+        if not tiled:
+            # Tiled photos are slow by design and say nothing about the live feed
+            self.size.record(time.monotonic() - started)
+        return self._format(*result, scale=scale)
+
+    def _format(self, boxes, confs, cls_ids, scale=1.0):
+        """Convert xyxy boxes, scores and class ids to the detection format above"""
+        detections = []
+        for (x1, y1, x2, y2), conf, cls_id in zip(boxes * scale, confs, cls_ids):
+            if cls_id < len(self.class_names):
+                cls_name = self.class_names[cls_id]
+            else:
+                cls_name = f"unknown_{cls_id}"
+            detections.append(
+                {
+                    "class": cls_name,
+                    "confidence": float(conf),
+                    "bbox": [int(x1), int(y1), int(x2 - x1), int(y2 - y1)],
+                }
+            )
+        return detections
+
+
+class InferenceClient:
+    """Sends frames to the inference service; one connection per thread
+
+    Each connection is leased a slot of the service's shared-memory
+    FrameRing, so a frame costs one memcpy instead of a pickle round trip.
+    Frames too large for a slot, or connections that got no slot, are
+    pickled over the socket instead.
+    """
+
+    def __init__(self, address, timeout=10):
+        self.address = address
+        self.timeout = timeout
+        self._local = threading.local()
+        self._rings = {}
+        self._rings_lock = threading.Lock()
+
+    def _ring(self, name, slots, slot_bytes):
+        with self._rings_lock:
+            if name not in self._rings:
+                self._rings[name] = FrameRing.attach(name, slots, slot_bytes)
+            return self._rings[name]
+
+    def _connection(self):
+        """(connection, ring, slot) for this thread, connecting if needed"""
+        state = getattr(self._local, "state", None)
+        if state is None:
+            conn = Client(self.address, family="AF_UNIX")
+            _, name, slots, slot_bytes, slot = conn.recv()
+            ring = self._ring(name, slots, slot_bytes) if slot is not None else None
+            state = self._local.state = (conn, ring, slot)
+        return state
+
+    def _drop_connection(self):
+        state = getattr(self._local, "state", None)
+        self._local.state = None
+        if state is not None:
+            state[0].close()
+
+    def _round_trip(self, frame, options):
+        conn, ring, slot = self._connection()
+        if ring is not None and ring.fits(frame.shape):
+            conn.send(("shm", ring.write(slot, frame), options))
+        else:
+            conn.send(("frame", frame, options))
+        if not conn.poll(self.timeout):
+            # The service finishes with the slot before recycling it
+            raise TimeoutError(f"no reply within {self.timeout}s")
+        return conn.recv()
+
+    def detect(self, image_data, imgsz=None, scale=1.0, tiled=False):
+        """Detections for the image; DetectionFailed if the service can't provide them"""
+        frame = np.ascontiguousarray(to_bgr(image_data), dtype=np.uint8)
+        # One retry: the service may have restarted since this thread last used it
+        for attempt in (1, 2):
+            try:
+                status, payload = self._round_trip(
+                    frame, {"imgsz": imgsz, "scale": scale, "tiled": tiled}
+                )
+                break
+            except (OSError, EOFError) as e:
+                self._drop_connection()
+                if attempt == 2 or isinstance(e, TimeoutError):
+                    logger.error("Inference service at %s unavailable: %s", self.address, e)
+                    raise DetectionFailed(f"Inference service unavailable: {e}") from e
+        if status != "ok":
+            logger.error("Inference service error: %s", payload)
+            raise DetectionFailed(f"Inference service error: {payload}")
+        return payload
+
+
+def serve(detector, address, slots=32, slot_bytes=1920 * 1080 * 3):
+    """Answer detection requests on the Unix socket at address until interrupted"""
+    if not detector.load_model():
+        raise RuntimeError(f"Could not load the model at {detector.model_path}")
+    if os.path.exists(address):
+        os.unlink(address)
+    ring = FrameRing.create(slots, slot_bytes)
+    if threading.current_thread() is threading.main_thread():
+        # Unlink the shared memory on a supervisor's SIGTERM too
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    def handle(conn):
+        slot = ring.lease()
+        try:
+            conn.send(("hello", ring.name, ring.slots, ring.slot_bytes, slot))
+            while True:
+                kind, data, options = conn.recv()
+                # Read the frame in place; the client won't touch the slot before our reply
+                frame = ring.view(slot, data) if kind == "shm" else data
+                try:
+                    reply = ("ok", detector.detect(frame, **options))
+                except Exception as e:
+                    reply = ("error", str(e))
+                del frame
+                conn.send(reply)
+        except (OSError, EOFError):
+            pass
+        finally:
+            conn.close()
+            if slot is not None:
+                ring.release(slot)
+
+    try:
+        with Listener(address, family="AF_UNIX", backlog=128) as listener:
+            os.chmod(address, 0o600)
+            logger.info("Inference service listening on %s", address)
+            while True:
+                conn = listener.accept()
+                threading.Thread(target=handle, args=(conn,), daemon=True).start()
+    finally:
+        ring.close()
+
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def get_detector(app=None):
+    """The detector this process should use under DETECTOR_MODE"""
+    global _detector
+    app = app or current_app
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                mode = app.config["DETECTOR_MODE"]
+                if mode not in DETECTOR_MODES:
+                    raise ValueError(f"Unsupported DETECTOR_MODE: {mode!r}")
+                if mode == "service":
+                    _detector = InferenceClient(
+                        app.config["DETECTOR_SOCKET"],
+                        timeout=app.config["DETECTOR_TIMEOUT"],
+                    )
+                else:
+                    _detector = YoloDetector.from_config(app.config)
+    return _detector
+
+
+def preload_detector(app):
+    """Load the weights now if DETECTOR_MODE is preload (call before forking)"""
+    if app.config["DETECTOR_MODE"] == "preload":
+        get_detector(app).load_model()
@@ -0,0 +1,153 @@
+# app/feed/frame_cache.py
+"""Detection results reused for near-identical frames.
+
+A static field camera uploads almost the same frame for minutes at a time.
+Each frame gets a 64-bit perceptual hash of a small grayscale thumbnail
+(dHash by default, pHash optional). If a cached frame in the same scope
+(user, inference size and upload size) is within DETECTION_CACHE_MAX_DISTANCE
+differing bits, its detections are returned and the model never runs.
+
+Entries expire DETECTION_CACHE_MAX_AGE seconds after they were computed,
+whether or not they keep getting hits, so slow changes such as light or
+growth are picked up again. The cache is a per-process LRU of at most
+DETECTION_CACHE_MAX_ENTRIES frames; 0 disables it.
+"""
+import threading
+import time
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+
+def _gray(frame, size):
+    # Area-average the whole frame: a cheaper pre-shrink makes the bits noisier
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+def _to_int(bits):
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def dhash(frame):
+    """64-bit difference hash: sign of horizontal gradients on a 9x8 thumbnail"""
+    small = _gray(frame, (9, 8)).astype(np.int16)
+    return _to_int(small[:, 1:] > small[:, :-1])
+
+
+def phash(frame):
+    """64-bit perceptual hash: low DCT frequencies of a 32x32 thumbnail vs their median"""
+    low = cv2.dct(_gray(frame, (32, 32)).astype(np.float32))[:8, :8]
+    return _to_int(low > np.median(low.ravel()[1:]))
+
+
+HASHES = {"dhash": dhash, "phash": phash}
+
+
+class DetectionCache:
+    """Per-process LRU of detections keyed by scope and perceptual hash"""
+
+    def __init__(self, app=None):
+        self.max_entries = 0
+        self.max_age = 60
+        self.max_distance = 4
+        self.hash = dhash
+        self._entries = OrderedDict()  # (scope, hash) -> (created, detections)
+        self._lock = threading.Lock()
+        self.reset_stats()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        kind = config["DETECTION_CACHE_HASH"]
+        if kind not in HASHES:
+            raise ValueError(f"Unknown DETECTION_CACHE_HASH: {kind!r}")
+        self.hash = HASHES[kind]
+        self.max_entries = config["DETECTION_CACHE_MAX_ENTRIES"]
+        self.max_age = config["DETECTION_CACHE_MAX_AGE"]
+        self.max_distance = config["DETECTION_CACHE_MAX_DISTANCE"]
+        self.clear()
+        app.extensions["detection_cache"] = self
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def detect(self, scope, frame, run):
+        """run() for frame, unless a near-identical frame in scope was detected recently"""
+        if not self.enabled:
+            return run()
+        frame_hash = self.hash(frame)
+        detections = self.get(scope, frame_hash)
+        if detections is None:
+            started = time.perf_counter()
+            detections = run()
+            self.set(scope, frame_hash, detections, time.perf_counter() - started)
+        return detections
+
+    def get(self, scope, frame_hash):
+        """Detections of the closest cached frame within max_distance, or None"""
+        now = time.monotonic()
+        with self._lock:
+            best, best_distance = None, self.max_distance + 1
+            for key, (created, _) in list(self._entries.items()):
+                if now - created > self.max_age:
+                    del self._entries[key]
+                    continue
+                if key[0] != scope:
+                    continue
+                distance = (key[1] ^ frame_hash).bit_count()
+                if distance < best_distance:
+                    best, best_distance = key, distance
+            if best is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(best)
+            self._stats["hits"] += 1
+            self._stats["saved_seconds"] += self._mean_inference()
+            return self._entries[best][1]
+
+    def set(self, scope, frame_hash, detections, inference_seconds):
+        """Store detections computed in inference_seconds for a missed frame"""
+        with self._lock:
+            self._entries[(scope, frame_hash)] = (time.monotonic(), detections)
+            self._entries.move_to_end((scope, frame_hash))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._stats["inferences"] += 1
+            self._stats["inference_seconds"] += inference_seconds
+
+    def _mean_inference(self):
+        if not self._stats["inferences"]:
+            return 0.0
+        return self._stats["inference_seconds"] / self._stats["inferences"]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {
+                "hits": 0,
+                "misses": 0,
+                "inferences": 0,
+                "inference_seconds": 0.0,
+                "saved_seconds": 0.0,
+            }
+
+    def stats(self):
+        """Counters for this process; saved_seconds estimates skipped inference time"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 3) if lookups else None
+        stats["inference_seconds"] = round(stats["inference_seconds"], 3)
+        stats["saved_seconds"] = round(stats["saved_seconds"], 3)
+        return stats
+
+
+detection_cache = DetectionCache()
@@ -0,0 +1,77 @@
+# app/feed/frame_ring.py
+"""Ring of fixed-size frame slots in shared memory.
+
+The inference service creates the ring and leases one slot to each client
+connection for as long as the connection lives. A web worker thread writes
+its decoded (H, W, 3) uint8 frame into its slot and sends only the shape
+over the socket. The service wraps the same bytes in an ndarray without
+copying, runs the model on it and replies with the detections. Only the
+service hands out slots, so no cross-process locking is needed, and a slot
+goes back on the free list once its connection has closed and the service
+has finished reading from it.
+"""
+import threading
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+
+class FrameRing:
+    """Shared-memory slots of slot_bytes each"""
+
+    def __init__(self, shm, slots, slot_bytes, owner):
+        self.shm = shm
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.owner = owner
+        self._free = list(range(slots))
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, slots, slot_bytes):
+        """New ring, owned (and eventually unlinked) by the calling process"""
+        shm = SharedMemory(create=True, size=slots * slot_bytes)
+        return cls(shm, slots, slot_bytes, owner=True)
+
+    @classmethod
+    def attach(cls, name, slots, slot_bytes):
+        """Map an existing ring created by another process"""
+        try:
+            shm = SharedMemory(name=name, track=False)
+        except TypeError:
+            # Before Python 3.13 attaching registers the segment with this
+            # process's resource tracker, which would unlink it on exit
+            shm = SharedMemory(name=name)
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, slots, slot_bytes, owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def fits(self, shape):
+        return int(np.prod(shape)) <= self.slot_bytes
+
+    def view(self, slot, shape):
+        """uint8 array of shape backed directly by slot's memory"""
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf,
+                          offset=slot * self.slot_bytes)
+
+    def write(self, slot, frame):
+        """Copy frame into slot and return the shape to send with it"""
+        self.view(slot, frame.shape)[...] = frame
+        return frame.shape
+
+    def lease(self):
+        """A free slot index, or None when every slot is in use"""
+        with self._lock:
+            return self._free.pop() if self._free else None
+
+    def release(self, slot):
+        with self._lock:
+            self._free.append(slot)
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,209 @@
+# app/feed/motion.py
+"""Motion gating of the live field feed.
+
+Clients that send a `stream_id` with their frames get a per-stream gate in
+front of the detector. Each frame is shrunk to MOTION_WIDTH pixels wide,
+grayscaled, blurred and compared with the frame the detector last ran on
+(the keyframe). The share of pixels that changed by more than
+MOTION_PIXEL_DELTA levels decides what happens:
+
+- below MOTION_THRESHOLD: the keyframe's detections are returned as they are
+- with MOTION_TILES > 0, only some of the MOTION_TILES x MOTION_TILES tiles
+  changed: the detector runs on the padded region covering those tiles,
+  and detections outside that region are kept
+- otherwise: the detector runs on the whole frame
+
+Comparing against the keyframe rather than the previous frame stops slow
+changes from slipping through a frame at a time; MOTION_REFRESH_SECONDS
+forces a full run regardless. Clients can tune the threshold and tiling
+per stream with the `motion_threshold` and `motion_tiles` form fields.
+Stream state is per process, so a stream spread over several workers is
+gated less often but never wrongly.
+"""
+import threading
+import time
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+# Region runs covering more than this share of the frame run on all of it
+_MAX_REGION_AREA = 0.5
+MAX_MOTION_TILES = 8
+
+
+class StreamState:
+    """Keyframe, detections and settings of one client stream"""
+
+    def __init__(self, threshold, tiles):
+        self.threshold = threshold
+        self.tiles = tiles
+        self.keyframe = None
+        self.detections = None
+        self.keyframe_time = 0.0
+        self.lock = threading.Lock()
+
+
+def _copy(detections):
+    """Detections the caller may modify without touching the stream's copy"""
+    return [dict(d, bbox=list(d["bbox"])) for d in detections]
+
+
+def _shift(detections, dx, dy):
+    for detection in detections:
+        detection["bbox"][0] += dx
+        detection["bbox"][1] += dy
+    return detections
+
+
+def _overlaps(bbox, region):
+    x, y, w, h = bbox
+    x1, y1, x2, y2 = region
+    return x < x2 and x + w > x1 and y < y2 and y + h > y1
+
+
+class MotionGate:
+    """Per-stream change detection in front of the detector"""
+
+    def __init__(self, app=None):
+        self.max_streams = 0
+        self._streams = OrderedDict()  # stream key -> StreamState
+        self._lock = threading.Lock()
+        self.reset_stats()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.max_streams = config["MOTION_MAX_STREAMS"]
+        self.width = config["MOTION_WIDTH"]
+        self.pixel_delta = config["MOTION_PIXEL_DELTA"]
+        self.threshold = config["MOTION_THRESHOLD"]
+        self.tiles = config["MOTION_TILES"]
+        self.refresh_seconds = config["MOTION_REFRESH_SECONDS"]
+        with self._lock:
+            self._streams.clear()
+        app.extensions["motion_gate"] = self
+
+    def _stream(self, key, threshold, tiles):
+        with self._lock:
+            state = self._streams.get(key)
+            if state is None:
+                state = self._streams[key] = StreamState(self.threshold, self.tiles)
+                while len(self._streams) > self.max_streams:
+                    self._streams.popitem(last=False)
+            self._streams.move_to_end(key)
+        if threshold is not None:
+            state.threshold = threshold
+        if tiles is not None:
+            state.tiles = tiles
+        return state
+
+    def _small(self, frame):
+        height = max(1, round(frame.shape[0] * self.width / frame.shape[1]))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def _changed_region(self, mask, tiles, threshold):
+        """(x1, y1, x2, y2) in mask pixels covering the changed tiles, or None"""
+        height, width = mask.shape
+        ys = np.linspace(0, height, tiles + 1).astype(int)
+        xs = np.linspace(0, width, tiles + 1).astype(int)
+        changed = [
+            (xs[j], ys[i], xs[j + 1], ys[i + 1])
+            for i in range(tiles)
+            for j in range(tiles)
+            if mask[ys[i] : ys[i + 1], xs[j] : xs[j + 1]].mean() >= threshold
+        ]
+        if not changed:
+            return None
+        x1, y1 = min(c[0] for c in changed), min(c[1] for c in changed)
+        x2, y2 = max(c[2] for c in changed), max(c[3] for c in changed)
+        # Half a tile of context so objects on the region's edge aren't cut off
+        pad_x, pad_y = width // (2 * tiles), height // (2 * tiles)
+        return (
+            max(0, x1 - pad_x),
+            max(0, y1 - pad_y),
+            min(width, x2 + pad_x),
+            min(height, y2 + pad_y),
+        )
+
+    def detect(self, key, frame, scale, run, threshold=None, tiles=None):
+        """Detections for the stream's frame, calling run(image) only on what changed
+
+        run(image) must return detections for image with boxes multiplied by
+        scale, like YoloDetector.detect(image, scale=scale).
+        """
+        if not self.max_streams:
+            return run(frame)
+        state = self._stream(key, threshold, tiles)
+        small = self._small(frame)
+        with state.lock:
+            now = time.monotonic()
+            if (
+                state.keyframe is None
+                or state.keyframe.shape != small.shape
+                or now - state.keyframe_time > self.refresh_seconds
+            ):
+                return self._run_full(state, frame, small, run, now)
+
+            mask = cv2.absdiff(small, state.keyframe) > self.pixel_delta
+            if mask.mean() < state.threshold:
+                self._count("reused")
+                return _copy(state.detections)
+            if not state.tiles:
+                return self._run_full(state, frame, small, run, now)
+
+            region = self._changed_region(mask, state.tiles, state.threshold)
+            if region is None:
+                self._count("reused")
+                return _copy(state.detections)
+            x1, y1, x2, y2 = region
+            area = (x2 - x1) * (y2 - y1) / mask.size
+            if area > _MAX_REGION_AREA:
+                return self._run_full(state, frame, small, run, now)
+
+            # Region in frame pixels, then in the coordinates detections use
+            factor = frame.shape[1] / small.shape[1]
+            fx1, fy1 = int(x1 * factor), int(y1 * factor)
+            fx2, fy2 = int(np.ceil(x2 * factor)), int(np.ceil(y2 * factor))
+            reported = [round(v * scale) for v in (fx1, fy1, fx2, fy2)]
+            kept = [d for d in state.detections if not _overlaps(d["bbox"], reported)]
+            found = _shift(_copy(run(frame[fy1:fy2, fx1:fx2])), *reported[:2])
+            state.detections = kept + found
+            state.keyframe = small
+            self._count("region_runs")
+            self._count("region_area", float(area))
+            return _copy(state.detections)
+
+    def _run_full(self, state, frame, small, run, now):
+        detections = run(frame)
+        state.detections = _copy(detections)
+        state.keyframe = small
+        state.keyframe_time = now
+        self._count("full_runs")
+        return detections
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {"reused": 0, "full_runs": 0, "region_runs": 0, "region_area": 0.0}
+
+    def stats(self):
+        """Counters for this process; region_area is the mean share of a region run"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["streams"] = len(self._streams)
+        frames = stats["reused"] + stats["full_runs"] + stats["region_runs"]
+        stats["frames"] = frames
+        stats["avoided_ratio"] = round(stats["reused"] / frames, 3) if frames else None
+        if stats["region_runs"]:
+            stats["region_area"] = round(stats["region_area"] / stats["region_runs"], 3)
+        return stats
+
+
+motion_gate = MotionGate()
@@ -0,0 +1,56 @@
+# app/feed/preprocess.py
+"""Decoding uploaded images at no more resolution than the model will use.
+
+Phones upload 12 MP photos, but the detector letterboxes every frame down
+to at most max(DETECTOR_SIZES) pixels on its long side. decode_image()
+reads the header first and asks OpenCV for a reduced decode
+(IMREAD_REDUCED_COLOR_2/4/8), which for JPEGs scales in the DCT domain and
+skips most of the decode and resize work. The detector maps boxes on the
+reduced frame back to the uploaded image's pixels with the returned scale.
+"""
+from io import BytesIO
+import cv2
+import numpy as np
+from PIL import Image
+
+_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+# EXIF orientations that rotate by 90 degrees, which OpenCV applies on decode
+_TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+def image_size(data):
+    """(width, height) of encoded image bytes as displayed, from the header only"""
+    try:
+        with Image.open(BytesIO(data)) as image:
+            width, height = image.size
+            orientation = image.getexif().get(0x0112, 1)
+    except OSError as e:
+        raise ValueError("Unsupported image") from e
+    if orientation in _TRANSPOSED_ORIENTATIONS:
+        return height, width
+    return width, height
+
+
+def decode_image(data, target_size):
+    """Decode image bytes to BGR, reduced while the long side stays >= target_size
+
+    A target_size of None decodes at full resolution, as tiled inference
+    needs. Returns (frame, scale, (width, height)) where scale maps frame
+    pixels back to the original image of that size.
+    """
+    width, height = image_size(data)
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    flag = cv2.IMREAD_COLOR
+    for factor, reduced_flag in _REDUCED_FLAGS:
+        if target_size is not None and max(width, height) // factor >= target_size:
+            flag = reduced_flag
+            break
+    frame = cv2.imdecode(buffer, flag)
+    if frame is None:
+        raise ValueError("Unsupported image")
+    return frame, width / frame.shape[1], (width, height)
+
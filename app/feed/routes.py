@@ -1,161 +1,23 @@
 from flask import Blueprint, request, jsonify, current_app
-import os
-import numpy as np
+from flask_login import current_user, login_required
 import base64
-import json
-from io import BytesIO
-from PIL import Image
 import traceback
-import cv2
-
-# Import YOLO from Ultralytics
-try:
-    from ultralytics import YOLO
-except ImportError:
-    current_app.logger.error(
-        "Could not import ultralytics YOLO. Make sure it's installed"
-    )
+from ..auth.tokens import token_farm_ids
+from ..farm.density import weed_density
+from .detector import DetectionFailed, get_detector
+from .frame_cache import detection_cache
+from .motion import MAX_MOTION_TILES, motion_gate
+from .preprocess import decode_image
 
 feed_bp = Blueprint("feed", __name__, url_prefix="/feed")
 
 
-class YoloDetector:
-    """
-    Utility class for YOLO model integration for maize/weed detection.
-    Uses the actual YOLOv8 model for inference.
-    """
-
-    def __init__(self, model_path=None):
-        """Initialize the detector with the given model path"""
-        if model_path is None:
-            # Default model path
-            model_path = os.path.join(
-                current_app.root_path, "utils", "maize_weed_detection.pt"
-            )
-
-        self.model_path = model_path
-        self.model = None
-        self.is_loaded = False
-        self.class_names = ["maize", "weed"]
-
-        current_app.logger.info(
-            f"Initializing YOLO detector with model at: {model_path}"
-        )
-        self.load_model()
-
-    def load_model(self):
-        """Load the YOLO model"""
-        try:
-            # Load the actual YOLOv8 model
-            self.model = YOLO(self.model_path)
-
-            self.is_loaded = True
-            current_app.logger.info("YOLO model loaded successfully")
-            return True
-        except Exception as e:
-            current_app.logger.error(f"Error loading YOLO model: {str(e)}")
-            traceback.print_exc()
-            return False
-
-    def detect(self, image_data):
-        """
-        Detect objects in the image
-
-        Args:
-            image_data: Image data (PIL Image or numpy array)
-
-        Returns:
-            List of detections with format:
-            [
-                {
-                    'class': 'class_name',
-                    'confidence': float,
-                    'bbox': [x, y, width, height]
-                },
-                ...
-            ]
-        """
-        if not self.is_loaded:
-            self.load_model()
-
-        if not self.is_loaded:
-            current_app.logger.error("Failed to load model, cannot perform detection")
-            return []
-
-        try:
-            # Ensure we have numpy array for detection
-            if isinstance(image_data, Image.Image):
-                # Convert PIL Image to numpy array (RGB)
-                img_np = np.array(image_data)
-                # Convert to BGR for OpenCV
-                img_np = cv2.cvtColor(img_np, cv2.COLOR_RGB2BGR)
-            else:
-                img_np = image_data
-
-            # Run inference using YOLOv8
-            results = self.model(img_np)
-
-            # Process results to the expected format
-            detections = self._process_results(results)
-
-            return detections
-
-        except Exception as e:
-            current_app.logger.error(f"Error in YOLO detection: {str(e)}")
-            traceback.print_exc()
-            return []
-
-    def _process_results(self, results):
-        """
-        Process results from the YOLOv8 model
-
-        Args:
-            results: Results from YOLOv8 model.predict()
-
-        Returns:
-            List of detection objects in standard format
-        """
-        detections = []
-
-        # Extract the first result (batch size is 1)
-        result = results[0]
-
-        # Get the boxes, confidence scores, and class IDs
-        boxes = result.boxes.xyxy.cpu().numpy()  # x1, y1, x2, y2 format
-        confs = result.boxes.conf.cpu().numpy()
-        cls_ids = result.boxes.cls.cpu().numpy().astype(int)
-
-        # Convert to our detection format
-        for i, box in enumerate(boxes):
-            x1, y1, x2, y2 = box
-
-            # Convert to top-left corner and width/height format
-            x = int(x1)
-            y = int(y1)
-            width = int(x2 - x1)
-            height = int(y2 - y1)
-
-            conf = float(confs[i])
-            cls_id = int(cls_ids[i])
-
-            # Ensure class_id is within range
-            if cls_id < len(self.class_names):
-                cls_name = self.class_names[cls_id]
-            else:
-                cls_name = f"unknown_{cls_id}"
-
-            detections.append(
-                {"class": cls_name, "confidence": conf, "bbox": [x, y, width, height]}
-            )
-
-        return detections
-
-
-# Create a global detector instance
-detector = YoloDetector()
+def _bad_request(message):
+    return jsonify({"success": False, "error": message, "detections": []}), 400
 
 
 @feed_bp.route("/detect", methods=["POST"])
+@login_required
 def detect_objects():
     """API endpoint for YOLO object detection"""
     try:
@@ -169,28 +31,79 @@ def detect_objects():
 
                 # Decode base64 to image
                 image_data = base64.b64decode(base64_data)
-                image = Image.open(BytesIO(image_data))
             else:
-                return (
-                    jsonify(
-                        {
-                            "success": False,
-                            "error": "No image provided",
-                            "detections": [],
-                        }
-                    ),
-                    400,
-                )
+                return _bad_request("No image provided")
         else:
             # Get image file
-            image_file = request.files["image"]
-            image = Image.open(image_file)
+            image_data = request.files["image"].read()
+
+        sizes = current_app.config["DETECTOR_SIZES"]
+        imgsz = request.form.get("imgsz", type=int)
+        if imgsz is not None and imgsz not in sizes:
+            return _bad_request(f"imgsz must be one of {sizes}")
+        # Full-resolution photos where small weeds matter (see tiling.py)
+        tiled = request.form.get("tiled", "").lower() in ("1", "true", "on")
+        stream_id = request.form.get("stream_id", "")[:64] or None
+        motion_threshold = request.form.get("motion_threshold", type=float)
+        if motion_threshold is not None and not 0 <= motion_threshold <= 1:
+            return _bad_request("motion_threshold must be between 0 and 1")
+        motion_tiles = request.form.get("motion_tiles", type=int)
+        if motion_tiles is not None and not 0 <= motion_tiles <= MAX_MOTION_TILES:
+            return _bad_request(f"motion_tiles must be between 0 and {MAX_MOTION_TILES}")
+        # Where the frame was taken, for the field's weed-density heatmap (see density.py)
+        field_id = request.form.get("field_id", type=int)
+        if field_id is not None:
+            latitude = request.form.get("latitude", type=float)
+            longitude = request.form.get("longitude", type=float)
+            if latitude is None or longitude is None:
+                return _bad_request("field_id needs latitude and longitude")
+            owner = weed_density.owner(field_id)
+            farm_ids = token_farm_ids()
+            if (
+                owner is None
+                or owner[0] != current_user.id
+                or (farm_ids is not None and owner[1] not in farm_ids)
+            ):
+                return _bad_request("Unknown field")
+
+        # Decode no larger than the model will look at (see preprocess.py)
+        try:
+            target_size = None if tiled else imgsz or max(sizes)
+            frame, scale, size = decode_image(image_data, target_size)
+        except ValueError as e:
+            return _bad_request(str(e))
+
+        def run(image):
+            # Perform detection with the model this worker shares (see detector.py),
+            # unless this camera just sent a near-identical image (see frame_cache.py)
+            return detection_cache.detect(
+                (current_user.id, imgsz, tiled, size, image.shape),
+                image,
+                lambda: get_detector().detect(
+                    image, imgsz=imgsz, scale=scale, tiled=tiled
+                ),
+            )
 
-        # Perform detection with actual model
-        detections = detector.detect(image)
+        if stream_id is None:
+            detections = run(frame)
+        else:
+            # Only run the model on what changed since this stream's last run (see motion.py)
+            detections = motion_gate.detect(
+                (current_user.id, stream_id),
+                frame,
+                scale,
+                run,
+                threshold=motion_threshold,
+                tiles=motion_tiles,
+            )
+        if field_id is not None:
+            weed_density.record(field_id, latitude, longitude, detections)
 
         return jsonify({"success": True, "detections": detections})
 
+    except DetectionFailed as e:
+        # Nothing was cached, reused or counted for this frame; the client retries
+        return jsonify({"success": False, "error": str(e), "detections": []}), 503
     except Exception as e:
         current_app.logger.error(f"Error in detect endpoint: {str(e)}")
         traceback.print_exc()
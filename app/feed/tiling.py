@@ -0,0 +1,94 @@
+# app/feed/tiling.py
+"""Tiled inference for high-resolution field and drone photos.
+
+Letterboxing a 4000x3000 photo into a 640 model input shrinks it six
+times, and weed seedlings a few dozen pixels across disappear. In tiled
+mode the image is cut into DETECTOR_TILE_SIZE squares overlapping by
+DETECTOR_TILE_OVERLAP of their size, so every object smaller than the
+overlap lies whole in at least one tile, and each tile is inferred at
+its own resolution. The whole image is inferred alongside the tiles so
+plants larger than a tile are still found. Everything goes through the
+backend in batches of DETECTOR_TILE_BATCH.
+
+Boxes are shifted back to image coordinates and merged with one
+class-aware NMS pass over intersection-over-smaller, which also drops
+the pieces of an object cut off at a tile edge.
+"""
+import numpy as np
+
+# Boxes of one class covering more than this share of the smaller one are merged
+SEAM_OVERLAP = 0.6
+
+
+def nms(boxes, scores, threshold, class_ids=None, metric="iou"):
+    """Indices of the xyxy boxes kept by greedy non-maximum suppression, best first
+
+    Each kept box suppresses the remaining ones that overlap it by more than
+    threshold, computed against all of them at once. With class_ids, boxes
+    only suppress boxes of their own class. metric "ios" divides the
+    intersection by the smaller box instead of the union, so a box cut off
+    at a tile edge is suppressed by the whole one.
+    """
+    if not len(boxes):
+        return np.zeros(0, dtype=int)
+    boxes = np.asarray(boxes, dtype=np.float64)
+    if class_ids is not None:
+        # Shift each class into its own region so classes never overlap
+        offset = boxes.max() - boxes.min() + 1
+        boxes = boxes + (np.asarray(class_ids) * offset)[:, None]
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = np.argsort(-np.asarray(scores), kind="stable")
+    keep = []
+    while order.size:
+        best, rest = order[0], order[1:]
+        keep.append(best)
+        width = np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest])
+        height = np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest])
+        inter = width.clip(0) * height.clip(0)
+        if metric == "ios":
+            denominator = np.minimum(areas[best], areas[rest])
+        else:
+            denominator = areas[best] + areas[rest] - inter
+        overlap = inter / np.maximum(denominator, 1e-9)
+        order = rest[overlap <= threshold]
+    return np.array(keep, dtype=int)
+
+
+def _starts(length, size, stride):
+    if length <= size:
+        return [0]
+    starts = list(range(0, length - size, stride))
+    # The last tile ends on the image edge instead of running past it
+    return starts + [length - size]
+
+
+def tile_windows(width, height, size, overlap=0.2):
+    """(x, y) of the top-left corner of each size x size tile covering the image"""
+    stride = max(1, round(size * (1 - overlap)))
+    return [
+        (x, y)
+        for y in _starts(height, size, stride)
+        for x in _starts(width, size, stride)
+    ]
+
+
+def predict_tiled(backend, frame, size, overlap=0.2, batch=8):
+    """Backend predictions for frame from overlapping tiles, merged across seams"""
+    height, width = frame.shape[:2]
+    windows = tile_windows(width, height, size, overlap)
+    if len(windows) == 1:
+        return backend.predict(frame, size)
+    images = [frame[y : y + size, x : x + size] for x, y in windows] + [frame]
+    offsets = windows + [(0, 0)]
+
+    results = []
+    for start in range(0, len(images), batch):
+        results += backend.predict_batch(images[start : start + batch], size)
+    boxes = np.concatenate(
+        [r[0] + [x, y, x, y] for r, (x, y) in zip(results, offsets)]
+    ).reshape(-1, 4)
+    scores = np.concatenate([r[1] for r in results])
+    class_ids = np.concatenate([r[2] for r in results]).astype(int)
+    keep = nms(boxes, scores, SEAM_OVERLAP, class_ids, metric="ios")
+    return boxes[keep], scores[keep], class_ids[keep]
@@ -12,21 +12,20 @@ def index():
     """Home page"""
     if current_user.is_authenticated:
         # Check if user has registered a farm
-        has_farm = Farm.query.filter_by(user_id=current_user.id).first() is not None
-        if not has_farm:
-            return redirect(url_for("farm.register_farm"))
-
         farms = Farm.query.filter_by(user_id=current_user.id).all()
+        if not farms:
+            return redirect(url_for("farm.register_farm"))
 
-        # Get recent alerts for notification count
+        # Get the most recent unread alerts for the notification dropdown
         alerts = (
             Alert.query.filter_by(user_id=current_user.id, is_read=False)
             .order_by(Alert.created_at.desc())
+            .limit(5)
             .all()
         )
 
-        # Count unread alerts for notification badge
-        unread_count = len(alerts)
+        # Notification badge reads the maintained counter instead of counting rows
+        unread_count = current_user.unread_alert_count
 
         # Field health data
         field_health = {
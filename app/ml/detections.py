@@ -0,0 +1,123 @@
+# app/ml/detections.py
+"""Storing and querying detector results for farm images.
+
+Each processed image gets one ImageDetection row: weed_count, maize_count
+and max_conf for filtering and aggregates, in an index on (farm_id,
+captured_at) that covers them, plus optionally every box packed into an 11-byte
+record (class id, float16 confidence, uint16 x/y/width/height) instead of
+a JSON list. FarmImage.processing_results keeps the rest of the analysis.
+"""
+from datetime import datetime
+import numpy as np
+from .. import db
+from ..farm.models import ImageDetection
+from ..feed.detector import CLASS_NAMES
+
+BOX_DTYPE = np.dtype([
+    ('class_id', 'u1'),
+    ('confidence', '<f2'),
+    ('x', '<u2'),
+    ('y', '<u2'),
+    ('width', '<u2'),
+    ('height', '<u2'),
+])
+_COORD_MAX = np.iinfo(np.uint16).max
+
+
+def pack_boxes(detections, class_names=CLASS_NAMES):
+    """Detections in the /feed/detect format as packed BOX_DTYPE bytes"""
+    records = np.zeros(len(detections), dtype=BOX_DTYPE)
+    if detections:
+        bboxes = np.clip([d['bbox'] for d in detections], 0, _COORD_MAX)
+        records['class_id'] = [class_names.index(d['class']) for d in detections]
+        records['confidence'] = [d['confidence'] for d in detections]
+        for i, name in enumerate(('x', 'y', 'width', 'height')):
+            records[name] = bboxes[:, i]
+    return records.tobytes()
+
+
+def unpack_boxes(data, class_names=CLASS_NAMES):
+    """Detections in the /feed/detect format from pack_boxes() bytes"""
+    records = np.frombuffer(data or b'', dtype=BOX_DTYPE)
+    return [
+        {
+            'class': class_names[record['class_id']],
+            'confidence': round(float(record['confidence']), 3),
+            'bbox': [int(record['x']), int(record['y']), int(record['width']), int(record['height'])],
+        }
+        for record in records
+    ]
+
+
+def summarize(detections):
+    """Summary columns of ImageDetection for a list of detections"""
+    classes = [detection['class'] for detection in detections]
+    return {
+        'weed_count': classes.count('weed'),
+        'maize_count': classes.count('maize'),
+        'max_conf': max((d['confidence'] for d in detections), default=None),
+    }
+
+
+def store_detections(image, detections, keep_boxes=True):
+    """Record an image's detections, replacing any earlier ones; caller commits"""
+    known = [d for d in detections if d['class'] in CLASS_NAMES]
+    row = db.session.get(ImageDetection, image.id) or ImageDetection(image_id=image.id)
+    row.farm_id = image.farm_id
+    row.captured_at = image.upload_date or datetime.utcnow()
+    row.boxes = pack_boxes(known) if keep_boxes else None
+    for column, value in summarize(known).items():
+        setattr(row, column, value)
+    db.session.add(row)
+    return row
+
+
+def copy_detections(source, image):
+    """Record source's ImageDetection for another image of the same file; caller commits"""
+    row = db.session.get(ImageDetection, image.id) or ImageDetection(image_id=image.id)
+    row.farm_id = image.farm_id
+    row.captured_at = image.upload_date or datetime.utcnow()
+    for column in ('weed_count', 'maize_count', 'max_conf', 'boxes'):
+        setattr(row, column, getattr(source, column))
+    db.session.add(row)
+    return row
+
+
+def detections_with_weeds(farm_id, min_weeds=1, since=None, until=None):
+    """Query of ImageDetection rows of the farm's images with at least min_weeds weeds
+
+    Ordered by captured_at, the rows come straight off the covering index;
+    each row's .image is the FarmImage.
+    """
+    query = ImageDetection.query.filter(
+        ImageDetection.farm_id == farm_id, ImageDetection.weed_count >= min_weeds
+    )
+    if since is not None:
+        query = query.filter(ImageDetection.captured_at >= since)
+    if until is not None:
+        query = query.filter(ImageDetection.captured_at < until)
+    return query
+
+
+def detection_summary(farm_id, since=None, min_weeds=1):
+    """Totals over the farm's processed images, computed from the summary columns"""
+    weedy = db.func.sum(db.case((ImageDetection.weed_count >= min_weeds, 1), else_=0))
+    query = db.select(
+        db.func.count(),
+        db.func.coalesce(weedy, 0),
+        db.func.coalesce(db.func.sum(ImageDetection.weed_count), 0),
+        db.func.coalesce(db.func.sum(ImageDetection.maize_count), 0),
+        db.func.max(ImageDetection.weed_count),
+        db.func.max(ImageDetection.max_conf),
+    ).where(ImageDetection.farm_id == farm_id)
+    if since is not None:
+        query = query.where(ImageDetection.captured_at >= since)
+    images, weedy_images, weeds, maize, max_weeds, max_conf = db.session.execute(query).one()
+    return {
+        'images': images,
+        'images_with_weeds': weedy_images,
+        'weed_count': weeds,
+        'maize_count': maize,
+        'max_weeds_per_image': max_weeds or 0,
+        'max_conf': max_conf,
+    }
@@ -4,8 +4,17 @@ import json
 import threading
 import time
 from datetime import datetime
+from flask import current_app
 from .. import db
-from ..farm.models import FarmImage, Alert
+from ..farm.models import FarmImage, FarmVideo, Alert
+from ..feed.detector import DetectionFailed, get_detector
+from ..feed.preprocess import decode_image
+from ..farm.storage import image_path
+from ..feed.video import analyze_video
+from .detections import copy_detections, store_detections
+
+# Image types the maize/weed detector runs on
+DETECTED_IMAGE_TYPES = ('crop',)
 
 def process_farm_image(image_id):
     """
@@ -14,24 +23,71 @@ def process_farm_image(image_id):
     In a real implementation, this would use TensorFlow/PyTorch
     """
     # Run processing in background thread to not block web request
-    thread = threading.Thread(target=_process_image_thread, args=(image_id,))
+    app = current_app._get_current_object()
+    thread = threading.Thread(target=_process_image_thread, args=(app, image_id))
     thread.daemon = True  # Allow app to exit even if thread is running
     thread.start()
 
-def _process_image_thread(image_id):
+def _process_image_thread(app, image_id):
     """Background thread for image processing"""
     # Simulate processing delay
     time.sleep(3)
-    
+
+    with app.app_context():
+        _process_image(app, image_id)
+
+def _process_image(app, image_id):
+    """Analyse one uploaded image and store the results (needs an app context)"""
     # Get image from database
-    farm_image = FarmImage.query.get(image_id)
-    if farm_image is None:
+    farm_image = db.session.get(FarmImage, image_id)
+    if farm_image is None or farm_image.processed:
+        return
+
+    # A copy of the same file may have been processed since the upload
+    if reuse_processing_results(farm_image):
+        db.session.commit()
         return
     
     # Placeholder for ML model processing
     # In a real implementation, this would load the image and run inference
     results = _mock_ml_analysis(farm_image)
+
+    # Detections go to their own indexed table (see detections.py), not the JSON
+    detections = _detect(app, farm_image)
+    if detections is not None:
+        summary = store_detections(farm_image, detections)
+        results.update({'weed_count': summary.weed_count, 'maize_count': summary.maize_count})
     
+    _save_results(farm_image, results)
+    db.session.commit()
+
+def reuse_processing_results(farm_image):
+    """
+    Give farm_image the results of an earlier processed image of the same file
+    Only the uploader's own images are reused, so no results or image ids
+    cross between users. Returns False when there is none; the caller commits
+    """
+    if not farm_image.content_hash:
+        return False
+    original = FarmImage.query.filter(
+        FarmImage.content_hash == farm_image.content_hash,
+        FarmImage.image_type == farm_image.image_type,
+        FarmImage.user_id == farm_image.user_id,
+        FarmImage.processed.is_(True),
+        FarmImage.id != farm_image.id
+    ).order_by(FarmImage.id).first()
+    if original is None:
+        return False
+
+    results = json.loads(original.processing_results or '{}')
+    results['reused_from'] = original.id
+    if original.detection is not None:
+        copy_detections(original.detection, farm_image)
+    _save_results(farm_image, results)
+    return True
+
+def _save_results(farm_image, results):
+    """Mark farm_image processed with results, raising the alert they call for"""
     # Update database with results
     farm_image.processed = True
     farm_image.processing_results = json.dumps(results)
@@ -46,7 +102,56 @@ def _process_image_thread(image_id):
             user_id=farm_image.user_id
         )
         db.session.add(alert)
-    
+
+def _detect(app, farm_image):
+    """Maize/weed detections for the image's file, or None if it wasn't run"""
+    if farm_image.image_type not in DETECTED_IMAGE_TYPES or not farm_image.filename:
+        return None
+    detector = get_detector(app)
+    if hasattr(detector, 'load_model') and not detector.load_model():
+        return None
+    file_path = image_path(farm_image.filename)
+    try:
+        with open(file_path, 'rb') as f:
+            frame, scale, _ = decode_image(f.read(), max(app.config['DETECTOR_SIZES']))
+    except (OSError, ValueError):
+        return None
+    try:
+        return detector.detect(frame, scale=scale)
+    except DetectionFailed:
+        return None
+
+def process_farm_video(video_id):
+    """Run the detector over a completely uploaded video in a background thread"""
+    app = current_app._get_current_object()
+    thread = threading.Thread(target=_process_video_thread, args=(app, video_id))
+    thread.daemon = True
+    thread.start()
+
+def _process_video_thread(app, video_id):
+    with app.app_context():
+        _process_video(app, video_id)
+
+def _process_video(app, video_id):
+    """Analyse one uploaded video and store the results (needs an app context)"""
+    video = db.session.get(FarmVideo, video_id)
+    if video is None or video.status != 'processing':
+        return
+
+    detector = get_detector(app)
+    path = os.path.join(app.root_path, app.config['UPLOAD_FOLDER'], video.path)
+    try:
+        if hasattr(detector, 'load_model') and not detector.load_model():
+            raise RuntimeError('Detector unavailable')
+        results = analyze_video(detector, path, app.config['VIDEO_SAMPLE_FPS'])
+        video.status = 'processed'
+    except Exception as e:
+        app.logger.exception(f'Error analysing video {video.upload_id}')
+        results = {'error': str(e)}
+        video.status = 'failed'
+    results['processed_date'] = datetime.utcnow().isoformat()
+    video.processing_results = json.dumps(results)
+    video.updated_at = datetime.utcnow()
     db.session.commit()
 
 def _mock_ml_analysis(farm_image):
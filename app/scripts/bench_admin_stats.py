@@ -0,0 +1,84 @@
+# app/scripts/bench_admin_stats.py
+"""Benchmark the admin statistics at production-like table sizes.
+
+Usage: python -m app.scripts.bench_admin_stats [SENSOR_ROWS]
+
+Seeds 10k users and farms, 100k images and SENSOR_ROWS sensor readings
+(default 1M), then compares the old per-statistic queries with the single
+aggregate query and with reading the cached snapshot.
+"""
+
+import sys
+from datetime import datetime
+
+from app import db
+from app.auth.models import User
+from app.farm.models import Farm, FarmImage, SensorData
+from app.admin.models import StatsSnapshot
+from app.scripts.bench_common import bench_app, measure, report
+
+USERS = 10_000
+IMAGES = 100_000
+SENSOR_TYPES = ['soil_moisture', 'temperature', 'humidity', 'ph', 'nitrogen']
+
+
+def insert_batches(model, count, make_row, batch=50_000):
+    for start in range(0, count, batch):
+        db.session.execute(db.insert(model), [make_row(i) for i in range(start, min(start + batch, count))])
+        db.session.commit()
+
+
+def seed(sensor_rows):
+    now = datetime.utcnow()
+    insert_batches(User, USERS, lambda i: {
+        'email': f'user{i}@example.com', 'username': f'user{i}', 'password_hash': 'x',
+        'first_name': 'Bench', 'last_name': 'User', 'phone_number': '0700000000',
+        'user_type': 'small-scale', 'region': 'nairobi', 'is_approved': i % 20 != 0,
+        'created_at': now, 'unread_alert_count': 0,
+    })
+    insert_batches(Farm, USERS, lambda i: {
+        'name': f'Farm {i}', 'location': 'Nairobi', 'size': 10.0, 'size_acres': float(i % 50),
+        'crop_type': 'Corn', 'user_id': i + 1, 'created_at': now, 'unread_alert_count': 0,
+    })
+    insert_batches(FarmImage, IMAGES, lambda i: {
+        'farm_id': i % USERS + 1, 'image_url': f'/img/{i}.jpg', 'upload_date': now,
+    })
+    insert_batches(SensorData, sensor_rows, lambda i: {
+        'sensor_id': 1, 'value': 1.0, 'timestamp': now, 'farm_id': i % USERS + 1,
+        'sensor_type': SENSOR_TYPES[i % len(SENSOR_TYPES)],
+    })
+
+
+def separate_queries():
+    """The statistics as admin.dashboard and admin.summary used to compute them"""
+    return {
+        'total_users': User.query.count(),
+        'pending_users': User.query.filter_by(is_approved=False).count(),
+        'total_farms': Farm.query.count(),
+        'avg_farm_size': db.session.query(db.func.avg(Farm.size_acres)).scalar() or 0,
+        'total_images': FarmImage.query.count(),
+        'sensor_types': SensorData.query.distinct(SensorData.sensor_type).count(),
+    }
+
+
+def main():
+    sensor_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    app = bench_app()
+    with app.app_context():
+        seed(sensor_rows)
+        print(f'{USERS} users/farms, {IMAGES} images, {sensor_rows} sensor readings')
+        print('single query ->', StatsSnapshot.collect())
+
+        report('separate queries (old)', measure(separate_queries, repeat=10, warmup=1))
+        report('single aggregate query', measure(StatsSnapshot.collect, repeat=10, warmup=1))
+        StatsSnapshot.refresh()
+
+        def cached():
+            db.session.expire_all()
+            return StatsSnapshot.current()
+
+        report('cached snapshot (within TTL)', measure(cached))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# app/scripts/bench_asgi.py
+"""Requests/sec of the WSGI and ASGI entry points against a slow upstream.
+
+A local stub stands in for OpenWeather and answers every request after
+UPSTREAM_DELAY seconds. The same app is served once by gunicorn (one
+gthread worker with THREADS threads, run:app) and once by uvicorn (one
+worker, asgi:application with ASGI_THREADS=THREADS). CONCURRENCY clients
+then fetch each endpoint REQUESTS times. Needs gunicorn, uvicorn and httpx.
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from app.scripts.bench_common import (bench_app, make_user, make_farm, session_cookie, free_port,
+                                      wait_for_port, start_weather_stub)
+
+UPSTREAM_DELAY = 0.3
+THREADS = 8
+CONCURRENCY = 64
+REQUESTS = 320
+ENDPOINTS = ('/weather/api/forecast/Nairobi', '/api/dashboard-data')
+
+
+def seed(env):
+    """Create the database and return a session cookie for its user"""
+    os.environ.update(env)
+    from app import db
+
+    app = bench_app()
+    with app.app_context():
+        user = make_user(db)
+        farm = make_farm(db, user)
+        farm.location = '-1.2864,36.8172'
+        db.session.commit()
+        return session_cookie(app, user.id)
+
+
+async def load(port, path, cookie):
+    latencies = []
+    queue = asyncio.Queue()
+    for _ in range(REQUESTS):
+        queue.put_nowait(None)
+    limits = httpx.Limits(max_connections=CONCURRENCY)
+    async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', limits=limits,
+                                 cookies={'session': cookie}, timeout=60) as client:
+
+        async def worker():
+            while not queue.empty():
+                queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.get(path)
+                assert response.status_code == 200, (path, response.status_code)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    return REQUESTS / elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+
+
+def main():
+    upstream, upstream_url = start_weather_stub(UPSTREAM_DELAY)
+
+    fd, db_path = tempfile.mkstemp(suffix='.sqlite', prefix='farmeye-bench-')
+    os.close(fd)
+    env = dict(
+        os.environ,
+        FLASK_CONFIG='testing',
+        TEST_DATABASE_URL='sqlite:///' + db_path,
+        OPENWEATHER_BASE_URL=upstream_url,
+        OPENWEATHER_API_KEY='bench',
+        ASGI_THREADS=str(THREADS),
+    )
+    cookie = seed(env)
+
+    port = free_port()
+    servers = {
+        f'gunicorn gthread x{THREADS}': [
+            sys.executable, '-m', 'gunicorn', '-w', '1', '-k', 'gthread', '--threads', str(THREADS),
+            '-b', f'127.0.0.1:{port}', 'run:app'],
+        f'uvicorn asgi, {THREADS} threads': [
+            sys.executable, '-m', 'uvicorn', '--workers', '1', '--port', str(port),
+            '--log-level', 'warning', 'asgi:application'],
+    }
+    print(f'upstream delay {UPSTREAM_DELAY * 1000:.0f} ms, {CONCURRENCY} concurrent clients')
+    for label, command in servers.items():
+        server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL)
+        try:
+            wait_for_port(port)
+            for path in ENDPOINTS:
+                rps, p50, p99 = asyncio.run(load(port, path, cookie))
+                print(f'{label:<26} {path:<32} {rps:7.1f} req/s  p50={p50:8.1f} ms  p99={p99:8.1f} ms')
+        finally:
+            server.terminate()
+            server.wait()
+    upstream.shutdown()
+    os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
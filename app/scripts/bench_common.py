@@ -0,0 +1,190 @@
+# app/scripts/bench_common.py
+"""Shared helpers for the benchmark scripts in this directory.
+
+Every benchmark runs against a throwaway SQLite database so it never touches
+dev.sqlite. Run them from the project root, e.g.
+
+    python -m app.scripts.bench_unread_alerts
+"""
+
+import json
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def bench_app(config_name='testing'):
+    """Create an app bound to a fresh temporary SQLite database"""
+    if 'TEST_DATABASE_URL' not in os.environ:
+        fd, path = tempfile.mkstemp(suffix='.sqlite', prefix='farmeye-bench-')
+        os.close(fd)
+        os.environ['TEST_DATABASE_URL'] = 'sqlite:///' + path
+
+    from app import create_app, db
+    from app.config import config
+
+    # The config classes may have been evaluated before the variable was set
+    config[config_name].SQLALCHEMY_DATABASE_URI = os.environ['TEST_DATABASE_URL']
+    app = create_app(config_name)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+def make_user(db, email='bench@example.com', **kwargs):
+    """Insert an approved user with a cheap password hash"""
+    from app.auth.models import User
+
+    user = User(
+        email=email,
+        username=kwargs.pop('username', email.split('@')[0]),
+        first_name='Bench',
+        last_name='User',
+        phone_number='0700000000',
+        is_approved=True,
+        password_hash=kwargs.pop('password_hash', 'x'),
+        **kwargs
+    )
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def make_farm(db, user, name='Bench Farm'):
+    """Insert a farm owned by user"""
+    from app.farm.models import Farm
+
+    farm = Farm(name=name, location='Nairobi', size=10.0, size_acres=10.0,
+                crop_type='Corn', user_id=user.id)
+    db.session.add(farm)
+    db.session.commit()
+    return farm
+
+
+def login_client(app, user_id):
+    """Return a test client whose session is logged in as the given user id"""
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+    return client
+
+
+def count_queries(engine, client, path, **kwargs):
+    """Number of SQL statements executed while the client GETs path"""
+    from app import db
+
+    statements = []
+
+    def before_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    db.event.listen(engine, 'before_cursor_execute', before_execute)
+    try:
+        client.get(path, **kwargs)
+    finally:
+        db.event.remove(engine, 'before_cursor_execute', before_execute)
+    return len(statements)
+
+
+def measure(fn, repeat=200, warmup=5):
+    """Call fn repeatedly and return latency statistics in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'n': repeat,
+        'mean': statistics.fmean(samples),
+        'p50': samples[len(samples) // 2],
+        'p99': samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+def report(label, stats):
+    """Print one line of latency statistics"""
+    print(f"{label:<45} n={stats['n']:<6} mean={stats['mean']:8.3f} ms  "
+          f"p50={stats['p50']:8.3f} ms  p99={stats['p99']:8.3f} ms")
+
+
+def session_cookie(app, user_id):
+    """Signed session cookie value that logs a real HTTP client in as user_id"""
+    session = {'_user_id': str(user_id), '_fresh': True}
+    return app.session_interface.get_signing_serializer(app).dumps(session)
+
+
+def free_port():
+    """An unused local TCP port"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    """Block until something accepts connections on the local port"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server on port {port} did not start')
+
+
+def _weather_item(dt):
+    return {
+        'dt': dt,
+        'main': {'temp': 24.0, 'feels_like': 25.0, 'temp_min': 18.0, 'temp_max': 27.0,
+                 'humidity': 60, 'pressure': 1012},
+        'wind': {'speed': 3.2, 'deg': 140},
+        'clouds': {'all': 20},
+        'weather': [{'main': 'Clouds', 'description': 'few clouds', 'icon': '02d'}],
+        'pop': 0.1,
+    }
+
+
+def _weather_payload(path):
+    now = int(time.time())
+    if path.endswith('/weather'):
+        return dict(_weather_item(now), sys={'sunrise': now - 3600, 'sunset': now + 3600})
+    if path.endswith('/forecast'):
+        return {'list': [_weather_item(now + i * 10800) for i in range(40)]}
+    return {'current': {'temp': 24.0, 'weather': [{'main': 'Clouds', 'icon': '02d'}]},
+            'daily': [{}, {'rain': 1.2}]}
+
+
+class _UpstreamServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def start_weather_stub(delay=0.0):
+    """Serve canned OpenWeather responses after delay seconds; returns (server, base_url)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            body = json.dumps(_weather_payload(self.path.split('?')[0])).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    port = free_port()
+    server = _UpstreamServer(('127.0.0.1', port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{port}'
@@ -0,0 +1,84 @@
+# app/scripts/bench_conditional_get.py
+"""Measure what conditional GETs save on the polled JSON endpoints.
+
+Each endpoint is polled the way the dashboard does it, once with plain GETs
+and once revalidating with If-None-Match, and the response bytes and server
+CPU time per poll are reported. A new sensor reading is inserted every
+CHANGE_EVERY polls so a share of revalidations still return a full body.
+/weather/api/forecast/<location> is left out because it calls the live
+weather API.
+"""
+
+import time
+from app import db
+from app.farm.models import Alert, BoundaryMarker, Field, Sensor, SensorData
+from app.scripts.bench_common import bench_app, make_user, make_farm, login_client
+
+PATHS = ('/api/dashboard-data', '/farm/get_farms', '/api/user-profile')
+POLLS = 300
+CHANGE_EVERY = 20
+
+
+def reading(sensor, value):
+    return SensorData(sensor_id=sensor.id, farm_id=sensor.farm_id, sensor_type=sensor.sensor_type,
+                      value=value, unit='%')
+
+
+def seed(user):
+    farm = make_farm(db, user)
+    sensor = Sensor(farm_id=farm.id, sensor_type='soil_moisture', location='Field 0')
+    db.session.add(sensor)
+    db.session.flush()
+    for i in range(3):
+        field = Field(name=f'Field {i}', farm_id=farm.id)
+        db.session.add(field)
+        db.session.flush()
+        for j in range(8):
+            db.session.add(BoundaryMarker(field_id=field.id, latitude=-1.28 + j / 1000,
+                                          longitude=36.8 + j / 1000))
+    for i in range(50):
+        db.session.add(reading(sensor, 60 + i % 5))
+        db.session.add(Alert(farm_id=farm.id, user_id=user.id, alert_type='pest',
+                             message=f'Alert {i}', severity='medium'))
+    db.session.commit()
+    return sensor.id
+
+
+def poll(app, client, path, sensor_id, revalidate):
+    etag = None
+    sent = not_modified = 0
+    cpu = time.process_time()
+    for i in range(POLLS):
+        if i and i % CHANGE_EVERY == 0:
+            with app.app_context():
+                db.session.add(reading(db.session.get(Sensor, sensor_id), 58))
+                db.session.commit()
+        headers = {'If-None-Match': etag} if revalidate and etag else {}
+        response = client.get(path, headers=headers)
+        assert response.status_code in (200, 304), (path, response.status_code)
+        if response.status_code == 304:
+            not_modified += 1
+        else:
+            etag = response.headers.get('ETag')
+        sent += len(response.get_data())
+    return sent, (time.process_time() - cpu) * 1000, not_modified
+
+
+def main():
+    app = bench_app()
+    with app.app_context():
+        user = make_user(db)
+        user_id = user.id
+        sensor_id = seed(user)
+
+    client = login_client(app, user_id)
+    for path in PATHS:
+        for revalidate in (False, True):
+            sent, cpu_ms, not_modified = poll(app, client, path, sensor_id, revalidate)
+            label = f"{path} {'If-None-Match' if revalidate else 'plain GET'}"
+            print(f'{label:<45} bytes/poll={sent / POLLS:9.1f}  cpu/poll={cpu_ms / POLLS:7.3f} ms  '
+                  f'304s={not_modified}/{POLLS}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# app/scripts/bench_detection_cache.py
+"""Hit rate of the perceptual-hash detection cache on the sample field videos.
+
+Each video is replayed as a camera upload stream, either every frame or
+one frame per second, through a DetectionCache with each hash and
+Hamming-distance threshold. Reports the hash cost per frame, hits and the
+fraction of model runs skipped. With the configured detector loadable, the
+skipped inference time is measured too.
+"""
+
+import os
+import time
+import cv2
+from app.config import Config
+from app.feed.detector import YoloDetector
+from app.feed.frame_cache import HASHES, DetectionCache
+
+VIDEOS = (
+    os.path.join('app', 'utils', 'corn_2.mp4'),
+    os.path.join('app', 'static', 'Constants', 'corn.mp4'),
+)
+DISTANCES = (0, 2, 4, 8)
+
+
+def read_video(path):
+    capture = cv2.VideoCapture(path)
+    fps = capture.get(cv2.CAP_PROP_FPS)
+    frames = []
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(frame)
+    capture.release()
+    return frames, fps
+
+
+def replay(frames, hash_name, max_distance, run):
+    cache = DetectionCache()
+    cache.hash = HASHES[hash_name]
+    cache.max_entries = 256
+    cache.max_age = 3600
+    cache.max_distance = max_distance
+    for frame in frames:
+        cache.detect('camera', frame, lambda: run(frame))
+    return cache.stats()
+
+
+def main():
+    detector = YoloDetector.from_config(vars(Config))
+    if detector.load_model():
+        run = detector.detect
+    else:
+        print('detector not loadable: counting skipped model runs only')
+        run = lambda frame: []  # noqa: E731
+
+    for path in VIDEOS:
+        frames, fps = read_video(path)
+        for hash_name, hash_fn in HASHES.items():
+            started = time.perf_counter()
+            for frame in frames:
+                hash_fn(frame)
+            hash_us = (time.perf_counter() - started) / len(frames) * 1e6
+            print(f'{path}: {len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]} '
+                  f'at {fps:.0f} fps, {hash_name} {hash_us:.0f} us/frame')
+            for label, stream in (('every frame', frames), ('1 frame/s', frames[::round(fps)])):
+                for distance in DISTANCES:
+                    stats = replay(stream, hash_name, distance, run)
+                    print(f'  {label:<12} distance<={distance}  hits {stats["hits"]:>3}/{len(stream):<3} '
+                          f'skipped {stats["hit_ratio"]:.0%}  saved {stats["saved_seconds"]:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# app/scripts/bench_detection_store.py
+"""Weed queries over JSON processing_results versus the ImageDetection store.
+
+Usage: python -m app.scripts.bench_detection_store [IMAGES]
+
+Seeds IMAGES farm images (default 1M) over the past year for one farm,
+each with 0-15 random detections stored both ways: as a JSON list in
+FarmImage.processing_results, as before, and as an ImageDetection row
+with summary columns and packed boxes. Then times, for the last week and
+for all time, "how many images have at least N weeds", the first page of
+those images, and weed/maize totals. Also reports bytes per image of
+JSON versus packed boxes.
+"""
+
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app import db
+from app.farm.models import FarmImage, ImageDetection
+from app.ml.detections import detection_summary, detections_with_weeds, pack_boxes, summarize
+from app.scripts.bench_common import bench_app, make_farm, make_user, measure, report
+
+MIN_WEEDS = 8
+POOL = 1000
+BATCH = 50_000
+
+
+def detection_pool(rng):
+    pool = []
+    for _ in range(POOL):
+        detections = [
+            {
+                'class': rng.choice(('maize', 'weed')),
+                'confidence': round(rng.uniform(0.25, 0.99), 4),
+                'bbox': [rng.randrange(4000), rng.randrange(3000), rng.randrange(20, 400), rng.randrange(20, 400)],
+            }
+            for _ in range(rng.randrange(16))
+        ]
+        results = json.dumps({'processed_date': datetime.utcnow().isoformat(), 'detections': detections})
+        pool.append((results, summarize(detections), pack_boxes(detections)))
+    return pool
+
+
+def seed(user, farm, count, rng):
+    pool = detection_pool(rng)
+    now = datetime.utcnow()
+    for start in range(0, count, BATCH):
+        images, detections = [], []
+        for i in range(start, min(start + BATCH, count)):
+            results, summary, boxes = pool[rng.randrange(POOL)]
+            uploaded = now - timedelta(seconds=i * 365 * 86400 // count)
+            images.append({'id': i + 1, 'farm_id': farm.id, 'user_id': user.id,
+                           'image_url': f'/static/uploads/images/{i}.jpg', 'upload_date': uploaded,
+                           'image_type': 'crop', 'processed': True, 'processing_results': results})
+            detections.append({'image_id': i + 1, 'farm_id': farm.id, 'captured_at': uploaded,
+                               'boxes': boxes, **summary})
+        db.session.execute(db.insert(FarmImage), images)
+        db.session.execute(db.insert(ImageDetection), detections)
+        db.session.commit()
+
+
+def json_scan(farm_id, since):
+    """The old way: load every image's JSON in the window and count its weeds"""
+    query = db.session.query(FarmImage.id, FarmImage.processing_results).filter(FarmImage.farm_id == farm_id)
+    if since is not None:
+        query = query.filter(FarmImage.upload_date >= since)
+    matches = weeds = 0
+    for _, results in query:
+        count = sum(1 for d in json.loads(results)['detections'] if d['class'] == 'weed')
+        weeds += count
+        matches += count >= MIN_WEEDS
+    return matches, weeds
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    app = bench_app()
+    with app.app_context():
+        user = make_user(db)
+        farm = make_farm(db, user)
+        started = time.perf_counter()
+        seed(user, farm, count, random.Random(0))
+        print(f'seeded {count:,} images in {time.perf_counter() - started:.0f}s')
+
+        json_bytes = db.session.query(db.func.avg(db.func.length(FarmImage.processing_results))).scalar()
+        blob_bytes = db.session.query(db.func.avg(db.func.length(ImageDetection.boxes))).scalar()
+        print(f'per image: JSON {json_bytes:.0f} bytes, packed boxes {blob_bytes:.0f} bytes')
+
+        week = datetime.utcnow() - timedelta(days=7)
+        for label, since in (('last week', week), ('all time', None)):
+            matches, weeds = json_scan(farm.id, since)
+            summary = detection_summary(farm.id, since=since, min_weeds=MIN_WEEDS)
+            assert (summary['images_with_weeds'], summary['weed_count']) == (matches, weeds)
+            print(f'{label}: {matches:,} images with >= {MIN_WEEDS} weeds, {weeds:,} weeds')
+            repeat = 20 if since is not None else 3
+            report(f'  {label} JSON scan', measure(lambda: json_scan(farm.id, since), repeat=repeat, warmup=1))
+            report(f'  {label} count (index)', measure(
+                lambda: detections_with_weeds(farm.id, MIN_WEEDS, since=since).count(), repeat=repeat, warmup=1))
+            report(f'  {label} first page (index)', measure(
+                lambda: (detections_with_weeds(farm.id, MIN_WEEDS, since=since)
+                         .options(db.joinedload(ImageDetection.image))
+                         .order_by(ImageDetection.captured_at.desc()).limit(20).all(),
+                         db.session.expunge_all()), repeat=repeat, warmup=1))
+            report(f'  {label} totals (index)', measure(
+                lambda: detection_summary(farm.id, since=since, min_weeds=MIN_WEEDS), repeat=repeat, warmup=1))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+# app/scripts/bench_detector_backends.py
+"""CPU latency, throughput and parity of the detector backends.
+
+Runs every backend over FRAMES frames of app/utils/corn_2.mp4 and reports
+single-frame latency and frames/sec at --threads inference threads. Each
+backend's detections are then checked against the PyTorch (ultralytics)
+backend: every detection must have a partner of the same class with IoU of
+at least --iou-tolerance and a score within --score-tolerance. Detections
+whose score is within the score tolerance of the confidence threshold may
+go unmatched, since either side can round them out. Exits with status 1 if
+any backend fails parity, or if the reference or every exported model is
+missing so nothing was compared, so it can gate switching DETECTOR_BACKEND.
+
+    flask --app run export-detector --format onnx --int8
+    flask --app run export-detector --format torchscript
+    python -m app.scripts.bench_detector_backends --threads 4
+
+Needs ultralytics and torch, plus onnxruntime for the onnx backends.
+"""
+
+import argparse
+import os
+import sys
+import time
+import cv2
+import numpy as np
+from app.config import Config
+from app.feed.backends import create_backend
+
+FRAMES = 50
+VIDEO = os.path.join(os.path.dirname(__file__), '..', 'utils', 'corn_2.mp4')
+BACKENDS = (('ultralytics', False), ('torchscript', False), ('onnx', False), ('onnx', True))
+
+
+def read_frames(count):
+    capture = cv2.VideoCapture(VIDEO)
+    frames = []
+    while len(frames) < count:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(frame)
+    capture.release()
+    return frames
+
+
+def iou(a, b):
+    x1, y1 = np.maximum(a[:2], b[:2])
+    x2, y2 = np.minimum(a[2:], b[2:])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def parity_failures(reference, candidate, conf, iou_tolerance, score_tolerance):
+    """Descriptions of detections in either list without a close enough partner"""
+    failures = []
+    unmatched = list(range(len(candidate[0])))
+    for box, score, class_id in zip(*reference):
+        best, best_iou = None, 0.0
+        for j in unmatched:
+            if candidate[2][j] == class_id and iou(box, candidate[0][j]) > best_iou:
+                best, best_iou = j, iou(box, candidate[0][j])
+        if best is not None and best_iou >= iou_tolerance:
+            unmatched.remove(best)
+            if abs(candidate[1][best] - score) > score_tolerance:
+                failures.append(f'class {class_id} score {score:.3f} vs {candidate[1][best]:.3f}')
+        elif score - conf > score_tolerance:
+            failures.append(f'class {class_id} score {score:.3f} missing (best IoU {best_iou:.2f})')
+    failures.extend(f'extra class {candidate[2][j]} score {candidate[1][j]:.3f}'
+                    for j in unmatched if candidate[1][j] - conf > score_tolerance)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--threads', type=int, default=os.cpu_count())
+    parser.add_argument('--frames', type=int, default=FRAMES)
+    parser.add_argument('--iou-tolerance', type=float, default=0.9)
+    parser.add_argument('--score-tolerance', type=float, default=0.05)
+    args = parser.parse_args()
+
+    frames = read_frames(args.frames)
+    options = dict(threads=args.threads, imgsz=Config.DETECTOR_IMGSZ, conf=Config.DETECTOR_CONF,
+                   iou=Config.DETECTOR_IOU)
+    print(f'{len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]}, '
+          f'{args.threads} threads, imgsz {Config.DETECTOR_IMGSZ}')
+
+    reference = None
+    compared, failed = [], []
+    for name, int8 in BACKENDS:
+        label = name + (' int8' if int8 else '')
+        backend = create_backend(name, Config.DETECTOR_MODEL_PATH, int8=int8, **options)
+        if not os.path.exists(backend.model_path):
+            if reference is None:
+                sys.exit(f'parity FAIL: reference model {backend.model_path} not found')
+            print(f'{label:<16} skipped: no {backend.model_path} (run flask export-detector)')
+            continue
+        started = time.perf_counter()
+        backend.load()
+        load_ms = (time.perf_counter() - started) * 1000
+        backend.predict(frames[0])  # warm up
+
+        outputs, timings = [], []
+        for frame in frames:
+            started = time.perf_counter()
+            outputs.append(backend.predict(frame))
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        line = (f'{label:<16} load={load_ms:7.0f} ms  p50={timings[len(timings) // 2]:7.1f} ms  '
+                f'p99={timings[int(len(timings) * 0.99)]:7.1f} ms  '
+                f'{len(frames) / (sum(timings) / 1000):6.1f} frames/s')
+
+        if reference is None:
+            reference = outputs
+            print(line + '  (reference)')
+            continue
+        failures = [f'frame {i}: {failure}'
+                    for i, (ref, out) in enumerate(zip(reference, outputs))
+                    for failure in parity_failures(ref, out, Config.DETECTOR_CONF,
+                                                   args.iou_tolerance, args.score_tolerance)]
+        print(line + f'  parity {"FAIL" if failures else "ok"}')
+        for failure in failures[:10]:
+            print(f'    {failure}')
+        compared.append(label)
+        if failures:
+            failed.append(label)
+    if failed:
+        sys.exit(f'parity FAIL: {", ".join(failed)}')
+    if not compared:
+        sys.exit('parity FAIL: no exported model to compare (run flask export-detector)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# app/scripts/bench_detector_sizes.py
+"""Decode and inference cost per detector input size, and what it costs in accuracy.
+
+Frames of app/utils/corn_2.mp4 are upscaled to 12 MP JPEGs, like phone
+uploads. For each of DETECTOR_SIZES this reports:
+
+- decode: full-resolution cv2.imdecode versus decode_image(), which uses
+  IMREAD_REDUCED_COLOR_* to decode no larger than the model needs
+- infer: detection latency at that size with DETECTOR_BACKEND
+- recall/precision: how many detections of the full-resolution decode at
+  the largest size are found again (same class, IoU >= 0.5), with boxes
+  compared in the upload's own pixels
+
+The inference columns need the configured backend's model to load.
+"""
+
+import time
+import cv2
+import numpy as np
+from app.config import Config
+from app.feed.detector import YoloDetector
+from app.feed.preprocess import decode_image
+from app.scripts.bench_detector_backends import read_frames, iou
+
+FRAMES = 20
+UPLOAD_SIZE = (4000, 3000)
+
+
+def agreement(reference, candidate):
+    """(recall, precision) of candidate detections against reference ones"""
+    matched = 0
+    unmatched = list(candidate)
+    for ref in reference:
+        ref_box = _xyxy(ref['bbox'])
+        for det in unmatched:
+            if det['class'] == ref['class'] and iou(ref_box, _xyxy(det['bbox'])) >= 0.5:
+                unmatched.remove(det)
+                matched += 1
+                break
+    recall = matched / len(reference) if reference else 1.0
+    precision = matched / len(candidate) if candidate else 1.0
+    return recall, precision
+
+
+def _xyxy(bbox):
+    x, y, w, h = bbox
+    return np.array([x, y, x + w, y + h], dtype=float)
+
+
+def median_ms(fn, items):
+    timings = []
+    results = []
+    for item in items:
+        started = time.perf_counter()
+        results.append(fn(item))
+        timings.append((time.perf_counter() - started) * 1000)
+    return sorted(timings)[len(timings) // 2], results
+
+
+def main():
+    uploads = [cv2.imencode('.jpg', cv2.resize(frame, UPLOAD_SIZE, interpolation=cv2.INTER_CUBIC),
+                            [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+               for frame in read_frames(FRAMES)]
+    detector = YoloDetector.from_config(vars(Config))
+    can_infer = detector.load_model()
+    sizes = sorted(Config.DETECTOR_SIZES)
+    print(f'{len(uploads)} uploads of {UPLOAD_SIZE[0]}x{UPLOAD_SIZE[1]}, '
+          f'~{sum(map(len, uploads)) / len(uploads) / 1e6:.1f} MB each, '
+          f'backend {Config.DETECTOR_BACKEND}')
+
+    full_ms, full_frames = median_ms(lambda data: cv2.imdecode(np.frombuffer(data, np.uint8),
+                                                               cv2.IMREAD_COLOR), uploads)
+    print(f'full decode {full_ms:7.1f} ms  ({full_frames[0].shape[1]}x{full_frames[0].shape[0]})')
+    reference = None
+    if can_infer:
+        _, reference = median_ms(lambda frame: detector.detect(frame, imgsz=sizes[-1]), full_frames)
+
+    for size in sizes:
+        decode_ms, decoded = median_ms(lambda data: decode_image(data, size), uploads)
+        frame = decoded[0][0]
+        line = f'imgsz {size:<4} decode {decode_ms:7.1f} ms ({frame.shape[1]}x{frame.shape[0]})'
+        if can_infer:
+            infer_ms, detections = median_ms(
+                lambda item: detector.detect(item[0], imgsz=size, scale=item[1]), decoded)
+            scores = [agreement(ref, det) for ref, det in zip(reference, detections)]
+            recall = sum(s[0] for s in scores) / len(scores)
+            precision = sum(s[1] for s in scores) / len(scores)
+            line += f'  infer {infer_ms:7.1f} ms  recall {recall:.3f}  precision {precision:.3f}'
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# app/scripts/bench_frame_transport.py
+"""Round-trip cost of handing a decoded frame to the inference process.
+
+A stand-in detector that only reads one pixel isolates the transport from
+the model. Each frame size is sent ROUND_TRIPS times by:
+
+- pickled queues: a multiprocessing.Queue pair to a worker process
+- socket, pickled: `serve()` in its own process, frames too big for a slot
+- shared memory: `serve()` with the frame written into the client's slot
+"""
+
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from app.feed.detector import InferenceClient, serve
+
+ROUND_TRIPS = 500
+SHAPES = ((640, 640, 3), (720, 1280, 3))
+
+
+class TouchDetector:
+    model_path = None
+
+    def load_model(self):
+        return True
+
+    def detect(self, frame, imgsz=None, scale=1.0):
+        return [{"class": "maize", "confidence": float(frame[0, 0, 0]), "bbox": [0, 0, 1, 1]}]
+
+
+def queue_worker(requests, replies):
+    detector = TouchDetector()
+    while True:
+        frame = requests.get()
+        if frame is None:
+            return
+        replies.put(("ok", detector.detect(frame)))
+
+
+def time_round_trips(send_one, frame):
+    send_one(frame)  # warm up connections and slots
+    timings = []
+    for _ in range(ROUND_TRIPS):
+        start = time.perf_counter()
+        send_one(frame)
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+
+
+def bench_queues(frame):
+    requests, replies = multiprocessing.Queue(), multiprocessing.Queue()
+    worker = multiprocessing.Process(target=queue_worker, args=(requests, replies))
+    worker.start()
+
+    def send_one(f):
+        requests.put(f)
+        return replies.get()
+
+    try:
+        return time_round_trips(send_one, frame)
+    finally:
+        requests.put(None)
+        worker.join()
+
+
+def bench_service(frame, slot_bytes):
+    # A separate interpreter, like `flask inference-server`, so the two
+    # sides don't share a multiprocessing resource tracker
+    address = os.path.join(tempfile.mkdtemp(prefix='farmeye-bench-'), 'inference.sock')
+    code = ('from app.feed.detector import serve; '
+            'from app.scripts.bench_frame_transport import TouchDetector; '
+            f'serve(TouchDetector(), {address!r}, slots=4, slot_bytes={slot_bytes})')
+    service = subprocess.Popen([sys.executable, '-c', code])
+    while not os.path.exists(address):
+        time.sleep(0.05)
+    client = InferenceClient(address)
+    try:
+        return time_round_trips(client.detect, frame)
+    finally:
+        client._drop_connection()
+        service.terminate()
+        service.wait()
+        shutil.rmtree(os.path.dirname(address))
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f'{ROUND_TRIPS} round trips, microseconds')
+    for shape in SHAPES:
+        frame = rng.integers(0, 255, shape, dtype=np.uint8)
+        label = f'{shape[1]}x{shape[0]} ({frame.nbytes / 1e6:.1f} MB)'
+        results = {
+            'pickled queues': bench_queues(frame),
+            'socket, pickled': bench_service(frame, slot_bytes=1),
+            'shared memory': bench_service(frame, slot_bytes=frame.nbytes),
+        }
+        for transport, (p50, p99) in results.items():
+            print(f'{label:<20} {transport:<16} p50={p50:8.1f}  p99={p99:8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+# app/scripts/bench_image_derivatives.py
+"""Page weight and render time of farm.view_farm with image derivatives.
+
+A farm gets IMAGES images backed by DISTINCT 12-megapixel photos (sharing
+files the way duplicate uploads do). Reports the time to make one image's
+derivatives in the worker pool and on first request, the render time of
+farm.view_farm before and after the derivatives exist, and the image bytes
+a browser downloads for the first page and for all pages: the originals,
+as the page used to link them, against the thumbnails it picks now.
+"""
+
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import cv2
+import numpy as np
+from app.farm.storage import IMAGE_FOLDER, store_stream
+from app.scripts.bench_common import bench_app, login_client, make_farm, make_user, measure, report
+
+IMAGES = 1000
+DISTINCT = 50
+SIZE = (4000, 3000)
+
+
+def make_photo(rng):
+    """JPEG bytes of a photo-like image: smooth shading, blobs and some noise"""
+    small = rng.integers(0, 255, (12, 16, 3), dtype=np.uint8)
+    frame = cv2.resize(small, SIZE, interpolation=cv2.INTER_CUBIC)
+    for _ in range(400):
+        center = (int(rng.integers(0, SIZE[0])), int(rng.integers(0, SIZE[1])))
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.circle(frame, center, int(rng.integers(10, 80)), color, -1)
+    frame = cv2.add(frame, rng.integers(0, 24, frame.shape, dtype=np.uint8))
+    return cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else IMAGES
+    work = tempfile.mkdtemp(prefix='farmeye-derivatives-')
+    try:
+        app = bench_app()
+        app.config['UPLOAD_FOLDER'] = work
+        app.config['DERIVATIVE_WORKERS'] = 2
+        from app import db
+        from app.farm.derivatives import image_derivatives
+        from app.farm.models import FarmImage
+
+        image_derivatives.init_app(app)
+        rng = np.random.default_rng(0)
+        stored = []
+        for _ in range(DISTINCT):
+            path = os.path.join(work, 'photo.jpg')
+            with open(path, 'wb') as f:
+                f.write(make_photo(rng))
+            with open(path, 'rb') as f:
+                stored.append(store_stream(f, work, '.jpg'))
+        original_bytes = {s.digest: s.size for s in stored}
+        print(f'{count} images of {DISTINCT} distinct {SIZE[0]}x{SIZE[1]} photos, '
+              f'{np.mean(list(original_bytes.values())) / 1e6:.1f} MB each')
+
+        with app.app_context():
+            user = make_user(db)
+            farm = make_farm(db, user)
+            for i in range(count):
+                s = stored[i % DISTINCT]
+                path = f'/static/uploads/{IMAGE_FOLDER}/{s.filename}'
+                db.session.add(FarmImage(farm_id=farm.id, filename=s.filename, path=path,
+                                         image_url=path, image_type='crop', content_hash=s.digest))
+            db.session.commit()
+            user_id, farm_id = user.id, farm.id
+        client = login_client(app, user_id)
+        view = f'/farm/view/{farm_id}'
+
+        def render(per_page=20):
+            response = client.get(f'{view}?per_page={per_page}')
+            assert response.status_code == 200
+            return response.get_data(as_text=True)
+
+        report('view_farm, 20 images, no derivatives yet', measure(render, repeat=50))
+        report('view_farm, 100 images, no derivatives yet', measure(lambda: render(100), repeat=20))
+
+        # First request for an image's thumbnail makes all its derivatives
+        first = stored[0]
+        with app.app_context():
+            image_id = FarmImage.query.filter_by(content_hash=first.digest).first().id
+        started = time.perf_counter()
+        assert client.get(f'/farm/images/{image_id}/thumb.webp').status_code == 200
+        print(f'{"on-demand first request":<45} {(time.perf_counter() - started) * 1000:8.1f} ms')
+
+        started = time.perf_counter()
+        for s in stored[1:]:
+            image_derivatives.submit(s.digest, os.path.join(work, IMAGE_FOLDER, s.filename))
+        image_derivatives.shutdown()
+        elapsed = time.perf_counter() - started
+        print(f'{"worker pool (2 threads, " + str(os.cpu_count()) + " CPU)":<45} '
+              f'{(DISTINCT - 1) / elapsed:8.2f} images/s')
+        print(f'stats: {image_derivatives.stats()}')
+
+        report('view_farm, 20 images, derivatives on disk', measure(render, repeat=50))
+        report('view_farm, 100 images, derivatives on disk', measure(lambda: render(100), repeat=20))
+
+        def derivative_bytes(digest, variant, fmt):
+            return os.path.getsize(image_derivatives.path(digest, variant, fmt))
+
+        # What a browser at 1x or 2x picks for the 240px grid slots: the thumbnails
+        html = render()
+        with app.app_context():
+            hashes = dict(db.session.query(FarmImage.id, FarmImage.content_hash))
+        first_page = [hashes[int(i)] for i in re.findall(r'/farm/images/(\d+)/thumb\.webp', html)]
+        all_images = [stored[i % DISTINCT].digest for i in range(count)]
+        for label, digests in ((f'first page ({len(first_page)} images)', first_page),
+                               (f'all {count} images', all_images)):
+            before = sum(original_bytes[d] for d in digests)
+            webp = sum(derivative_bytes(d, 'thumb', 'webp') for d in digests)
+            jpeg = sum(derivative_bytes(d, 'thumb', 'jpg') for d in digests)
+            print(f'{label:<25} originals {before / 1e6:8.1f} MB  thumb.webp {webp / 1e6:6.2f} MB  '
+                  f'thumb.jpg {jpeg / 1e6:6.2f} MB')
+        print(f'HTML of the first page: {len(html.encode()) / 1e3:.1f} kB')
+    finally:
+        shutil.rmtree(work)
+
+
+if __name__ == '__main__':
+    main()
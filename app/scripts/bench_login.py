@@ -0,0 +1,89 @@
+# app/scripts/bench_login.py
+"""Benchmark login throughput and latency under concurrent load.
+
+Usage: python -m app.scripts.bench_login [CONCURRENCY] [LOGINS]
+
+Fires LOGINS POST /auth/login requests from CONCURRENCY threads with the
+production hash method, once hashing inline in the request thread and once
+through the process pool. While the burst runs, another thread polls a
+cheap endpoint to show how much the logins slow unrelated requests.
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app import db
+from app.auth.passwords import hash_password, shutdown_pool
+from app.scripts.bench_common import bench_app, make_user, make_farm, login_client
+
+PASSWORD = 'correct horse battery'
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def run_burst(app, emails, concurrency, poll_user_id):
+    def login(email):
+        client = app.test_client()
+        start = time.perf_counter()
+        response = client.post('/auth/login', data={'email': email, 'password': PASSWORD})
+        assert response.status_code == 302, response.status_code
+        return (time.perf_counter() - start) * 1000
+
+    poll_samples = []
+    stop = threading.Event()
+
+    def poll():
+        client = login_client(app, poll_user_id)
+        while not stop.is_set():
+            start = time.perf_counter()
+            client.get('/api/alerts/unread-count')
+            poll_samples.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.005)
+
+    poller = threading.Thread(target=poll)
+    poller.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        samples = list(executor.map(login, emails))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    poller.join()
+    return samples, elapsed, poll_samples
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    logins = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    app = bench_app()
+    app.config['PASSWORD_HASH_METHOD'] = 'scrypt:32768:8:1'
+    with app.app_context():
+        app.config['PASSWORD_HASH_WORKERS'] = 0
+        pwhash = hash_password(PASSWORD)
+        emails = []
+        for i in range(concurrency):
+            user = make_user(db, email=f'login{i}@example.com', password_hash=pwhash)
+            make_farm(db, user)
+            emails.append(user.email)
+        poll_user_id = make_user(db, email='poll@example.com').id
+
+    print(f'{logins} logins, {concurrency} concurrent, method scrypt:32768:8:1')
+    for workers in (0, 2, 4):
+        app.config['PASSWORD_HASH_WORKERS'] = workers
+        app.config['PASSWORD_HASH_QUEUE'] = max(workers * 4, 1)
+        app.config['PASSWORD_HASH_TIMEOUT'] = 30
+        # Warm the pool so process start-up is not counted
+        run_burst(app, emails[:1], 1, poll_user_id)
+        samples, elapsed, poll = run_burst(app, (emails * logins)[:logins], concurrency, poll_user_id)
+        label = 'inline' if workers == 0 else f'pool of {workers}'
+        print(f'{label:<12} {logins / elapsed:7.1f} logins/s  login p50={percentile(samples, .5):7.1f} ms '
+              f'p99={percentile(samples, .99):7.1f} ms  other request p99={percentile(poll, .99):6.1f} ms')
+        shutdown_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+# app/scripts/bench_model_memory.py
+"""Memory of WORKERS gunicorn workers under each DETECTOR_MODE.
+
+For each mode the production setup (gunicorn.conf.py, wsgi:app, sync
+workers) is started, every worker is made to run a detection so lazily
+loaded weights are in memory, and /proc/<pid>/smaps_rollup is read for the
+master, the workers and (in service mode) the inference process:
+
+- RSS/worker: resident pages, counting shared ones in full
+- USS/worker: pages only that worker holds (what one more worker costs)
+- total PSS: shared pages split between their users; the real footprint
+
+    python -m app.scripts.bench_model_memory --model app/utils/maize_weed_detection.pt
+
+Needs gunicorn, and ultralytics plus the weights for the model to load at
+all; without them the numbers cover the app alone.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import httpx
+import numpy as np
+from app.scripts.bench_common import (bench_app, make_user, session_cookie, free_port,
+                                      wait_for_port)
+
+MODES = ('worker', 'preload', 'service')
+
+
+def seed():
+    from app import db
+
+    app = bench_app()
+    with app.app_context():
+        return session_cookie(app, make_user(db).id)
+
+
+def memory(pid):
+    """(rss, pss, uss) in MiB for one process"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    uss = fields['Private_Clean'] + fields['Private_Dirty']
+    return fields['Rss'] / 1024, fields['Pss'] / 1024, uss / 1024
+
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def wait_for_workers(master, count, timeout=60):
+    deadline = time.monotonic() + timeout
+    while len(children(master)) < count:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f'only {len(children(master))} of {count} workers started')
+        time.sleep(0.2)
+    return children(master)
+
+
+def touch_every_worker(port, cookie, workers):
+    """Send enough concurrent detections that each sync worker serves some"""
+    _, jpeg = cv2.imencode('.jpg', np.random.default_rng(0).integers(0, 255, (640, 640, 3),
+                                                                      dtype=np.uint8))
+    files = {'image': ('frame.jpg', jpeg.tobytes(), 'image/jpeg')}
+
+    def post(_):
+        with httpx.Client(base_url=f'http://127.0.0.1:{port}', timeout=120) as client:
+            return client.post('/feed/detect', files=files,
+                               headers={'Cookie': f'session={cookie}'}).status_code
+
+    with ThreadPoolExecutor(workers * 4) as pool:
+        statuses = list(pool.map(post, range(workers * 8)))
+    assert all(status == 200 for status in statuses), statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--model', default=None, help='weights file (default: DETECTOR_MODEL_PATH)')
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix='.sqlite', prefix='farmeye-bench-')
+    os.close(fd)
+    socket_path = db_path + '.sock'
+    port = free_port()
+    # Copied before the app is imported, which loads .env (see loadtest.py)
+    env = dict(
+        os.environ,
+        FLASK_CONFIG='production',
+        DATABASE_URL='sqlite:///' + db_path,
+        DETECTOR_SOCKET=socket_path,
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        GUNICORN_WORKER_CLASS='sync',
+        WEB_CONCURRENCY=str(args.workers),
+        GUNICORN_LOGLEVEL='warning',
+    )
+    if args.model:
+        env['DETECTOR_MODEL_PATH'] = os.path.abspath(args.model)
+    os.environ['TEST_DATABASE_URL'] = 'sqlite:///' + db_path
+    cookie = seed()
+
+    print(f'{args.workers} sync workers, memory in MiB')
+    for mode in MODES:
+        mode_env = dict(env, DETECTOR_MODE=mode)
+        processes = []
+        try:
+            service_pid = None
+            if mode == 'service':
+                service = subprocess.Popen(
+                    [sys.executable, '-m', 'flask', '--app', 'run', 'inference-server'],
+                    env=mode_env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                processes.append(service)
+                deadline = time.monotonic() + 120
+                while not os.path.exists(socket_path):
+                    if service.poll() is not None or time.monotonic() > deadline:
+                        raise RuntimeError('inference service did not start (is the model loadable?)')
+                    time.sleep(0.2)
+                service_pid = service.pid
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                env=mode_env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            processes.append(server)
+            wait_for_port(port, timeout=120)
+            workers = wait_for_workers(server.pid, args.workers)
+            touch_every_worker(port, cookie, args.workers)
+
+            per_worker = [memory(pid) for pid in workers]
+            others = [memory(server.pid)] + ([memory(service_pid)] if service_pid else [])
+            rss = sum(m[0] for m in per_worker) / len(per_worker)
+            uss = sum(m[2] for m in per_worker) / len(per_worker)
+            total_pss = sum(m[1] for m in per_worker + others)
+            print(f'{mode:<8} RSS/worker={rss:7.1f}  USS/worker={uss:7.1f}  '
+                  f'total PSS={total_pss:8.1f}')
+        except RuntimeError as e:
+            print(f'{mode:<8} skipped: {e}')
+        finally:
+            for process in reversed(processes):
+                process.terminate()
+                process.wait()
+    os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
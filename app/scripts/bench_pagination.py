@@ -0,0 +1,106 @@
+# app/scripts/bench_pagination.py
+"""Benchmark keyset pagination against unbounded and OFFSET listings.
+
+Usage: python -m app.scripts.bench_pagination [ROWS]
+
+Times the first page, a page deep into the table (reached by cursor for
+keyset, by OFFSET for the classic approach) and the old .all() listing,
+plus the peak Python memory of each, at ROWS alerts (default 200k).
+"""
+
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+from app import db
+from app.farm.models import Alert
+from app.utils.pagination import keyset_paginate, encode_cursor
+from app.scripts.bench_common import bench_app, make_user, make_farm, login_client, measure, report
+
+PER_PAGE = 20
+
+
+def seed_alerts(user, farm, count):
+    now = datetime.utcnow()
+    batch = 50_000
+    for start in range(0, count, batch):
+        rows = [
+            {
+                'farm_id': farm.id,
+                'user_id': user.id,
+                # Collisions on created_at exercise the id tie-breaker
+                'created_at': now - timedelta(seconds=i // 3),
+                'alert_type': 'Bench',
+                'message': 'Benchmark alert',
+                'severity': 'low',
+                'is_read': True,
+            }
+            for i in range(start, min(start + batch, count))
+        ]
+        db.session.execute(db.insert(Alert), rows)
+        db.session.commit()
+
+
+def peak_memory_kb(fn):
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    app = bench_app()
+    with app.app_context():
+        user = make_user(db)
+        farm = make_farm(db, user)
+        user_id = user.id
+        seed_alerts(user, farm, rows)
+        query = Alert.query.filter_by(farm_id=farm.id)
+
+        # Cursor pointing at the middle of the table
+        middle = query.order_by(Alert.created_at.desc(), Alert.id.desc()).offset(rows // 2).first()
+        deep_cursor = encode_cursor(middle.created_at, middle.id)
+
+        def first_page():
+            keyset_paginate(query, Alert.created_at, Alert.id, None, PER_PAGE)
+            db.session.expunge_all()
+
+        def deep_keyset():
+            keyset_paginate(query, Alert.created_at, Alert.id, deep_cursor, PER_PAGE)
+            db.session.expunge_all()
+
+        def deep_offset():
+            query.order_by(Alert.created_at.desc(), Alert.id.desc()).offset(rows // 2).limit(PER_PAGE).all()
+            db.session.expunge_all()
+
+        def unbounded():
+            query.order_by(Alert.created_at.desc()).all()
+            db.session.expunge_all()
+
+        # Walking every page must visit every row exactly once
+        seen, cursor = 0, None
+        sample = min(rows, 2_000)
+        while seen < sample:
+            items, cursor = keyset_paginate(query, Alert.created_at, Alert.id, cursor, 500)
+            seen += len(items)
+            if cursor is None:
+                break
+        print(f'{rows} alerts, walked {seen} rows by cursor')
+
+        report('keyset first page', measure(first_page))
+        report('keyset page at 50%', measure(deep_keyset))
+        report('OFFSET page at 50%', measure(deep_offset, repeat=20))
+        report('unbounded .all() (old)', measure(unbounded, repeat=3, warmup=1))
+        print(f"peak memory: keyset page {peak_memory_kb(deep_keyset):.0f} KiB, "
+              f".all() {peak_memory_kb(unbounded):.0f} KiB")
+
+        client = login_client(app, user_id)
+        report('GET /farm/alerts (first page)', measure(lambda: client.get('/farm/alerts'), repeat=50))
+        report('GET /api/alerts (page at 50%)', measure(
+            lambda: client.get('/api/alerts?cursor=' + deep_cursor), repeat=50))
+
+
+if __name__ == '__main__':
+    main()
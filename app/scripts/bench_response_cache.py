@@ -0,0 +1,94 @@
+# app/scripts/bench_response_cache.py
+"""Dashboard throughput with 500 concurrent polling clients per cache backend.
+
+CLIENTS logged-in clients spread over FARMS farms each poll
+/api/dashboard-data ROUNDS times through a pool of WORKERS threads (roughly
+one gthread worker). Before every round a sensor reading is written to one
+farm, so each round invalidates part of the cache. Conditional GETs are
+switched off so every poll reaches the response cache.
+"""
+
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app import db
+from app.farm.models import Sensor, SensorData
+from app.utils.response_cache import response_cache
+from app.scripts.bench_common import bench_app, make_user, make_farm, login_client
+
+PATH = '/api/dashboard-data'
+CLIENTS = 500
+FARMS = 50
+ROUNDS = 4
+WORKERS = 16
+
+
+def seed():
+    user_ids, sensor_ids = [], []
+    for i in range(FARMS):
+        user = make_user(db, email=f'poller{i}@example.com')
+        farm = make_farm(db, user, name=f'Farm {i}')
+        sensor = Sensor(farm_id=farm.id, sensor_type='soil_moisture', location='Field A')
+        db.session.add(sensor)
+        db.session.flush()
+        db.session.add(SensorData(sensor_id=sensor.id, farm_id=farm.id,
+                                  sensor_type='soil_moisture', value=60, unit='%'))
+        db.session.commit()
+        user_ids.append(user.id)
+        sensor_ids.append(sensor.id)
+    return user_ids, sensor_ids
+
+
+def write_reading(app, sensor_id):
+    with app.app_context():
+        sensor = db.session.get(Sensor, sensor_id)
+        db.session.add(SensorData(sensor_id=sensor.id, farm_id=sensor.farm_id,
+                                  sensor_type='soil_moisture', value=58, unit='%'))
+        db.session.commit()
+
+
+def run(app, clients, sensor_ids):
+    latencies = []
+
+    def poll(client):
+        start = time.perf_counter()
+        response = client.get(PATH)
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        for round_no in range(ROUNDS):
+            write_reading(app, sensor_ids[round_no % len(sensor_ids)])
+            list(pool.map(poll, clients))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return len(latencies) / elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+
+
+def main():
+    app = bench_app()
+    app.config['HTTP_CONDITIONAL_GET'] = False
+    fd, cache_path = tempfile.mkstemp(suffix='.sqlite', prefix='farmeye-cache-')
+    os.close(fd)
+    app.config['RESPONSE_CACHE_PATH'] = cache_path
+
+    with app.app_context():
+        user_ids, sensor_ids = seed()
+    clients = [login_client(app, user_ids[i % FARMS]) for i in range(CLIENTS)]
+
+    for backend in ('null', 'memory', 'sqlite'):
+        app.config['RESPONSE_CACHE_BACKEND'] = backend
+        response_cache.init_app(app)
+        response_cache.clear()
+        response_cache.reset_stats()
+        rps, p50, p99 = run(app, clients, sensor_ids)
+        stats = response_cache.stats()
+        print(f'{backend:<8} {rps:8.1f} req/s  p50={p50:8.2f} ms  p99={p99:8.2f} ms  '
+              f"hits={stats['hits']} misses={stats['misses']} invalidations={stats['invalidations']}")
+    os.remove(cache_path)
+
+
+if __name__ == '__main__':
+    main()
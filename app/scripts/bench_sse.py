@@ -0,0 +1,117 @@
+# app/scripts/bench_sse.py
+"""Compare dashboard polling with the /api/events change stream.
+
+TABS open dashboards spread over FARMS farms watch for CHANGES writes over
+a window of POLLS polling intervals. In polling mode every tab fetches
+/api/dashboard-data once per interval. In streaming mode every tab holds
+an /api/events stream and refetches only when an event for its farm
+arrives. Response and conditional caching are off so both modes do the
+full work per fetch. Reports requests, SQL statements, server CPU time and
+open connections (one thread each) per worker.
+"""
+
+import threading
+import time
+from app import db
+from app.farm.models import Alert
+from app.utils.events import broker
+from app.scripts.bench_common import bench_app, make_user, make_farm, login_client
+
+DASHBOARD = '/api/dashboard-data'
+TABS = 200
+FARMS = 20
+POLLS = 10
+CHANGES = 5
+
+
+def seed():
+    owners = []
+    for i in range(FARMS):
+        user = make_user(db, email=f'tab{i}@example.com')
+        farm = make_farm(db, user, name=f'Farm {i}')
+        owners.append((user.id, farm.id))
+    return owners
+
+
+def write_alert(app, owner):
+    user_id, farm_id = owner
+    with app.app_context():
+        db.session.add(Alert(farm_id=farm_id, user_id=user_id, alert_type='Pest',
+                             message='Bench alert', severity='low'))
+        db.session.commit()
+
+
+class Counter:
+    def __init__(self, engine):
+        self.statements = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+        db.event.listen(engine, 'before_cursor_execute', self.on_statement)
+
+    def on_statement(self, *args):
+        with self.lock:
+            self.statements += 1
+
+    def fetch(self, client):
+        assert client.get(DASHBOARD).status_code == 200
+        with self.lock:
+            self.requests += 1
+
+
+def polling(app, clients, owners, counter):
+    for poll_no in range(POLLS):
+        if poll_no % (POLLS // CHANGES) == 0:
+            write_alert(app, owners[poll_no % len(owners)])
+        for client in clients:
+            counter.fetch(client)
+
+
+def streaming(app, clients, owners, counter):
+    received = threading.Semaphore(0)
+
+    def listen(client):
+        response = client.get('/api/events', buffered=False)
+        for chunk in response.response:
+            if chunk.startswith(b'id:'):
+                counter.fetch(client)
+                received.release()
+        response.close()
+
+    threads = [threading.Thread(target=listen, args=(client,)) for client in clients]
+    for thread in threads:
+        thread.start()
+    while broker.connection_count() < len(clients):
+        time.sleep(0.05)
+    peak = broker.connection_count()
+
+    tabs_per_farm = len(clients) // len(owners)
+    for change in range(CHANGES):
+        write_alert(app, owners[change % len(owners)])
+        for _ in range(tabs_per_farm):
+            received.acquire()
+    for thread in threads:
+        thread.join()
+    return peak
+
+
+def main():
+    app = bench_app()
+    app.config.update(HTTP_CONDITIONAL_GET=False, SSE_MAX_CONNECTIONS=TABS,
+                      SSE_HEARTBEAT_SECONDS=0.5, SSE_MAX_DURATION=5)
+    with app.app_context():
+        owners = seed()
+        engine = db.engine
+    clients = [login_client(app, owners[i % FARMS][0]) for i in range(TABS)]
+
+    for label, mode in (('polling every interval', polling), ('event stream', streaming)):
+        counter = Counter(engine)
+        cpu = time.process_time()
+        connections = mode(app, clients, owners, counter) or 0
+        cpu_ms = (time.process_time() - cpu) * 1000
+        db.event.remove(engine, 'before_cursor_execute', counter.on_statement)
+        print(f'{label:<24} dashboard fetches={counter.requests:<5} SQL={counter.statements:<6} '
+              f'cpu={cpu_ms:8.1f} ms  open streams={connections}')
+
+
+if __name__ == '__main__':
+    main()
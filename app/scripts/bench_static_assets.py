@@ -0,0 +1,114 @@
+# app/scripts/bench_static_assets.py
+"""Requests and bytes a browser spends on static files per dashboard load.
+
+Loads the dashboard (main.index, dashboard/index.html) the way a browser
+with a cache would: fetches every /static/ file the page links, and the
+CSS @imports and ES module imports inside them, sending
+Accept-Encoding: br, gzip. A file cached with max-age is not requested
+again; one without is revalidated with If-None-Match. Counts requests and
+response body bytes for a first visit and a repeat visit, with app/static
+as it is and after `flask build-assets` (built into a copy of app/static,
+so the tree is left alone). The HTML itself is not counted.
+"""
+
+import gzip
+import os
+import posixpath
+import re
+import shutil
+import tempfile
+import time
+from app.scripts.bench_common import bench_app, login_client, make_farm, make_user
+
+LINKS = re.compile(r'(?:href|src)="(/static/[^"]+)"')
+REFERENCES = re.compile(r"""(?:@import\s+(?:url\()?|\bfrom\s*|\bimport\s*\(?\s*)['"]([^'"]+)['"]""")
+
+
+def body_text(response):
+    data = response.get_data()
+    if response.headers.get('Content-Encoding') == 'gzip':
+        data = gzip.decompress(data)
+    return data.decode('utf-8', 'replace')
+
+
+def page_load(client, cache):
+    """(requests, body bytes, of which CSS/JS) for the static files of one dashboard load"""
+    html = client.get('/').get_data(as_text=True)
+    queue, seen = LINKS.findall(html), set()
+    requests = size = code = 0
+    while queue:
+        url = queue.pop(0)
+        if url in seen:
+            continue
+        seen.add(url)
+        headers = {'Accept-Encoding': 'br, gzip'}
+        entry = cache.get(url)
+        if entry is not None and entry['fresh']:
+            text = entry['text']
+        else:
+            if entry is not None:
+                headers['If-None-Match'] = entry['etag']
+            response = client.get(url, headers=headers)
+            requests += 1
+            size += len(response.get_data())
+            if url.endswith(('.css', '.js')):
+                code += len(response.get_data())
+            if response.status_code == 304:
+                text = entry['text']
+            elif response.status_code == 404:
+                # Linked but missing from app/static; requested on every load
+                text = ''
+            else:
+                assert response.status_code == 200, url
+                text = body_text(response)
+            cache_control = response.headers.get('Cache-Control', '')
+            cache[url] = {'etag': response.headers.get('ETag'), 'text': text,
+                          'fresh': 'max-age' in cache_control and 'no-cache' not in cache_control}
+            response.close()
+        if url.endswith(('.css', '.js')):
+            for reference in REFERENCES.findall(text):
+                if '://' not in reference:
+                    queue.append(posixpath.normpath(posixpath.join(posixpath.dirname(url), reference)))
+    return requests, size, code
+
+
+def main():
+    work = tempfile.mkdtemp(prefix='farmeye-assets-')
+    try:
+        static = os.path.join(work, 'static')
+        app = bench_app()
+        shutil.copytree(app.static_folder, static,
+                        ignore=lambda folder, names: [n for n in names if n in ('uploads', 'dist')]
+                        if folder == app.static_folder else [])
+        app.static_folder = static
+        from app import db
+        from app.utils.assets import brotli, static_assets
+
+        static_assets.init_app(app)
+        with app.app_context():
+            user = make_user(db)
+            make_farm(db, user)
+            user_id = user.id
+
+        def visits(label):
+            client = login_client(app, user_id)
+            cache = {}
+            for visit in ('first visit', 'repeat visit'):
+                requests, size, code = page_load(client, cache)
+                print(f'{label + ", " + visit:<45} {requests:3d} requests  {size / 1e3:8.1f} kB  '
+                      f'(CSS/JS {code / 1e3:6.1f} kB)')
+
+        visits('plain app/static')
+        started = time.perf_counter()
+        manifest = static_assets.build()
+        print(f'build-assets: {len(manifest["assets"])} files, {len(manifest["encodings"])} '
+              f'precompressed ({"br and gzip" if brotli else "gzip only, brotli not installed"}) '
+              f'in {time.perf_counter() - started:.2f} s')
+        visits('fingerprinted, precompressed')
+        print(f'stats: {static_assets.stats()}')
+    finally:
+        shutil.rmtree(work)
+
+
+if __name__ == '__main__':
+    main()
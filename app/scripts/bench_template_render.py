@@ -0,0 +1,97 @@
+# app/scripts/bench_template_render.py
+"""Cold first render and steady-state render of the dashboard.
+
+Each case runs in a fresh process, as a newly started worker would:
+create the app, optionally precompile all templates (as wsgi.py does
+before gunicorn forks), then time the first GET of main.index
+(dashboard/index.html with base.html and its partials) and the same
+request once everything is compiled. Cases:
+
+- no bytecode cache, compiled lazily on first render (as before)
+- precompiled into an empty bytecode cache (the first start after a deploy)
+- precompiled from the warm bytecode cache (every later start)
+- lazy, but loaded from the warm bytecode cache on first render
+
+What remains of the first render once the templates are compiled is the
+rest of a process's first request (SQLAlchemy, Flask-Login, ...).
+
+    python -m app.scripts.bench_template_render
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from app.scripts.bench_common import bench_app, login_client, make_farm, make_user, measure
+
+CASES = [
+    ('lazy, no bytecode cache', None, False),
+    ('precompiled, empty bytecode cache', 'empty', True),
+    ('precompiled, warm bytecode cache', 'warm', True),
+    ('lazy, warm bytecode cache', 'warm', False),
+]
+
+
+def child(cache_dir, precompile):
+    app = bench_app()
+    app.config['TEMPLATE_CACHE_DIR'] = cache_dir or None
+    app.config['TEMPLATE_PRECOMPILE'] = precompile
+    from app import db
+    from app.utils import templates
+
+    templates.init_app(app)
+    with app.app_context():
+        user = make_user(db)
+        make_farm(db, user)
+        user_id = user.id
+    client = login_client(app, user_id)
+    started = time.perf_counter()
+    compiled = templates.precompile_templates(app)
+    precompile_ms = (time.perf_counter() - started) * 1000
+
+    def render():
+        response = client.get('/')
+        assert response.status_code == 200
+        response.close()
+
+    first = time.perf_counter()
+    render()
+    first_ms = (time.perf_counter() - first) * 1000
+    steady = measure(render, repeat=200, warmup=5)
+    print(json.dumps({'compiled': compiled, 'precompile_ms': precompile_ms,
+                      'first_ms': first_ms, 'steady': steady}))
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child(sys.argv[2], sys.argv[3] == '1')
+        return
+
+    cache_dir = tempfile.mkdtemp(prefix='farmeye-templates-')
+    try:
+        print(f'{"case":<35} {"precompile":>10} {"first render":>13} {"steady p50":>11} {"p99":>8}')
+        for label, cache, precompile in CASES:
+            if cache == 'empty':
+                for name in os.listdir(cache_dir):
+                    os.remove(os.path.join(cache_dir, name))
+            output = subprocess.run(
+                [sys.executable, '-m', 'app.scripts.bench_template_render', '--child',
+                 cache_dir if cache else '', '1' if precompile else '0'],
+                capture_output=True, text=True, check=True,
+                env=dict(os.environ, PYTHONPATH=os.getcwd())).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            steady = result['steady']
+            precompiled = (f'{result["precompile_ms"]:8.1f} ms' if result['compiled']
+                           else f'{"-":>11}')
+            print(f'{label:<35} {precompiled} {result["first_ms"]:10.1f} ms '
+                  f'{steady["p50"]:8.2f} ms {steady["p99"]:5.2f} ms')
+        print(f'bytecode cache: {len(os.listdir(cache_dir))} templates in {cache_dir}')
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# app/scripts/bench_tiled_inference.py
+"""Throughput and recall of tiled inference against whole-image inference.
+
+Frames of app/utils/corn_2.mp4 are upscaled to 12 MP JPEGs, like the field
+photos uploaded from phones and drones. Whole-image inference decodes at
+reduced size and letterboxes to DETECTOR_IMGSZ; tiled inference decodes at
+full resolution and runs DETECTOR_TILE_SIZE tiles in batches of 1 and of
+DETECTOR_TILE_BATCH. Reports images/s for each, and how many of the
+whole-image detections the tiled run finds again (recall) next to how many
+it adds. Also times the NMS that merges tiles against OpenCV's NMSBoxes,
+which can't do intersection-over-smaller, on the same candidate boxes.
+
+The inference columns need the configured backend's model to load.
+"""
+
+import time
+import cv2
+import numpy as np
+from app.config import Config
+from app.feed.detector import YoloDetector
+from app.feed.preprocess import decode_image
+from app.feed.tiling import SEAM_OVERLAP, nms, tile_windows
+from app.scripts.bench_detector_backends import read_frames
+from app.scripts.bench_detector_sizes import UPLOAD_SIZE, agreement
+
+FRAMES = 10
+
+
+def per_second(fn, items):
+    started = time.perf_counter()
+    results = [fn(item) for item in items]
+    return len(items) / (time.perf_counter() - started), results
+
+
+def candidate_boxes(count, width, height, rng):
+    xy = rng.uniform(0, [width, height], (count, 2))
+    wh = rng.uniform(10, 120, (count, 2))
+    return np.concatenate([xy, xy + wh], axis=1), rng.uniform(0.25, 1, count), rng.integers(0, 2, count)
+
+
+def bench_nms(width, height):
+    rng = np.random.default_rng(0)
+    for count in (100, 300, 1000):
+        boxes, scores, class_ids = candidate_boxes(count, width, height, rng)
+        started = time.perf_counter()
+        nms(boxes, scores, SEAM_OVERLAP, class_ids, metric='ios')
+        ours = (time.perf_counter() - started) * 1000
+        shifted = boxes + (class_ids * (width + height))[:, None]
+        xywh = np.concatenate([shifted[:, :2], shifted[:, 2:] - shifted[:, :2]], axis=1)
+        started = time.perf_counter()
+        cv2.dnn.NMSBoxes(xywh.tolist(), scores.tolist(), 0.0, SEAM_OVERLAP)
+        opencv = (time.perf_counter() - started) * 1000
+        print(f'  merge {count:>4} boxes  nms {ours:7.2f} ms  cv2.dnn.NMSBoxes {opencv:7.2f} ms')
+
+
+def main():
+    uploads = [cv2.imencode('.jpg', cv2.resize(frame, UPLOAD_SIZE, interpolation=cv2.INTER_CUBIC),
+                            [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+               for frame in read_frames(FRAMES)]
+    windows = tile_windows(*UPLOAD_SIZE, Config.DETECTOR_TILE_SIZE, Config.DETECTOR_TILE_OVERLAP)
+    print(f'{len(uploads)} uploads of {UPLOAD_SIZE[0]}x{UPLOAD_SIZE[1]}, '
+          f'{len(windows)} tiles of {Config.DETECTOR_TILE_SIZE} at overlap {Config.DETECTOR_TILE_OVERLAP}, '
+          f'backend {Config.DETECTOR_BACKEND}')
+    bench_nms(*UPLOAD_SIZE)
+
+    detector = YoloDetector.from_config(vars(Config))
+    if not detector.load_model():
+        print('detector not loadable: skipping throughput and recall')
+        return
+
+    def whole(data):
+        frame, scale, _ = decode_image(data, Config.DETECTOR_IMGSZ)
+        return detector.detect(frame, imgsz=Config.DETECTOR_IMGSZ, scale=scale)
+
+    def tiled(data):
+        frame, scale, _ = decode_image(data, None)
+        return detector.detect(frame, scale=scale, tiled=True)
+
+    rate, reference = per_second(whole, uploads)
+    print(f'whole image      {rate:6.2f} images/s  {sum(map(len, reference)) / len(uploads):6.1f} detections/image')
+    for batch in (1, Config.DETECTOR_TILE_BATCH):
+        detector.tile_batch = batch
+        rate, detections = per_second(tiled, uploads)
+        scores = [agreement(ref, det) for ref, det in zip(reference, detections)]
+        recall = sum(s[0] for s in scores) / len(scores)
+        print(f'tiled, batch {batch:<3} {rate:6.2f} images/s  {sum(map(len, detections)) / len(uploads):6.1f} '
+              f'detections/image  recall of whole-image detections {recall:.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+# app/scripts/bench_token_auth.py
+"""Compare per-request authentication cost of sessions and bearer tokens.
+
+Times GET /api/user-profile authenticated by a session cookie with the
+user loaded from the database, by a session cookie with the cached user
+snapshot, and by a signed bearer token, and counts SQL statements for each.
+"""
+
+from app import db
+from app.auth import user_cache
+from app.auth.models import User
+from app.auth.tokens import issue_token, decode_token
+from app.scripts.bench_common import (bench_app, make_user, make_farm, login_client, count_queries,
+                                      measure, report)
+
+PATH = '/api/user-profile'
+
+
+def main():
+    app = bench_app()
+    snapshot_paths = app.config['USER_SNAPSHOT_PATHS']
+    with app.app_context():
+        user = make_user(db)
+        make_farm(db, user)
+        user_id = user.id
+        token = issue_token(db.session.get(User, user_id))
+        engine = db.engine
+        report('decode_token alone', measure(lambda: decode_token(token), repeat=2000))
+
+    session_client = login_client(app, user_id)
+    token_client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    cases = (
+        ('session, user loaded from DB', session_client, {}, []),
+        ('session, cached snapshot', session_client, {}, snapshot_paths),
+        ('bearer token', token_client, {'headers': headers}, snapshot_paths),
+    )
+    for label, client, kwargs, paths in cases:
+        app.config['USER_SNAPSHOT_PATHS'] = paths
+        user_cache.clear()
+        assert client.get(PATH, **kwargs).status_code == 200
+        queries = count_queries(engine, client, PATH, **kwargs)
+        report(f'{label} ({queries} queries)', measure(lambda: client.get(PATH, **kwargs), repeat=1000))
+
+
+if __name__ == '__main__':
+    main()
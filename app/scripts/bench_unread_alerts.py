@@ -0,0 +1,71 @@
+# app/scripts/bench_unread_alerts.py
+"""Benchmark the notification badge for a user with 100k alerts.
+
+Compares materializing every unread alert (the old main.index behaviour)
+against reading the maintained counter, and times /api/alerts/unread-count.
+"""
+
+from datetime import datetime, timedelta
+
+from app import db
+from app.farm.models import Alert
+from app.scripts.bench_common import bench_app, make_user, make_farm, login_client, measure, report
+
+ALERT_COUNT = 100_000
+
+
+def seed_alerts(user, farm, count=ALERT_COUNT):
+    """Bulk insert alerts, then rebuild counters since bulk inserts skip listeners"""
+    from app.farm.models import rebuild_unread_alert_counts
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            'farm_id': farm.id,
+            'user_id': user.id,
+            'created_at': now - timedelta(seconds=i),
+            'alert_type': 'Bench',
+            'message': 'Benchmark alert',
+            'severity': 'low',
+            'is_read': i % 10 == 0,
+        }
+        for i in range(count)
+    ]
+    db.session.execute(db.insert(Alert), rows)
+    db.session.commit()
+    rebuild_unread_alert_counts()
+
+
+def main():
+    app = bench_app()
+    with app.app_context():
+        user = make_user(db)
+        farm = make_farm(db, user)
+        seed_alerts(user, farm)
+        user_id = user.id
+
+        def materialize():
+            alerts = Alert.query.filter_by(user_id=user_id, is_read=False).all()
+            db.session.expunge_all()
+            return len(alerts)
+
+        def count_query():
+            return Alert.query.filter_by(user_id=user_id, is_read=False).count()
+
+        def counter():
+            db.session.expire_all()
+            return db.session.get(type(user), user_id).unread_alert_count
+
+        assert materialize() == count_query() == counter()
+        print(f'{ALERT_COUNT} alerts, {counter()} unread')
+        report('materialize unread alerts (old)', measure(materialize, repeat=10, warmup=1))
+        report('COUNT(*) over unread alerts', measure(count_query, repeat=50))
+        report('maintained counter', measure(counter))
+
+        client = login_client(app, user_id)
+        report('GET /api/alerts/unread-count', measure(
+            lambda: client.get('/api/alerts/unread-count')))
+
+
+if __name__ == '__main__':
+    main()
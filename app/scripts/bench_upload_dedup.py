@@ -0,0 +1,127 @@
+# app/scripts/bench_upload_dedup.py
+"""Throughput and disk use of content-addressed image uploads.
+
+A duplicate-heavy dataset - UPLOADS uploads drawn from DISTINCT photos
+with a skewed distribution, like a camera re-sending the same shots - is
+stored twice: with the old per-upload uuid files (FileStorage.save) and
+with app/farm/storage.py's hashing copy. Then the same uploads are posted
+to farm.upload_image end to end, with image processing run inline so a
+duplicate finds its original's results, and the processing jobs avoided
+are counted.
+"""
+
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+import cv2
+import numpy as np
+from werkzeug.datastructures import FileStorage
+from app.farm.storage import store_stream
+from app.scripts.bench_common import bench_app, login_client, make_farm, make_user
+
+DISTINCT = 40
+UPLOADS = 400
+SIZE = (1600, 1200)
+
+
+def make_photos(count, rng):
+    """JPEG bytes of count distinct noisy photos, about 1 MB each"""
+    photos = []
+    for i in range(count):
+        base = np.full((SIZE[1], SIZE[0], 3), (40 + i, 120, 60), np.uint8)
+        noise = rng.integers(0, 60, base.shape, dtype=np.uint8)
+        photos.append(cv2.imencode('.jpg', base + noise, [cv2.IMWRITE_JPEG_QUALITY, 85])[1].tobytes())
+    return photos
+
+
+def disk_usage(folder):
+    """(bytes in files, files) under folder"""
+    total = files = 0
+    for root, _, names in os.walk(folder):
+        for name in names:
+            total += os.path.getsize(os.path.join(root, name))
+            files += 1
+    return total, files
+
+
+def run(label, uploads, store):
+    started = time.perf_counter()
+    for data in uploads:
+        store(data)
+    elapsed = time.perf_counter() - started
+    megabytes = sum(map(len, uploads)) / 1e6
+    print(f'{label:<32} {len(uploads) / elapsed:7.1f} uploads/s  {megabytes / elapsed:7.1f} MB/s')
+
+
+def main():
+    uploads_count = int(sys.argv[1]) if len(sys.argv) > 1 else UPLOADS
+    rng = np.random.default_rng(0)
+    photos = make_photos(DISTINCT, rng)
+    # Zipf-like: a few shots are re-sent over and over
+    weights = [1 / (i + 1) for i in range(DISTINCT)]
+    uploads = random.Random(0).choices(photos, weights, k=uploads_count)
+    distinct = len({id(p) for p in uploads})
+    print(f'{uploads_count} uploads of {distinct} distinct photos, '
+          f'{sum(map(len, uploads)) / 1e6:.0f} MB in total')
+
+    work = tempfile.mkdtemp(prefix='farmeye-uploads-')
+    try:
+        old_folder = os.path.join(work, 'old')
+        new_folder = os.path.join(work, 'new')
+        os.makedirs(old_folder)
+
+        def save_uuid(data):
+            FileStorage(io.BytesIO(data), 'photo.jpg').save(
+                os.path.join(old_folder, f'{uuid.uuid4().hex}_photo.jpg'))
+
+        run('uuid files (before)', uploads, save_uuid)
+        run('content-addressed', uploads,
+            lambda data: store_stream(io.BytesIO(data), new_folder, '.jpg'))
+        for label, folder in (('uuid files', old_folder), ('content-addressed', new_folder)):
+            size, files = disk_usage(folder)
+            print(f'{label:<32} {size / 1e6:7.1f} MB on disk in {files} files')
+
+        app = bench_app()
+        app.config['UPLOAD_FOLDER'] = os.path.join(work, 'route')
+        from app import db
+        from app.farm.models import Alert, FarmImage
+        from app.ml import utils as ml_utils
+
+        # Process inline instead of after the simulated delay, so repeats find the results
+        processed = []
+
+        def process_inline(image_id):
+            processed.append(image_id)
+            ml_utils._process_image(app, image_id)
+
+        ml_utils.process_farm_image = process_inline
+
+        with app.app_context():
+            user = make_user(db)
+            farm = make_farm(db, user)
+            user_id, farm_id = user.id, farm.id
+        client = login_client(app, user_id)
+
+        def post(data):
+            response = client.post(f'/farm/upload_image/{farm_id}', data={
+                'image': (io.BytesIO(data), 'photo.jpg'), 'image_type': 'soil'})
+            assert response.status_code == 302, response.status_code
+
+        run('farm.upload_image end to end', uploads, post)
+        with app.app_context():
+            images = FarmImage.query.count()
+            alerts = Alert.query.count()
+        size, files = disk_usage(app.config['UPLOAD_FOLDER'])
+        print(f'{images} images, {len(processed)} processing jobs ({images - len(processed)} reused), '
+              f'{alerts} alerts, {size / 1e6:.1f} MB on disk in {files} files')
+    finally:
+        shutil.rmtree(work)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+# app/scripts/bench_user_loader.py
+"""Measure the cost of resolving the session user on hot API paths.
+
+Counts SQL statements per request and times /api/user-profile and
+/api/alerts/unread-count with the cached snapshot loader enabled and with
+it disabled (USER_SNAPSHOT_PATHS emptied).
+"""
+
+from app import db
+from app.auth import user_cache
+from app.scripts.bench_common import bench_app, make_user, make_farm, login_client, count_queries, measure, report
+
+PATHS = ['/api/user-profile', '/api/alerts/unread-count']
+
+
+def main():
+    app = bench_app()
+    snapshot_paths = app.config['USER_SNAPSHOT_PATHS']
+    with app.app_context():
+        user = make_user(db)
+        make_farm(db, user)
+        user_id = user.id
+        engine = db.engine
+
+    # Requests must run outside an app context so each gets a fresh g and session
+    client = login_client(app, user_id)
+    for label, paths in (('session load', []), ('cached snapshot', snapshot_paths)):
+        app.config['USER_SNAPSHOT_PATHS'] = paths
+        user_cache.clear()
+        client.get(PATHS[0])  # prime the cache
+        for path in PATHS:
+            queries = count_queries(engine, client, path)
+            report(f'{label}: {path} ({queries} queries)',
+                   measure(lambda: client.get(path), repeat=500))
+    print(f"cache stats: {user_cache.stats}")
+
+
+if __name__ == '__main__':
+    main()
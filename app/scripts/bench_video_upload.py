@@ -0,0 +1,150 @@
+# app/scripts/bench_video_upload.py
+"""Memory and throughput of a large chunked, resumable video upload.
+
+Starts the production setup (gunicorn.conf.py, wsgi:app, one sync worker)
+and uploads SIZE bytes through /api/uploads/videos in VIDEO_CHUNK_SIZE
+chunks, reading the worker's resident memory from /proc after every
+chunk. Halfway through, one chunk is cut off mid-body, as a dropped link
+would, and the upload resumes from the offset the server reports.
+
+    python -m app.scripts.bench_video_upload [size in MiB, default 2048]
+
+The bytes are not a real video, so the analysis the upload hands over to
+ends as "failed"; the detector needs ultralytics and the weights anyway.
+"""
+
+import base64
+import hashlib
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from app.scripts.bench_common import bench_app, free_port, make_farm, make_user, session_cookie, wait_for_port
+from app.scripts.bench_model_memory import children
+
+CHUNK = 8 * 1024 * 1024
+
+
+def rss_mib(pid):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+
+
+def chunk_bytes(index):
+    """Deterministic, incompressible CHUNK-sized block"""
+    seed = hashlib.sha256(index.to_bytes(8, 'big')).digest()
+    return (seed * (CHUNK // len(seed) + 1))[:CHUNK - 64] + os.urandom(64)
+
+
+def cut_off_chunk(port, cookie, url, offset, chunk):
+    """Send half of a chunk's body, then drop the connection"""
+    checksum = base64.b64encode(hashlib.sha256(chunk).digest()).decode()
+    head = (f'PATCH {url} HTTP/1.1\r\nHost: 127.0.0.1\r\nCookie: session={cookie}\r\n'
+            f'Upload-Offset: {offset}\r\nUpload-Checksum: sha256 {checksum}\r\n'
+            f'Content-Type: application/octet-stream\r\nContent-Length: {len(chunk)}\r\n\r\n')
+    with socket.create_connection(('127.0.0.1', port)) as sock:
+        sock.sendall(head.encode() + chunk[:len(chunk) // 2])
+
+
+def main():
+    size = (int(sys.argv[1]) if len(sys.argv) > 1 else 2048) * 1024 * 1024
+    work = tempfile.mkdtemp(prefix='farmeye-video-')
+    db_path = os.path.join(work, 'bench.sqlite')
+    port = free_port()
+    env = dict(
+        os.environ,
+        FLASK_CONFIG='production',
+        DATABASE_URL='sqlite:///' + db_path,
+        UPLOAD_FOLDER=os.path.join(work, 'uploads'),
+        DETECTOR_MODE='worker',
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        GUNICORN_WORKER_CLASS='sync',
+        WEB_CONCURRENCY='1',
+        GUNICORN_TIMEOUT='120',
+        GUNICORN_LOGLEVEL='warning',
+    )
+    os.environ['TEST_DATABASE_URL'] = 'sqlite:///' + db_path
+    from app import db
+
+    app = bench_app()
+    with app.app_context():
+        user = make_user(db)
+        farm_id = make_farm(db, user).id
+        cookie = session_cookie(app, user.id)
+
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port, timeout=120)
+        client = httpx.Client(base_url=f'http://127.0.0.1:{port}', cookies={'session': cookie},
+                              timeout=120)
+        chunks = -(-size // CHUNK)
+        blocks = {}  # the last chunk made, resent after the cut-off
+
+        def block(index):
+            if index not in blocks:
+                blocks.clear()
+                blocks[index] = chunk_bytes(index)[:size - index * CHUNK]
+            return blocks[index]
+
+        response = client.post('/api/uploads/videos', json={
+            'farm_id': farm_id, 'filename': 'field.mp4', 'size': size})
+        assert response.status_code == 201, response.text
+        url = response.json()['url']
+        worker = children(server.pid)[0]
+        samples = [rss_mib(worker)]
+        print(f'{size / 2 ** 20:.0f} MiB in {chunks} chunks of {CHUNK // 2 ** 20} MiB; '
+              f'worker RSS before: {samples[0]:.1f} MiB')
+
+        whole = hashlib.sha256()
+        offset, index, resumed = 0, 0, False
+        started = time.perf_counter()
+        while offset < size:
+            index = offset // CHUNK
+            data = block(index)
+            if not resumed and index == chunks // 2:
+                cut_off_chunk(port, cookie, url, offset, data)
+                time.sleep(0.5)
+                offset = int(client.get(url).headers['Upload-Offset'])
+                resumed = True
+                print(f'connection dropped mid-chunk at {offset / 2 ** 20:.0f} MiB; '
+                      f'server offset {offset}, resuming')
+                continue
+            checksum = base64.b64encode(hashlib.sha256(data).digest()).decode()
+            response = client.patch(url, content=data, headers={
+                'Upload-Offset': str(offset), 'Upload-Checksum': f'sha256 {checksum}',
+                'Content-Type': 'application/octet-stream'})
+            assert response.status_code == 200, response.text
+            whole.update(data)
+            offset = int(response.headers['Upload-Offset'])
+            samples.append(rss_mib(worker))
+        elapsed = time.perf_counter() - started
+        response = client.post(f'{url}/complete')
+        print(f'complete: {response.status_code} {response.json()["status"]}')
+        time.sleep(1)
+        status = client.get(url).json()
+        print(f'after analysis: {status["status"]} {status.get("results", {}).get("error", "")}')
+
+        path = os.path.join(work, 'uploads', 'videos', url.rsplit('/', 1)[1] + '.mp4')
+        with open(path, 'rb') as f:
+            stored = hashlib.file_digest(f, 'sha256').hexdigest()
+        print(f'file on disk: {os.path.getsize(path)} bytes, sha256 '
+              f'{"matches" if stored == whole.hexdigest() else "DIFFERS"}')
+        print(f'throughput: {size / 2 ** 20 / elapsed:.0f} MiB/s over loopback')
+        print(f'worker RSS during upload: min {min(samples):.1f}, max {max(samples):.1f}, '
+              f'last {samples[-1]:.1f} MiB ({len(samples)} samples)')
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(work)
+
+
+if __name__ == '__main__':
+    main()
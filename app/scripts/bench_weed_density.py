@@ -0,0 +1,98 @@
+# app/scripts/bench_weed_density.py
+"""Update and read cost of the per-field weed-density heatmaps.
+
+A 300 x 200 m field is walked by a simulated camera sending frames with
+random maize/weed detections. Reports the per-frame cost of
+DensityAggregator.record() including its periodic flushes to the
+database, the stored grid size, and the latency of the summary and tile
+endpoints, with the decoded grid cached and right after a flush.
+"""
+
+import math
+import random
+import time
+from app.farm.density import TILE_SIZE, weed_density
+from app.scripts.bench_common import bench_app, login_client, make_farm, make_user, measure, report
+
+FRAMES = 20000
+ORIGIN = (-1.2921, 36.8219)
+FIELD_METERS = (300, 200)
+
+
+def make_field(db, farm):
+    """Insert a rectangular field of FIELD_METERS with its corner markers"""
+    from app.farm.models import BoundaryMarker, Field
+
+    field = Field(name='Bench Field', farm_id=farm.id)
+    db.session.add(field)
+    db.session.flush()
+    dlat = FIELD_METERS[1] / 111_320
+    dlon = FIELD_METERS[0] / (111_320 * math.cos(math.radians(ORIGIN[0])))
+    for lat, lon in ((0, 0), (0, dlon), (dlat, dlon), (dlat, 0)):
+        db.session.add(BoundaryMarker(field_id=field.id, latitude=ORIGIN[0] + lat,
+                                      longitude=ORIGIN[1] + lon))
+    db.session.commit()
+    return field, dlat, dlon
+
+
+def tile_for(lat, lon, z):
+    n = 2 ** z
+    x = int((lon + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return x, y
+
+
+def main():
+    app = bench_app('development')
+    from app import db
+
+    with app.app_context():
+        user = make_user(db)
+        field, dlat, dlon = make_field(db, make_farm(db, user))
+        weed_density.init_app(app)
+        rng = random.Random(0)
+        frames = []
+        for i in range(FRAMES):
+            # Back and forth along rows, like a walk down the crop lines
+            row = (i // 500) % 40
+            along = (i % 500) / 500
+            lat = ORIGIN[0] + dlat * (row + 0.5) / 40
+            lon = ORIGIN[1] + dlon * (along if row % 2 == 0 else 1 - along)
+            detections = [{'class': rng.choice(('maize', 'maize', 'weed'))}
+                          for _ in range(rng.randint(0, 12))]
+            frames.append((lat, lon, detections))
+
+        started = time.perf_counter()
+        for lat, lon, detections in frames:
+            weed_density.record(field.id, lat, lon, detections)
+        weed_density.flush_all()
+        elapsed = time.perf_counter() - started
+        stats = weed_density.stats()
+        print(f'record: {FRAMES} frames in {elapsed:.2f}s, {elapsed / FRAMES * 1e6:.0f} us/frame, '
+              f'{FRAMES / elapsed:,.0f} frames/s, {stats["flushes"]} flushes '
+              f'(every {app.config["HEATMAP_FLUSH_FRAMES"]} frames)')
+
+        from app.farm.models import FieldDensityGrid
+        grid = FieldDensityGrid.query.filter_by(field_id=field.id).one()
+        print(f'grid: {grid.rows}x{grid.cols} cells of {grid.cell_meters:.0f} m, '
+              f'{len(grid.layers):,} bytes stored, {grid.frames} frames, '
+              f'{grid.weed_count} weeds, {grid.cells_observed} cells observed')
+
+        client = login_client(app, user.id)
+        x, y = tile_for(ORIGIN[0] + dlat / 2, ORIGIN[1] + dlon / 2, 18)
+        tile = f'/api/fields/{field.id}/weed-density/18/{x}/{y}.png'
+        assert client.get(tile).status_code == 200
+        report('summary', measure(lambda: client.get(f'/api/fields/{field.id}/weed-density')))
+        report(f'tile {TILE_SIZE}px (grid cached)', measure(lambda: client.get(tile)))
+
+        def after_flush():
+            weed_density.record(field.id, *frames[0][:2], frames[0][2])
+            weed_density.flush(field.id)
+            weed_density._grids.clear()
+            return client.get(tile)
+
+        report('flush + tile (grid decoded)', measure(after_flush, repeat=50))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+# app/scripts/loadtest.py
+"""Reproducible load test of the production gunicorn setup per worker class.
+
+Seeds a throwaway SQLite database (FARMS users with a farm, fields, sensor
+readings and alerts each), starts a stub OpenWeather server, then for each
+worker class runs `gunicorn wsgi:app` with gunicorn.conf.py and drives a
+weighted mix of the main pages and JSON endpoints with concurrent logged-in
+clients for a fixed time. Prints requests/sec, p50 and p99 per worker class.
+
+    python -m app.scripts.loadtest --workers 2 --duration 20 --concurrency 32
+
+Needs gunicorn and httpx (and gevent for the gevent worker class). The load
+generator runs on the same machine, so compare runs from one host only.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+import httpx
+from app.scripts.bench_common import (bench_app, make_user, make_farm, session_cookie, free_port,
+                                      wait_for_port, start_weather_stub)
+
+FARMS = 20
+READINGS_PER_FARM = 500
+ALERTS_PER_FARM = 200
+
+# (path, weight): roughly what an open dashboard plus some page views produce
+ROUTES = (
+    ('/', 2),
+    ('/farm/alerts', 1),
+    ('/farm/view/{farm_id}', 1),
+    ('/api/dashboard-data', 4),
+    ('/api/alerts/unread-count', 4),
+    ('/api/alerts', 2),
+    ('/farm/get_farms', 2),
+    ('/api/user-profile', 2),
+    ('/weather/api/forecast/Nairobi', 1),
+)
+
+
+def seed():
+    """Populate the database and return [(session cookie, farm id)] per user"""
+    from app import db
+    from app.farm.models import Alert, BoundaryMarker, Field, Sensor, SensorData
+
+    app = bench_app()
+    clients = []
+    with app.app_context():
+        now = datetime.utcnow()
+        for i in range(FARMS):
+            user = make_user(db, email=f'load{i}@example.com')
+            farm = make_farm(db, user, name=f'Load Farm {i}')
+            farm.location = f'{-1.2 - i / 100:.4f},{36.8 + i / 100:.4f}'
+            sensor = Sensor(farm_id=farm.id, sensor_type='soil_moisture', location='Field A')
+            db.session.add(sensor)
+            db.session.flush()
+            for f in range(3):
+                field = Field(name=f'Field {f}', farm_id=farm.id)
+                db.session.add(field)
+                db.session.flush()
+                db.session.add_all(BoundaryMarker(field_id=field.id, latitude=-1.2 + m / 1000,
+                                                  longitude=36.8 + m / 1000) for m in range(8))
+            db.session.add_all(
+                SensorData(sensor_id=sensor.id, farm_id=farm.id, user_id=user.id,
+                           sensor_type='soil_moisture', value=55 + r % 10, unit='%',
+                           timestamp=now - timedelta(minutes=15 * r))
+                for r in range(READINGS_PER_FARM))
+            db.session.add_all(
+                Alert(farm_id=farm.id, user_id=user.id, alert_type='Pest Alert',
+                      message=f'Alert {a}', severity='medium', is_read=a % 3 == 0,
+                      created_at=now - timedelta(hours=a))
+                for a in range(ALERTS_PER_FARM))
+            db.session.commit()
+            clients.append((session_cookie(app, user.id), farm.id))
+    return clients
+
+
+async def drive(port, clients, duration, concurrency):
+    """Run the route mix for duration seconds and return per-request results"""
+    paths = [path for path, _ in ROUTES]
+    weights = [weight for _, weight in ROUTES]
+    results = []
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', limits=limits,
+                                 timeout=60) as client:
+
+        async def user_loop(rng):
+            cookie, farm_id = rng.choice(clients)
+            headers = {'Cookie': f'session={cookie}'}
+            while time.monotonic() < deadline:
+                path = rng.choices(paths, weights)[0].format(farm_id=farm_id)
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path, headers=headers)
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                results.append((path, (time.perf_counter() - start) * 1000, ok))
+
+        await asyncio.gather(*(user_loop(random.Random(n)) for n in range(concurrency)))
+    return results
+
+
+def summarize(results, duration):
+    latencies = sorted(ms for _, ms, ok in results if ok)
+    errors = sum(1 for _, _, ok in results if not ok)
+    if not latencies:
+        return 0.0, 0.0, 0.0, errors
+    return (len(latencies) / duration, latencies[len(latencies) // 2],
+            latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--worker-classes', default='sync,gthread,gevent')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--upstream-delay', type=float, default=0.1,
+                        help='seconds the stub OpenWeather takes to answer')
+    args = parser.parse_args()
+
+    upstream, upstream_url = start_weather_stub(args.upstream_delay)
+    fd, db_path = tempfile.mkstemp(suffix='.sqlite', prefix='farmeye-load-')
+    os.close(fd)
+    port = free_port()
+    # Copied before seeding: importing the app loads .env, whose SECRET_KEY
+    # would otherwise reach the servers but not the app that signs the cookies
+    env = dict(
+        os.environ,
+        FLASK_CONFIG='production',
+        DATABASE_URL='sqlite:///' + db_path,
+        OPENWEATHER_BASE_URL=upstream_url,
+        OPENWEATHER_API_KEY='loadtest',
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        WEB_CONCURRENCY=str(args.workers),
+        GUNICORN_THREADS=str(args.threads),
+        GUNICORN_LOGLEVEL='warning',
+    )
+    os.environ['TEST_DATABASE_URL'] = 'sqlite:///' + db_path
+    clients = seed()
+
+    print(f'{args.workers} workers, {args.concurrency} clients, {args.duration:.0f}s per run, '
+          f'upstream {args.upstream_delay * 1000:.0f} ms')
+    for worker_class in args.worker_classes.split(','):
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app']
+        server = subprocess.Popen(command, env=dict(env, GUNICORN_WORKER_CLASS=worker_class),
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_port(port)
+            results = asyncio.run(drive(port, clients, args.duration, args.concurrency))
+        finally:
+            server.terminate()
+            server.wait()
+        rps, p50, p99, errors = summarize(results, args.duration)
+        print(f'{worker_class:<8} {rps:8.1f} req/s  p50={p50:8.1f} ms  p99={p99:8.1f} ms  '
+              f'errors={errors}')
+    upstream.shutdown()
+    os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -413,6 +413,8 @@ document.addEventListener('DOMContentLoaded', function() {
             // Create form data
             const formData = new FormData();
             formData.append('image', blob, 'frame.jpg');
+            // Lets the server skip the model while this camera's view is unchanged
+            formData.append('stream_id', `camera-${currentCameraIndex}`);
             
             // Send to detection API
             const response = await fetch('/feed/detect', {
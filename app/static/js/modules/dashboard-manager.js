@@ -7,6 +7,8 @@ export class DashboardManager {    constructor() {
         this.api = new API();
         this.charts = new Map();
         this.refreshInterval = null;
+        this.eventSource = null;
+        this.refreshTimer = null;
         this.setupEventListeners();
         this.initializeCharts();
     }    setupEventListeners() {
@@ -133,17 +135,54 @@ export class DashboardManager {    constructor() {
         const isEnabled = toggleSwitch.classList.toggle('on');
         toggleSwitch.classList.toggle('off', !isEnabled);
 
-        if (this.refreshInterval) {
-            clearInterval(this.refreshInterval);
-            this.refreshInterval = null;
-        }
+        this.stopLiveUpdates();
 
         if (isEnabled) {
-            this.refreshInterval = setInterval(() => this.refreshData(), 60000);
+            this.startLiveUpdates();
             localStorage.setItem('autoRefreshEnabled', 'true');
         } else {
             localStorage.setItem('autoRefreshEnabled', 'false');
         }
+    }
+
+    startLiveUpdates() {
+        // Keep polling even with events: a stream only hears about writes handled
+        // by its own worker process. Unchanged data answers with 304 Not Modified.
+        this.refreshInterval = setInterval(() => this.refreshData(), 60000);
+        if (!window.EventSource) {
+            return;
+        }
+
+        // Events refetch as soon as the server reports a change
+        this.eventSource = new EventSource('/api/events');
+        ['alert', 'sensor_reading', 'stage', 'resync'].forEach(type => {
+            this.eventSource.addEventListener(type, () => this.scheduleRefresh());
+        });
+        this.eventSource.onerror = () => {
+            // EventSource retries by itself; if it gave up, the poll carries on alone
+            if (this.eventSource && this.eventSource.readyState === EventSource.CLOSED) {
+                this.eventSource.close();
+                this.eventSource = null;
+            }
+        };
+    }
+
+    stopLiveUpdates() {
+        if (this.refreshInterval) {
+            clearInterval(this.refreshInterval);
+            this.refreshInterval = null;
+        }
+        if (this.eventSource) {
+            this.eventSource.close();
+            this.eventSource = null;
+        }
+        clearTimeout(this.refreshTimer);
+    }
+
+    scheduleRefresh() {
+        // Coalesce bursts of events (e.g. a batch of sensor readings) into one fetch
+        clearTimeout(this.refreshTimer);
+        this.refreshTimer = setTimeout(() => this.refreshData(), 1000);
     }    updateDashboard(data) {
         if (!data) return;
         
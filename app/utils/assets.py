@@ -0,0 +1,249 @@
+# app/utils/assets.py
+"""Fingerprinted, precompressed static files.
+
+`flask build-assets` copies every file under app/static, except uploads
+and the build folder itself, to static/ASSET_BUILD_FOLDER with a hash of
+its content in the name (css/main.css -> dist/css/main.1a2b3c4d5e6f.css)
+and writes manifest.json mapping one to the other. References between
+the files (CSS @import and url(), ES module imports) are rewritten to the
+fingerprinted names first, so a change to a module also renames every
+file importing it. Text files get .gz copies and, with the brotli package
+installed, .br copies, compressed once at the highest level. Earlier
+builds are left in place for pages still referring to them.
+
+With a manifest and ASSET_FINGERPRINTS on, url_for("static", filename=...)
+returns the fingerprinted URL, so templates stay as they are. The static
+view serves those files with a year-long immutable Cache-Control and the
+smallest copy the client's Accept-Encoding allows, as it does for any
+folder listed in ASSET_IMMUTABLE_PATHS. Files under ASSET_PRIVATE_PATHS
+(uploads, which may sit under app/static) are not served at all: farm
+images go through the farm routes, which check who is asking. Everything
+else is served as Flask always has.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import threading
+from flask import abort, current_app, request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # optional, see requirements.txt
+    brotli = None
+
+MANIFEST = "manifest.json"
+HASH_LENGTH = 12
+COMPRESSIBLE = {".css", ".js", ".mjs", ".json", ".svg", ".html", ".txt", ".xml", ".map"}
+MIN_COMPRESS_SIZE = 256  # bytes; below this the headers outweigh the savings
+ENCODINGS = {"br": ".br", "gzip": ".gz"}  # in order of preference
+
+_CSS_REFERENCE = re.compile(r"""(@import\s+(?:url\(\s*)?|url\(\s*)(['"]?)([^'"()\s]+)\2""")
+_JS_IMPORT = re.compile(r"""(\bfrom\s*|\bimport\s*\(?\s*)(['"])(\.{1,2}/[^'"]+)\2""")
+
+
+def _compress(data):
+    """{encoding: bytes} of the precompressed copies worth keeping"""
+    copies = {"gzip": gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        copies["br"] = brotli.compress(data, quality=11)
+    return {encoding: body for encoding, body in copies.items() if len(body) < len(data)}
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+
+def build_assets(static_folder, build_folder, skip=("uploads",)):
+    """Fingerprint and precompress the files under static_folder into build_folder
+
+    build_folder lies inside static_folder; top-level folders named in skip
+    are left out. Returns the manifest, which is also written to
+    build_folder/manifest.json (last, so readers never see a partial one).
+    """
+    prefix = os.path.relpath(build_folder, static_folder).replace(os.sep, "/")
+    skipped = set(skip) | {prefix.split("/")[0]}
+    sources = {}
+    for root, dirs, files in os.walk(static_folder):
+        folder = os.path.relpath(root, static_folder).replace(os.sep, "/")
+        if folder == ".":
+            dirs[:] = [d for d in dirs if d not in skipped]
+            folder = ""
+        for filename in files:
+            if not filename.startswith("."):
+                sources[posixpath.join(folder, filename)] = os.path.join(root, filename)
+
+    hashed, encodings, visiting = {}, {}, set()
+
+    def rewrite(name, match, reference):
+        path = reference.split("?")[0].split("#")[0]
+        if "://" in path or path.startswith(("data:", "/", "#")) or not path:
+            return match.group(0)
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(name), path))
+        if target not in sources:
+            return match.group(0)
+        # A cycle of imports keeps its back reference on the plain file
+        if target in visiting:
+            dest = target
+        else:
+            dest = posixpath.join(prefix, fingerprint(target))
+        relative = posixpath.relpath(dest, posixpath.dirname(posixpath.join(prefix, name)))
+        if reference.startswith("./") and not relative.startswith("../"):
+            relative = "./" + relative
+        return match.group(0).replace(path, relative, 1)
+
+    def fingerprint(name):
+        if name in hashed:
+            return hashed[name]
+        visiting.add(name)
+        with open(sources[name], "rb") as f:
+            data = f.read()
+        extension = posixpath.splitext(name)[1].lower()
+        pattern = {".css": _CSS_REFERENCE, ".js": _JS_IMPORT, ".mjs": _JS_IMPORT}.get(extension)
+        if pattern is not None:
+            try:
+                text = data.decode("utf-8")
+            except UnicodeDecodeError:
+                pass
+            else:
+                text = pattern.sub(lambda m: rewrite(name, m, m.group(3)), text)
+                data = text.encode("utf-8")
+        visiting.discard(name)
+
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        stem, ext = posixpath.splitext(name)
+        hashed[name] = f"{stem}.{digest}{ext}"
+        path = os.path.join(build_folder, hashed[name])
+        if not os.path.exists(path):
+            _write(path, data)
+        if extension in COMPRESSIBLE and len(data) >= MIN_COMPRESS_SIZE:
+            copies = _compress(data)
+            for encoding, body in copies.items():
+                if not os.path.exists(path + ENCODINGS[encoding]):
+                    _write(path + ENCODINGS[encoding], body)
+            if copies:
+                encodings[hashed[name]] = sorted(copies, key=list(ENCODINGS).index)
+        return hashed[name]
+
+    for name in sorted(sources):
+        fingerprint(name)
+
+    manifest = {
+        "assets": {name: posixpath.join(prefix, hashed[name]) for name in sorted(hashed)},
+        "encodings": {
+            posixpath.join(prefix, name): encodings[name] for name in sorted(encodings)
+        },
+    }
+    _write(os.path.join(build_folder, MANIFEST), json.dumps(manifest, indent=1).encode())
+    return manifest
+
+
+class StaticAssets:
+    """Links and serves the fingerprinted build of app/static"""
+
+    def __init__(self, app=None):
+        self.assets = {}  # static file name -> its fingerprinted copy
+        self.encodings = {}  # fingerprinted copy -> precompressed encodings
+        self.immutable = ()
+        self.private = ()
+        self.max_age = 0
+        self.static_folder = None
+        self.build_folder = None
+        self._lock = threading.Lock()
+        self.reset_stats()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.static_folder = app.static_folder
+        self.build_folder = os.path.join(app.static_folder, config["ASSET_BUILD_FOLDER"])
+        self.max_age = config["ASSET_MAX_AGE"]
+        self.assets, self.encodings = {}, {}
+        if config["ASSET_FINGERPRINTS"]:
+            self.load()
+        build = config["ASSET_BUILD_FOLDER"].strip("/") + "/"
+        self.immutable = tuple([build] + list(config["ASSET_IMMUTABLE_PATHS"]))
+        self.private = tuple(config["ASSET_PRIVATE_PATHS"])
+        app.extensions["static_assets"] = self
+        app.url_defaults(self._fingerprint)
+        app.view_functions["static"] = self.send_static_file
+
+    def load(self):
+        """Read the manifest of the last build; without one URLs stay plain"""
+        try:
+            with open(os.path.join(self.build_folder, MANIFEST)) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return False
+        self.assets = manifest["assets"]
+        self.encodings = manifest["encodings"]
+        return True
+
+    def build(self):
+        """Build the fingerprinted copies and switch URLs over to them"""
+        manifest = build_assets(self.static_folder, self.build_folder)
+        self.assets, self.encodings = manifest["assets"], manifest["encodings"]
+        return manifest
+
+    def _fingerprint(self, endpoint, values):
+        if endpoint == "static" and self.assets:
+            hashed = self.assets.get(values.get("filename"))
+            if hashed is not None:
+                values["filename"] = hashed
+
+    def _encoding(self, filename):
+        """The precompressed encoding of filename the client accepts, or None"""
+        for encoding in self.encodings.get(filename, ()):
+            if request.accept_encodings[encoding] > 0:
+                return encoding
+        return None
+
+    def send_static_file(self, filename):
+        """The static view: immutable files get far-future caching and encodings"""
+        if self.private and filename.startswith(self.private):
+            abort(404)
+        if not filename.startswith(self.immutable):
+            self._count("plain")
+            return current_app.send_static_file(filename)
+
+        encoding = self._encoding(filename)
+        response = send_from_directory(
+            current_app.static_folder,
+            filename + ENCODINGS[encoding] if encoding else filename,
+            mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            max_age=self.max_age,
+        )
+        response.cache_control.immutable = True
+        if filename in self.encodings:
+            response.vary.add("Accept-Encoding")
+        if encoding:
+            response.content_encoding = encoding
+        self._count(encoding or "identity")
+        return response
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                self._stats,
+                assets=len(self.assets),
+                precompressed=len(self.encodings),
+                brotli=brotli is not None,
+            )
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {"br": 0, "gzip": 0, "identity": 0, "plain": 0}
+
+
+static_assets = StaticAssets()
@@ -0,0 +1,151 @@
+# app/utils/events.py
+"""In-process publish/subscribe of per-farm change events.
+
+Models registered with publish_on_write announce committed inserts and
+updates as small events ({"type": "alert", "farm_id": 3, "object_id": 41}). The
+/api/events Server-Sent Events stream delivers them to dashboards, which
+then refetch as soon as something changes.
+
+The broker lives in one process: an event published by one worker reaches
+only the streams that worker serves. Dashboards therefore keep their
+one-minute conditional poll for writes handled elsewhere. Each open
+stream also occupies a worker thread, so run streams on gthread or
+gevent workers and cap them with SSE_MAX_CONNECTIONS; try_subscribe()
+takes a slot under the broker's lock, so a burst of requests cannot
+overshoot the cap.
+"""
+import itertools
+import queue
+import threading
+from sqlalchemy.orm import Session
+from .. import db
+
+
+class Subscription:
+    """Queue of events for a set of farms"""
+
+    def __init__(self, broker, farm_ids, maxsize):
+        self.broker = broker
+        self.farm_ids = frozenset(farm_ids)
+        self.queue = queue.Queue(maxsize)
+        self.overflowed = False
+
+    def get(self, timeout):
+        """Next event, or None if nothing arrived within timeout seconds"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # A client this far behind has to refetch everything anyway
+            self.overflowed = True
+
+    def drain(self):
+        """Discard queued events and clear the overflow flag"""
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        self.overflowed = False
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventBroker:
+    """Fan out farm events to the subscriptions interested in them"""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = {}  # farm_id -> set of Subscription
+        self._subscriptions = set()  # all of them, including those with no farms
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.published = 0
+
+    def subscribe(self, farm_ids):
+        return self.try_subscribe(farm_ids, None)
+
+    def try_subscribe(self, farm_ids, limit):
+        """A new Subscription, or None if limit subscriptions are open already"""
+        subscription = Subscription(self, farm_ids, self.queue_size)
+        with self._lock:
+            if limit is not None and len(self._subscriptions) >= limit:
+                return None
+            self._subscriptions.add(subscription)
+            for farm_id in subscription.farm_ids:
+                self._subscribers.setdefault(farm_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+            for farm_id in subscription.farm_ids:
+                subscribers = self._subscribers.get(farm_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[farm_id]
+
+    def publish(self, farm_id, event_type, **data):
+        """Deliver an event to every subscription for farm_id"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(farm_id, ()))
+            event_id = next(self._ids)
+            self.published += 1
+        event = dict(data, id=event_id, type=event_type, farm_id=farm_id)
+        for subscription in subscribers:
+            subscription.put(event)
+
+    def connection_count(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+
+broker = EventBroker()
+
+
+_write_events = {}
+
+
+def publish_on_write(model, event_type, on_update=False):
+    """Publish event_type for instance.farm_id once a transaction writing model commits"""
+    _write_events[model] = (event_type, on_update)
+
+
+@db.event.listens_for(Session, "after_flush")
+def _collect_write_events(session, flush_context):
+    if not _write_events:
+        return
+    pending = session.info.setdefault("farm_events", [])
+    for instance in session.new:
+        spec = _write_events.get(type(instance))
+        if spec is not None:
+            pending.append((instance.farm_id, spec[0], instance.id))
+    for instance in session.dirty:
+        spec = _write_events.get(type(instance))
+        if spec is not None and spec[1] and session.is_modified(instance):
+            pending.append((instance.farm_id, spec[0], instance.id))
+
+
+@db.event.listens_for(Session, "after_commit")
+def _publish_write_events(session):
+    pending = session.info.pop("farm_events", None)
+    for farm_id, event_type, instance_id in dict.fromkeys(pending or ()):
+        broker.publish(farm_id, event_type, object_id=instance_id)
+
+
+@db.event.listens_for(Session, "after_rollback")
+def _discard_write_events(session):
+    session.info.pop("farm_events", None)
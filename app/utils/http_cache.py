@@ -0,0 +1,85 @@
+# app/utils/http_cache.py
+"""Conditional GET support for polled JSON endpoints.
+
+A view decorated with @conditional supplies a cheap version function that
+reads only data versions (counters, max ids, max updated_at). The weak ETag
+is derived from that version, so an unchanged resource is answered with
+304 Not Modified before the full payload is built, and is_not_modified()
+lets work done ahead of the view (the ASGI prefetches) skip such requests.
+"""
+import hashlib
+from functools import wraps
+from flask import current_app, make_response, request
+from flask_login import current_user
+
+
+def _etag_for(parts):
+    identity = current_user.get_id() if current_user.is_authenticated else None
+    raw = repr((request.endpoint, request.full_path, identity, parts)).encode()
+    return hashlib.sha1(raw).hexdigest()[:27]
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since.replace(
+            tzinfo=None
+        )
+    return False
+
+
+def conditional(version, cache_control="private, no-cache"):
+    """Answer conditional GETs for the decorated view from version(*args, **kwargs)
+
+    version returns (parts, last_modified): any hashable description of the
+    data the response depends on, and an optional naive UTC datetime. If it
+    returns None the view runs uncached. Only successful responses get an
+    ETag, Last-Modified and the given Cache-Control header.
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not current_app.config["HTTP_CONDITIONAL_GET"]:
+                return f(*args, **kwargs)
+
+            current = version(*args, **kwargs)
+            if current is None:
+                return f(*args, **kwargs)
+            parts, last_modified = current
+            etag = _etag_for(parts)
+
+            if _not_modified(etag, last_modified):
+                response = make_response("", 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers["Cache-Control"] = cache_control
+            return response
+
+        decorated_function.conditional_version = version
+        return decorated_function
+
+    return decorator
+
+
+def is_not_modified():
+    """Whether the current request's view is @conditional and will answer 304"""
+    if not current_app.config["HTTP_CONDITIONAL_GET"]:
+        return False
+    view = current_app.view_functions.get(request.endpoint)
+    version = getattr(view, "conditional_version", None)
+    if version is None:
+        return False
+    current = version(**request.view_args)
+    if current is None:
+        return False
+    parts, last_modified = current
+    return _not_modified(_etag_for(parts), last_modified)
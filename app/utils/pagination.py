@@ -0,0 +1,132 @@
+# app/utils/pagination.py
+"""Keyset (cursor) pagination for listings ordered newest first.
+
+Pages are addressed by an opaque cursor encoding the (timestamp, id) of the
+last row served, so every page is an index range scan instead of an OFFSET
+over the whole table. Cursors stay valid while new rows are inserted.
+"""
+import base64
+from datetime import datetime
+from flask import current_app, request, url_for
+from .. import db
+
+
+def encode_cursor(sort_value, row_id):
+    """Encode the sort key of a row into an opaque URL-safe cursor"""
+    raw = f"{sort_value.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor, raising ValueError if malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_text, row_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(sort_text), int(row_id)
+    except (TypeError, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+class KeysetPage:
+    """One page of a keyset-paginated listing"""
+
+    def __init__(self, items, next_cursor, per_page, cursor_arg):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.per_page = per_page
+        self.cursor_arg = cursor_arg
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def next_url(self, **kwargs):
+        """URL of the next page for the current endpoint, or None on the last page"""
+        if not self.has_next:
+            return None
+        args = dict(request.view_args or {})
+        args.update(request.args.to_dict())
+        args.update(kwargs)
+        args[self.cursor_arg] = self.next_cursor
+        return url_for(request.endpoint, **args)
+
+    def first_url(self):
+        """URL of the first page for the current endpoint"""
+        args = dict(request.view_args or {})
+        args.update(request.args.to_dict())
+        args.pop(self.cursor_arg, None)
+        return url_for(request.endpoint, **args)
+
+    @property
+    def is_first(self):
+        return not request.args.get(self.cursor_arg)
+
+    def to_dict(self, serialize):
+        """JSON-ready representation, using serialize to convert each item"""
+        return {
+            "items": [serialize(item) for item in self.items],
+            "next_cursor": self.next_cursor,
+            "has_next": self.has_next,
+            "per_page": self.per_page,
+        }
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+def keyset_paginate(query, sort_column, id_column, cursor=None, per_page=20):
+    """Return the page of query that follows cursor, ordered by (sort_column, id_column) descending
+
+    Rows with a NULL sort value are left out of every page, since they have
+    no place in the ordering and no cursor can follow them. All timestamp
+    columns here default to utcnow, so this only drops hand-inserted rows.
+    """
+    query = query.filter(sort_column.isnot(None)).order_by(
+        sort_column.desc(), id_column.desc()
+    )
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        # The leading <= keeps the predicate an index range scan on every backend
+        query = query.filter(
+            sort_column <= sort_value,
+            db.or_(sort_column < sort_value, id_column < row_id),
+        )
+
+    rows = query.limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor(
+            getattr(last, sort_column.key), getattr(last, id_column.key)
+        )
+    return items, next_cursor
+
+
+def paginate(query, sort_column, id_column, cursor_arg="cursor"):
+    """Keyset-paginate query using the cursor and per_page request arguments
+
+    A malformed cursor restarts from the first page rather than failing.
+    """
+    max_per_page = current_app.config["MAX_ITEMS_PER_PAGE"]
+    per_page = request.args.get(
+        "per_page", current_app.config["ITEMS_PER_PAGE"], type=int
+    )
+    per_page = max(1, min(per_page, max_per_page))
+
+    cursor = request.args.get(cursor_arg)
+    try:
+        items, next_cursor = keyset_paginate(
+            query, sort_column, id_column, cursor, per_page
+        )
+    except ValueError:
+        items, next_cursor = keyset_paginate(
+            query, sort_column, id_column, None, per_page
+        )
+    return KeysetPage(items, next_cursor, per_page, cursor_arg)
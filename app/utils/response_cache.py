@@ -0,0 +1,335 @@
+# app/utils/response_cache.py
+"""Server-side cache for expensive JSON responses.
+
+Views decorated with @cached_response store their successful responses
+under a key such as "dashboard:<farm_id>" together with tags such as
+"farm:<farm_id>". Entries expire after a TTL and are dropped early when
+a committed write touches a model registered with invalidate_on_write.
+
+RESPONSE_CACHE_BACKEND selects where entries live:
+
+- "memory": a per-process LRU of at most RESPONSE_CACHE_MAX_ENTRIES entries.
+  Invalidation only reaches the process that made the write, so keep the
+  TTL short when running several workers.
+- "sqlite": a file at RESPONSE_CACHE_PATH shared by every worker on the
+  host, so an invalidation in one worker is seen by all of them.
+- "null": caching disabled.
+"""
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, make_response
+from sqlalchemy.orm import Session
+from .. import db
+
+
+class NullBackend:
+    """Backend that stores nothing"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl, tags):
+        pass
+
+    def delete_tags(self, tags):
+        pass
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class MemoryBackend:
+    """Per-process LRU with per-entry expiry and a tag index"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires, value, tags)
+        self._tags = {}  # tag -> set of keys
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl, tags):
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, value, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def delete_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """Cache file shared by all worker processes on one host"""
+
+    PURGE_EVERY = 256
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._sets = 0
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS entry_tags (
+                    tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS ix_entry_tags_key ON entry_tags (key);
+                """
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = (
+            self._connect()
+            .execute(
+                "SELECT value FROM entries WHERE key = ? AND expires > ?",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, key, value, ttl, tags):
+        conn = self._connect()
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires) VALUES (?, ?, ?)",
+                (key, blob, time.time() + ttl),
+            )
+            conn.execute("DELETE FROM entry_tags WHERE key = ?", (key,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO entry_tags (tag, key) VALUES (?, ?)",
+                [(tag, key) for tag in tags],
+            )
+        self._sets += 1
+        if self._sets % self.PURGE_EVERY == 0:
+            self.purge_expired()
+
+    def delete_tags(self, tags):
+        tags = list(tags)
+        if not tags:
+            return
+        marks = ", ".join("?" * len(tags))
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            tagged = f"SELECT key FROM entry_tags WHERE tag IN ({marks})"
+            conn.execute(f"DELETE FROM entries WHERE key IN ({tagged})", tags)
+            conn.execute(f"DELETE FROM entry_tags WHERE key IN ({tagged})", tags)
+
+    def purge_expired(self):
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM entries WHERE expires <= ?", (time.time(),))
+            conn.execute(
+                "DELETE FROM entry_tags WHERE key NOT IN (SELECT key FROM entries)"
+            )
+
+    def clear(self):
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM entry_tags")
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+class ResponseCache:
+    """Response cache extension with hit/miss counters"""
+
+    def __init__(self, app=None):
+        self.backend = NullBackend()
+        self.default_ttl = 60
+        self._lock = threading.Lock()
+        self.reset_stats()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        kind = config["RESPONSE_CACHE_BACKEND"]
+        if kind == "memory":
+            self.backend = MemoryBackend(config["RESPONSE_CACHE_MAX_ENTRIES"])
+        elif kind == "sqlite":
+            self.backend = SQLiteBackend(config["RESPONSE_CACHE_PATH"])
+        elif kind in (None, "", "null"):
+            self.backend = NullBackend()
+        else:
+            raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {kind!r}")
+        self.default_ttl = config["RESPONSE_CACHE_TTL"]
+        app.extensions["response_cache"] = self
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
+
+    def get(self, key):
+        value = self.backend.get(key)
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    def peek(self, key):
+        """Cached value for key without counting a lookup"""
+        return self.backend.get(key)
+
+    def set(self, key, value, ttl=None, tags=()):
+        self.backend.set(key, value, ttl or self.default_ttl, tags)
+        self._count("sets")
+
+    def invalidate(self, *tags):
+        """Drop every entry carrying any of tags"""
+        if tags:
+            self.backend.delete_tags(tags)
+            self._count("invalidations", len(tags))
+
+    def clear(self):
+        self.backend.clear()
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {"hits": 0, "misses": 0, "sets": 0, "invalidations": 0}
+
+    def stats(self):
+        """Counters for this process plus the current entry count"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 3) if lookups else None
+        stats["backend"] = type(self.backend).__name__
+        stats["entries"] = len(self.backend)
+        return stats
+
+
+response_cache = ResponseCache()
+
+
+def cached_response(key, ttl=None):
+    """Serve the decorated view from the response cache
+
+    key(*args, **kwargs) returns (cache_key, tags) for the request, or None
+    to bypass the cache. Only 200 responses are stored. Run any
+    authorization the view needs inside key, since a hit never reaches
+    the view.
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            entry = key(*args, **kwargs)
+            if entry is None:
+                return f(*args, **kwargs)
+            cache_key, tags = entry
+
+            hit = response_cache.get(cache_key)
+            if hit is not None:
+                body, mimetype = hit
+                response = make_response(body)
+                response.mimetype = mimetype
+                return response
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                response_cache.set(
+                    cache_key,
+                    (response.get_data(), response.mimetype),
+                    ttl or current_app.config["RESPONSE_CACHE_TTL"],
+                    tags,
+                )
+            return response
+
+        return decorated_function
+
+    return decorator
+
+
+_write_tags = {}
+
+
+def invalidate_on_write(*models, tags):
+    """Invalidate tags(instance) once a transaction writing any of models commits"""
+    for model in models:
+        _write_tags[model] = tags
+
+
+def _pending_tags(session):
+    return session.info.setdefault("response_cache_tags", set())
+
+
+@db.event.listens_for(Session, "after_flush")
+def _collect_write_tags(session, flush_context):
+    if not _write_tags:
+        return
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        tags = _write_tags.get(type(instance))
+        if tags is not None:
+            _pending_tags(session).update(tags(instance))
+
+
+@db.event.listens_for(Session, "after_commit")
+def _invalidate_written_tags(session):
+    tags = session.info.pop("response_cache_tags", None)
+    if tags:
+        response_cache.invalidate(*tags)
+
+
+@db.event.listens_for(Session, "after_rollback")
+def _discard_written_tags(session):
+    session.info.pop("response_cache_tags", None)
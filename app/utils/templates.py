@@ -0,0 +1,45 @@
+# app/utils/templates.py
+"""Compiled template reuse across renders, workers and restarts.
+
+Jinja compiles a template to Python on its first render in each process,
+and dashboard/index.html pulls in base.html and its partials, so the
+first request of every worker waited on compiling most of app/templates.
+Compiled templates are now written to a FileSystemBytecodeCache in
+TEMPLATE_CACHE_DIR, keyed by each template's source checksum, and
+loaded from there by later processes. precompile_templates() compiles
+everything up front; wsgi.py calls it before gunicorn forks, so the
+workers share the compiled templates with the master.
+
+With TEMPLATES_AUTO_RELOAD off (production), a compiled template is used
+as is; with it on, Jinja checks the source's mtime on every render.
+"""
+import os
+from jinja2 import FileSystemBytecodeCache, TemplateSyntaxError
+
+
+def init_app(app):
+    """Give app.jinja_env a bytecode cache, unless TEMPLATE_CACHE_DIR is unset"""
+    directory = app.config["TEMPLATE_CACHE_DIR"]
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+def precompile_templates(app):
+    """Compile every template now if TEMPLATE_PRECOMPILE (call before forking)
+
+    Returns how many were compiled. A template that does not compile is
+    logged and left to fail when rendered, as it would have before.
+    """
+    if not app.config["TEMPLATE_PRECOMPILE"]:
+        return 0
+    env = app.jinja_env
+    compiled = 0
+    for name in env.list_templates():
+        try:
+            env.get_template(name)
+        except TemplateSyntaxError as e:
+            app.logger.error(f"Template {name} does not compile: {e}")
+        else:
+            compiled += 1
+    return compiled
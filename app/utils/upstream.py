@@ -0,0 +1,57 @@
+# app/utils/upstream.py
+"""Outbound GET requests to third-party JSON APIs.
+
+Views call get() instead of requests.get(). Under WSGI that is a plain
+blocking request. Under the ASGI entry point (app/asgi.py) an async view
+first fetches the same (url, params) pairs concurrently with an async
+client and passes the results in the WSGI environ, so the view finds them
+already answered and its worker thread never waits on the network.
+"""
+import json
+from urllib.parse import urlencode
+import requests
+from flask import current_app, has_request_context, request
+
+PREFETCH_ENVIRON_KEY = "farmeye.upstream"
+
+
+class UpstreamResponse:
+    """The parts of a requests.Response that views read"""
+
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class UpstreamError:
+    """A prefetch that failed; get() raises it as a requests exception"""
+
+    def __init__(self, message):
+        self.message = message
+
+
+def request_key(url, params=None):
+    """Identity of a GET request, shared by get() and the async prefetcher"""
+    if not params:
+        return url
+    return f"{url}?{urlencode(sorted(params.items()))}"
+
+
+def get(url, params=None):
+    """GET url, answering from the ASGI prefetch when one is available"""
+    if has_request_context():
+        prefetched = request.environ.get(PREFETCH_ENVIRON_KEY)
+        if prefetched:
+            result = prefetched.get(request_key(url, params))
+            if isinstance(result, UpstreamError):
+                raise requests.ConnectionError(result.message)
+            if result is not None:
+                return result
+
+    response = requests.get(
+        url, params=params, timeout=current_app.config["UPSTREAM_TIMEOUT"]
+    )
+    return UpstreamResponse(response.status_code, response.text)
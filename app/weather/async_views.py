@@ -0,0 +1,29 @@
+# app/weather/async_views.py
+"""Async views for the weather JSON API, used by the ASGI entry point only"""
+from flask_login import current_user
+from ..asgi import async_view
+from ..farm.models import Farm
+from ..utils.http_cache import is_not_modified
+from .routes import weather_requests
+
+
+def _weather_plan(location):
+    # Only fetch for requests the Flask view will serve (login + farm registration)
+    if not current_user.is_authenticated:
+        return []
+    if Farm.query.filter_by(user_id=current_user.id).first() is None:
+        return []
+    # A 304 is answered without calling OpenWeather
+    if is_not_modified():
+        return []
+    return weather_requests(location)
+
+
+@async_view("/weather/api/current/<location>")
+@async_view("/weather/api/forecast/<location>")
+async def weather_api(request, location):
+    """Fetch current weather and forecast concurrently, then run the Flask view"""
+    plan = await request.run_sync(_weather_plan, location)
+    if plan:
+        await request.prefetch(plan)
+    return await request.dispatch()
@@ -4,6 +4,7 @@ import requests
 import json
 import math
 import platform
+import time
 from datetime import datetime, timedelta
 from flask import (
     render_template,
@@ -18,6 +19,8 @@ from flask_login import login_required, current_user
 from . import weather
 from ..farm.models import Farm
 from ..decorators import require_farm_registration
+from ..utils.http_cache import conditional
+from ..utils import upstream
 from app import db
 
 import traceback
@@ -203,21 +206,29 @@ def location_weather(location):
             return render_template("dashboard/weather.html", **template_vars)
 
 
+def weather_requests(location):
+    """The (url, params) pairs fetch_weather_data requests for location"""
+    base_url = current_app.config["OPENWEATHER_BASE_URL"]
+    params = {
+        "q": location,
+        "appid": OPENWEATHER_API_KEY,
+        "units": "metric",
+    }
+    # Current weather and forecast APIs both accept city names directly
+    return [(f"{base_url}/weather", params), (f"{base_url}/forecast", params)]
+
+
 def fetch_weather_data(location):
     """Fetch weather data from OpenWeatherMap using location name"""
     current_app.logger.info(f"Fetching weather for location: {location}")
 
     try:
-        # Current Weather API call (accepts city names directly)
-        current_url = "https://api.openweathermap.org/data/2.5/weather"
-        current_params = {
-            "q": location,
-            "appid": OPENWEATHER_API_KEY,
-            "units": "metric",
-        }
+        (current_url, current_params), (forecast_url, forecast_params) = (
+            weather_requests(location)
+        )
 
         current_app.logger.info(f"Requesting current weather from {current_url}")
-        current_response = requests.get(current_url, params=current_params)
+        current_response = upstream.get(current_url, params=current_params)
         current_app.logger.info(
             f"Current weather API status: {current_response.status_code}"
         )
@@ -228,16 +239,8 @@ def fetch_weather_data(location):
 
         current_data = current_response.json()
 
-        # Forecast API call (accepts city names directly)
-        forecast_url = "https://api.openweathermap.org/data/2.5/forecast"
-        forecast_params = {
-            "q": location,
-            "appid": OPENWEATHER_API_KEY,
-            "units": "metric",
-        }
-
         current_app.logger.info(f"Requesting forecast from {forecast_url}")
-        forecast_response = requests.get(forecast_url, params=forecast_params)
+        forecast_response = upstream.get(forecast_url, params=forecast_params)
         current_app.logger.info(f"Forecast API status: {forecast_response.status_code}")
 
         if forecast_response.status_code != 200:
@@ -529,9 +532,17 @@ def api_current_weather(location):
         return jsonify({"error": str(e)}), 500
 
 
+def _forecast_version(location):
+    """Forecasts are treated as fixed within each WEATHER_CACHE_SECONDS bucket"""
+    period = current_app.config["WEATHER_CACHE_SECONDS"]
+    bucket_start = int(time.time() // period) * period
+    return (location.lower(), bucket_start), datetime.utcfromtimestamp(bucket_start)
+
+
 @weather.route("/api/forecast/<location>")
 @login_required
 @require_farm_registration
+@conditional(_forecast_version, cache_control="private, max-age=300")
 def api_forecast(location):
     """API endpoint for weather forecast for specific location"""
     try:
@@ -0,0 +1,6 @@
+import os
+from app import create_app
+from app.asgi import create_asgi_app
+
+# Serve with an ASGI server, e.g. `uvicorn asgi:application --workers 4`
+application = create_asgi_app(create_app(os.getenv('FLASK_CONFIG') or 'production'))
@@ -0,0 +1,107 @@
+# gunicorn.conf.py
+"""Production gunicorn settings, read automatically by `gunicorn wsgi:app`.
+
+Every setting can be overridden from the environment:
+
+GUNICORN_WORKER_CLASS   sync, gthread (default) or gevent
+WEB_CONCURRENCY         worker processes (default depends on the worker class)
+GUNICORN_THREADS        threads per gthread worker (default 8)
+GUNICORN_CONNECTIONS    concurrent connections per gevent worker (default 1000)
+GUNICORN_PRELOAD        load the app once in the master before forking (default on)
+GUNICORN_BIND, GUNICORN_TIMEOUT, GUNICORN_KEEPALIVE, GUNICORN_MAX_REQUESTS,
+GUNICORN_MAX_REQUESTS_JITTER, GUNICORN_LOGLEVEL
+SSE_MAX_CONNECTIONS     event streams per worker (default: half the gthread threads,
+                        none on sync workers, the app's default on gevent)
+
+Choosing a worker class:
+- sync: one request per process. Simplest, but a slow upstream call or an
+  /api/events stream blocks the whole worker.
+- gthread: requests share a process's memory and DB pool across threads.
+  The default, and what the event streams and weather calls need.
+- gevent: thousands of mostly idle connections (event streams) per worker.
+  Needs the gevent package; CPU-bound inference still blocks the loop.
+"""
+import gc
+import multiprocessing
+import os
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+cores = multiprocessing.cpu_count()
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+if worker_class not in ("sync", "gthread", "gevent"):
+    raise ValueError(f"Unsupported GUNICORN_WORKER_CLASS: {worker_class!r}")
+
+if worker_class == "sync":
+    workers = _env_int("WEB_CONCURRENCY", 2 * cores + 1)
+elif worker_class == "gthread":
+    workers = _env_int("WEB_CONCURRENCY", cores + 1)
+    threads = _env_int("GUNICORN_THREADS", 8)
+else:
+    workers = _env_int("WEB_CONCURRENCY", cores)
+    worker_connections = _env_int("GUNICORN_CONNECTIONS", 1000)
+
+# Each open /api/events stream holds a thread (a whole sync worker) until it
+# closes, so streams must leave threads for ordinary requests. Refused
+# streams get 503 and the dashboard keeps polling. The app reads this
+# variable when it is imported, after this file.
+if worker_class == "sync":
+    os.environ.setdefault("SSE_MAX_CONNECTIONS", "0")
+elif worker_class == "gthread":
+    os.environ.setdefault("SSE_MAX_CONNECTIONS", str(threads // 2))
+    if int(os.environ["SSE_MAX_CONNECTIONS"]) >= threads:
+        raise ValueError("SSE_MAX_CONNECTIONS must be below GUNICORN_THREADS on gthread workers")
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Import the app (and any model weights it loads) once in the master so
+# workers share those pages copy-on-write instead of each loading a copy.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() in ("true", "on", "1")
+
+# Recycle workers to bound slow leaks; the jitter stops them restarting together.
+max_requests = _env_int("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = _env_int("GUNICORN_MAX_REQUESTS_JITTER", 100)
+
+# A little longer than a polling client's gap between requests on one connection
+keepalive = _env_int("GUNICORN_KEEPALIVE", 5)
+timeout = _env_int("GUNICORN_TIMEOUT", 60)
+graceful_timeout = 30
+
+# Heartbeat files on tmpfs, so a slow disk can't make workers look dead
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOGLEVEL", "info")
+forwarded_allow_ips = os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def when_ready(server):
+    """Freeze the preloaded objects so the workers' GC never writes to their pages"""
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    """Drop connections inherited from the master so workers never share a socket"""
+    if not preload_app:
+        return
+    from app import db
+    from app.utils.response_cache import response_cache
+
+    app = worker.app.wsgi()
+    with app.app_context():
+        db.engine.dispose(close=False)
+    # Reopens the SQLite backend's file handle in this process
+    response_cache.init_app(app)
+
+
+def worker_exit(server, worker):
+    """Store the weed counts this worker has not flushed yet"""
+    from app.farm.density import weed_density
+
+    weed_density.flush_all()
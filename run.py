@@ -1,15 +1,89 @@
 import os
+from datetime import timedelta
+import click
 from app import create_app, db
 from app.auth.models import User
-from flask_migrate import Migrate
 
 app = create_app(os.getenv('FLASK_CONFIG') or 'development')
-migrate = Migrate(app, db)
 
 @app.shell_context_processor
 def make_shell_context():
     """Make database objects available in Flask shell"""
     return dict(db=db, User=User)
 
+@app.cli.command('rebuild-alert-counts')
+def rebuild_alert_counts():
+    """Recompute the denormalized unread alert counters"""
+    from app.farm.models import rebuild_unread_alert_counts
+    rebuild_unread_alert_counts()
+    print('Unread alert counters rebuilt.')
+
+@app.cli.command('hash-images')
+def hash_images():
+    """Record the content hash of images uploaded before uploads were hashed"""
+    from app.farm.models import FarmImage
+    from app.farm.storage import hash_file, image_path
+    hashed = missing = 0
+    for image in FarmImage.query.filter(FarmImage.content_hash.is_(None), FarmImage.filename.isnot(None)):
+        path = image_path(image.filename)
+        if not os.path.exists(path):
+            missing += 1
+            continue
+        image.content_hash = hash_file(path, app.config['UPLOAD_CHUNK_SIZE'])
+        hashed += 1
+    db.session.commit()
+    print(f'Hashed {hashed} images ({missing} files missing).')
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Fingerprint and precompress app/static for far-future caching"""
+    from app.utils.assets import static_assets, brotli
+    manifest = static_assets.build()
+    print(f"Built {len(manifest['assets'])} assets into {static_assets.build_folder} "
+          f"({len(manifest['encodings'])} precompressed{'' if brotli else ', gzip only: brotli not installed'}).")
+
+@app.cli.command('expire-video-uploads')
+@click.option('--hours', default=None, type=int, help='Age in hours (default: VIDEO_UPLOAD_EXPIRE_HOURS)')
+def expire_video_uploads_command(hours):
+    """Delete video uploads left incomplete, and their partial files"""
+    from app.api.uploads import expire_video_uploads
+    hours = hours or app.config['VIDEO_UPLOAD_EXPIRE_HOURS']
+    print(f'Removed {expire_video_uploads(timedelta(hours=hours))} incomplete uploads.')
+
+@app.cli.command('issue-token')
+@click.argument('email')
+@click.option('--farm', 'farms', multiple=True, type=int, help='Limit the token to this farm id (repeatable)')
+@click.option('--scope', 'scopes', multiple=True, help='Scope to grant (repeatable, default: all)')
+@click.option('--days', default=30, help='Token lifetime in days')
+def issue_device_token(email, farms, scopes, days):
+    """Issue a bearer token for a device acting as the user with EMAIL"""
+    from app.auth.tokens import issue_token, ALL_FARMS, TOKEN_SCOPES
+    user = User.query.filter_by(email=email.lower()).first()
+    if user is None:
+        raise click.ClickException(f'No user with email {email}')
+    print(issue_token(user, farms=list(farms) or ALL_FARMS, scopes=scopes or TOKEN_SCOPES,
+                      expires_in=timedelta(days=days)))
+
+@app.cli.command('inference-server')
+def inference_server():
+    """Serve the maize/weed detector to the web workers (DETECTOR_MODE=service)"""
+    from app.feed.detector import YoloDetector, serve
+    detector = YoloDetector.from_config(app.config)
+    print(f"Inference service on {app.config['DETECTOR_SOCKET']}")
+    serve(detector, app.config['DETECTOR_SOCKET'], slots=app.config['DETECTOR_SHM_SLOTS'],
+          slot_bytes=app.config['DETECTOR_SHM_SLOT_BYTES'])
+
+@app.cli.command('export-detector')
+@click.option('--format', 'backend', type=click.Choice(['onnx', 'torchscript']), default='onnx')
+@click.option('--int8', is_flag=True, help='Also write a dynamically quantized INT8 copy (onnx only)')
+@click.option('--imgsz', default=None, type=int, help='Input size (default: DETECTOR_IMGSZ)')
+def export_detector(backend, int8, imgsz):
+    """Export the detector weights for DETECTOR_BACKEND=onnx or torchscript"""
+    from app.feed.backends import export_model
+    for path in export_model(app.config['DETECTOR_MODEL_PATH'], backend,
+                             imgsz=imgsz or app.config['DETECTOR_IMGSZ'], int8=int8):
+        print(f'Wrote {path}')
+
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    # Development server only; production runs gunicorn wsgi:app (see gunicorn.conf.py)
+    app.run(debug=app.config.get('DEBUG', False))
\ No newline at end of file
@@ -0,0 +1,11 @@
+import os
+from app import create_app
+from app.feed.detector import preload_detector
+from app.utils.templates import precompile_templates
+
+# Production entry point: gunicorn wsgi:app (settings in gunicorn.conf.py)
+app = create_app(os.getenv('FLASK_CONFIG') or 'production')
+
+# With gunicorn's preload_app this runs once in the master, before the fork
+preload_detector(app)
+precompile_templates(app)